@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Permission
+from django.db.models import Prefetch
 
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 from . import models
+from courses import models as course_models
 
 #######################################################################################################################
 
@@ -25,14 +27,17 @@ class CustomUserAdmin(BaseUserAdmin):
     list_filter = ('groups__name', )
     fieldsets = ()
 
+    def get_queryset(self, request):
+        return super(CustomUserAdmin, self).get_queryset(request).prefetch_related('groups')
+
     def is_manager(self, obj):
-        return obj.groups.filter(name='managers').exists()
+        return obj.has_group('managers')
 
     def is_teacher(self, obj):
-        return obj.groups.filter(name='teachers').exists()
+        return obj.has_group('teachers')
 
     def is_student(self, obj):
-        return obj.groups.filter(name='students').exists()
+        return obj.has_group('students')
 
     is_manager.boolean = True
     is_teacher.boolean = True
@@ -41,6 +46,7 @@ class CustomUserAdmin(BaseUserAdmin):
 
 class AddressAdmin(admin.ModelAdmin):
     list_display = ('profile', 'country', 'city', 'street')
+    list_select_related = ('profile', )
 
     filter_horizontal = ()
     list_filter = ()
@@ -50,6 +56,7 @@ class AddressAdmin(admin.ModelAdmin):
 
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'first_name', 'last_name')
+    list_select_related = ('user', )
     readonly_fields = ('id',)
     exclude = ('USERNAME_FIELD', )
 
@@ -59,7 +66,35 @@ class ProfileAdmin(admin.ModelAdmin):
     ordering = ()
 
 
-class TeacherAdmin(admin.ModelAdmin):
+class PermissionAdmin(admin.ModelAdmin):
+    list_select_related = ('content_type', )
+
+
+class StaffWorkerAdmin(admin.ModelAdmin):
+    """Staff changelists with supervised courses and instances loaded in one query per relation."""
+    list_select_related = ('user', )
+
+    def get_queryset(self, request):
+        qs = super(StaffWorkerAdmin, self).get_queryset(request)
+        return qs.prefetch_related(*[
+            Prefetch(field, queryset=queryset) for field, queryset in self.get_supervised_querysets().items()
+        ])
+
+    def get_supervised_querysets(self):
+        return {}
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        querysets = self.get_supervised_querysets()
+        if db_field.name in querysets:
+            kwargs['queryset'] = querysets[db_field.name]
+        return super(StaffWorkerAdmin, self).formfield_for_manytomany(db_field, request, **kwargs)
+
+    @staticmethod
+    def join_supervised(related):
+        return "; ".join(str(obj) for obj in related.all()) or '-'
+
+
+class TeacherAdmin(StaffWorkerAdmin):
     list_display = ('user', 'get_supervised_courses')
     exclude = ('USERNAME_FIELD', )
 
@@ -69,11 +104,11 @@ class TeacherAdmin(admin.ModelAdmin):
     ordering = ()
     readonly_fields = ('get_user_link', )
 
+    def get_supervised_querysets(self):
+        return {'supervised_courses': course_models.CourseInstance.objects.select_related('course')}
+
     def get_supervised_courses(self, obj: models.Teacher):
-        if obj.supervised_courses.all():
-            return "; ".join([str(course) for course in obj.supervised_courses.all()])
-        else:
-            return '-'
+        return self.join_supervised(obj.supervised_courses)
 
     def get_user_link(self, obj: models.Teacher):
         return mark_safe(
@@ -83,7 +118,7 @@ class TeacherAdmin(admin.ModelAdmin):
     get_user_link.short_description = 'user link'
 
 
-class ManagerAdmin(admin.ModelAdmin):
+class ManagerAdmin(StaffWorkerAdmin):
     list_display = ('user', 'get_supervised_courses', 'get_supervised_course_instances')
     exclude = ('USERNAME_FIELD', )
 
@@ -98,17 +133,17 @@ class ManagerAdmin(admin.ModelAdmin):
             f"""<a href="{reverse('admin:accounts_customuser_change', args=(obj.user.pk,))}">{obj.user}</a>"""
         )
 
+    def get_supervised_querysets(self):
+        return {
+            'supervised_courses': course_models.Course.objects.all(),
+            'supervised_course_instances': course_models.CourseInstance.objects.select_related('course'),
+        }
+
     def get_supervised_courses(self, obj):
-        if obj.supervised_courses.all():
-            return "; ".join([str(course) for course in obj.supervised_courses.all()])
-        else:
-            return '-'
+        return self.join_supervised(obj.supervised_courses)
 
     def get_supervised_course_instances(self, obj):
-        if obj.supervised_courses.all():
-            return "; ".join([str(course_i) for course_i in obj.supervised_course_instances.all()])
-        else:
-            return '-'
+        return self.join_supervised(obj.supervised_course_instances)
 
     get_user_link.short_description = 'user link'
 
@@ -120,7 +155,7 @@ admin.site.register(models.CustomUser, CustomUserAdmin)
 admin.site.register(models.Profile, ProfileAdmin)
 admin.site.register(models.Address, AddressAdmin)
 
-admin.site.register(Permission)
+admin.site.register(Permission, PermissionAdmin)
 
 admin.site.register(models.Teacher, TeacherAdmin)
 admin.site.register(models.Manager, ManagerAdmin)
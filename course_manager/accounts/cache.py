@@ -0,0 +1,103 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+
+##################################################################################################################
+
+PERMISSIONS_TIMEOUT = 60 * 60
+
+PERMISSIONS_VERSION_KEY = 'accounts:permissions:version'
+USER_PERMISSIONS_VERSION_KEY = 'accounts:permissions:version:{pk}'
+USER_PERMISSIONS_KEY = 'accounts:permissions:{pk}:{version}:{user_version}'
+
+USER_NAV_VERSION_KEY = 'accounts:nav:version:{pk}'
+
+
+def get_cache():
+    # Shared between worker processes, a bump seen by only one of them would leave the others stale
+    return caches[getattr(settings, 'ACCOUNT_CACHE_ALIAS', 'default')]
+
+
+def _new_version():
+    # Random instead of incremented: the file based cache has no atomic incr, so two workers bumping at once
+    # could write the same number, while two fresh tokens always differ from the one they replace. A version
+    # evicted from the cache can not come back with a value that old entries used either.
+    return uuid.uuid4().hex[:12]
+
+
+def _get_versions(*keys):
+    account_cache = get_cache()
+    versions = account_cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            account_cache.add(key, _new_version(), None)
+            versions[key] = account_cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _set_new_version(key):
+    get_cache().set(key, _new_version(), None)
+
+
+def _bump_version(key):
+    # Bumped again on commit: entries cached by other requests before the commit would be stale
+    _set_new_version(key)
+    transaction.on_commit(lambda: _set_new_version(key))
+
+
+def bump_permissions_version():
+    """Invalidate cached permissions of every user (group or permission rows changed)."""
+    _bump_version(PERMISSIONS_VERSION_KEY)
+
+
+def bump_user_permissions_version(*user_pks):
+    """Invalidate cached permissions of the given users (their groups, permissions or flags changed)."""
+    for pk in user_pks:
+        _bump_version(USER_PERMISSIONS_VERSION_KEY.format(pk=pk))
+
+
+def resolve_permissions(user):
+    """All permissions of the user as a frozenset of "app_label.codename" strings."""
+    from django.contrib.auth.models import Permission
+
+    permissions = Permission.objects.all()
+    if not user.is_superuser:
+        permissions = permissions.filter(Q(group__user=user) | Q(user=user))
+    return frozenset(
+        f"{app_label}.{codename}"
+        for app_label, codename in permissions.values_list('content_type__app_label', 'codename').distinct()
+    )
+
+
+def get_permissions(user):
+    """Permissions of the user, shared across requests until one of the versions is bumped."""
+    version, user_version = _get_versions(
+        PERMISSIONS_VERSION_KEY,
+        USER_PERMISSIONS_VERSION_KEY.format(pk=user.pk),
+    )
+    key = USER_PERMISSIONS_KEY.format(pk=user.pk, version=version, user_version=user_version)
+    account_cache = get_cache()
+    permissions = account_cache.get(key)
+    if permissions is None:
+        permissions = resolve_permissions(user)
+        account_cache.set(key, permissions, PERMISSIONS_TIMEOUT)
+    return permissions
+
+
+def bump_nav_version(*user_pks):
+    """Invalidate the cached navbar of the given users (their profile or groups changed)."""
+    for pk in user_pks:
+        _bump_version(USER_NAV_VERSION_KEY.format(pk=pk))
+
+
+def get_nav_version(user):
+    """
+    Version of the user's navbar fragment. Group and permission row changes (a renamed group included)
+    are covered by the global permissions version. The fragment is kept in the same shared cache as the
+    versions (`{% cache ... using="accounts" %}` in base.html), so every worker sees a bump.
+    """
+    version, user_version = _get_versions(PERMISSIONS_VERSION_KEY, USER_NAV_VERSION_KEY.format(pk=user.pk))
+    return f'{version}.{user_version}'
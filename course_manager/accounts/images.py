@@ -0,0 +1,144 @@
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+##################################################################################################################
+
+# Square avatar variants (pixels), 1x and 2x of the navbar picture
+VARIANT_SIZES = (48, 96)
+# Every variant exists as WebP and in the fallback format of its original
+WEBP = 'webp'
+VARIANTS_DIR = 'thumbnails'
+
+PIL_FORMATS = {'webp': 'WEBP', 'png': 'PNG', 'jpeg': 'JPEG'}
+EXTENSIONS = {'webp': 'webp', 'png': 'png', 'jpeg': 'jpg'}
+SAVE_OPTIONS = {
+    'webp': {'quality': 80, 'method': 4},
+    'png': {'optimize': True},
+    'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_fallback_format(name):
+    """Format for browsers without WebP: PNG keeps the transparency of PNG and GIF originals."""
+    return 'png' if posixpath.splitext(name)[1].lower() in ('.png', '.gif') else 'jpeg'
+
+
+def get_variant_formats(name):
+    return WEBP, get_fallback_format(name)
+
+
+def get_variant_name(name, size, image_format):
+    """`images/profile_pics/tom.jpg` -> `images/profile_pics/thumbnails/tom-48.webp`"""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, VARIANTS_DIR, f'{stem}-{size}.{EXTENSIONS[image_format]}')
+
+
+def get_variant_names(name):
+    return [
+        (size, image_format, get_variant_name(name, size, image_format))
+        for size in VARIANT_SIZES
+        for image_format in get_variant_formats(name)
+    ]
+
+
+def is_variant_source(name):
+    """Only profile pictures get variants, so the lazy view can not be used to process arbitrary media."""
+    upload_to = posixpath.join('images', 'profile_pics', '')
+    return (
+        bool(name) and name.startswith(upload_to)
+        and f'/{VARIANTS_DIR}/' not in name and '..' not in name.split('/')
+    )
+
+
+def render_variant(image, size, image_format):
+    variant = ImageOps.fit(image, (size, size), method=Image.LANCZOS)
+    if image_format == 'jpeg' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    elif variant.mode not in ('RGB', 'RGBA'):
+        variant = variant.convert('RGBA')
+    buffer = BytesIO()
+    variant.save(buffer, PIL_FORMATS[image_format], **SAVE_OPTIONS[image_format])
+    return buffer.getvalue()
+
+
+def generate_variants(name, storage=default_storage):
+    """Creates the missing variants of the picture `name`; returns the names of the created ones."""
+    missing = [variant for variant in get_variant_names(name) if not storage.exists(variant[2])]
+    # A picture deleted before its turn in the pool has nothing left to resize
+    if not missing or not storage.exists(name):
+        return []
+
+    with storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        # Phone photos are often stored sideways with an orientation tag
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    created = []
+    for size, image_format, variant_name in missing:
+        content = ContentFile(render_variant(image, size, image_format))
+        # A concurrent worker may have won the race, the storage then picks another name which is dropped
+        saved_name = storage.save(variant_name, content)
+        if saved_name != variant_name:
+            storage.delete(saved_name)
+        created.append(variant_name)
+    return created
+
+
+def delete_variants(name, storage=default_storage):
+    for _, _, variant_name in get_variant_names(name):
+        storage.delete(variant_name)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_VARIANT_THREADS', 2),
+                thread_name_prefix='image-variants',
+            )
+        return _executor
+
+
+def _generate_logged(name):
+    try:
+        return generate_variants(name)
+    except Exception:
+        logger.exception('Could not generate the variants of %s', name)
+
+
+def schedule_variants(name):
+    """
+    Generates the variants off the request path. Pillow releases the GIL while decoding, resizing and
+    encoding, so a small thread pool is enough. With `IMAGE_VARIANT_THREADS = 0` they are made right away.
+    """
+    if not is_variant_source(name):
+        return None
+    if not getattr(settings, 'IMAGE_VARIANT_THREADS', 2):
+        return _generate_logged(name)
+    return get_executor().submit(_generate_logged, name)
+
+
+def get_variant_url(name, size, image_format, storage=default_storage):
+    """Media URL of a variant, or the URL of the view making it when it does not exist yet."""
+    variant_name = get_variant_name(name, size, image_format)
+    if storage.exists(variant_name):
+        return storage.url(variant_name)
+    return reverse('accounts:profile-pic-variant', kwargs={'size': size, 'image_format': image_format, 'name': name})
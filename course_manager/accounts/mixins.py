@@ -0,0 +1,26 @@
+from django.core.exceptions import PermissionDenied
+
+from braces.views import GroupRequiredMixin as BaseGroupRequiredMixin
+
+
+##################################################################################################################
+
+
+class GroupRequiredMixin(BaseGroupRequiredMixin):
+    """
+    `braces.views.GroupRequiredMixin` that checks the memoized group names of the user,
+    so the membership query is shared with the templates rendered in the same request.
+    """
+
+    def check_membership(self, groups):
+        if self.request.user.is_superuser:
+            return True
+        return self.request.user.has_group(*groups)
+
+    def dispatch(self, request, *args, **kwargs):
+        self.request = request
+        if not request.user.is_authenticated or not self.check_membership(self.get_group_required()):
+            # `handle_no_permission` of django's LoginRequiredMixin, which comes first in the views' MRO,
+            # does not accept the request argument braces passes to it
+            raise PermissionDenied
+        return super(BaseGroupRequiredMixin, self).dispatch(request, *args, **kwargs)
@@ -8,6 +8,8 @@ from django.conf import settings
 
 from phonenumber_field.modelfields import PhoneNumberField
 
+from . import cache as account_cache
+
 ##################################################################################################################
 from courses.models import CourseInstance, Course
 
@@ -50,6 +52,40 @@ class CustomUserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def bulk_create_with_profiles(self, users, profiles=None, batch_size=None):
+        """
+        Insert `users` with their profiles and addresses in bulk, bypassing the per-user signals.
+
+        `profiles` is an optional list of unsaved profiles matching `users` by position.
+        Users without a pk get it looked up by email after the insert.
+        """
+        users = list(users)
+        self.bulk_create(users, batch_size=batch_size)
+
+        missing = {user.email: user for user in users if user.pk is None}
+        emails = list(missing)
+        for start in range(0, len(emails), 500):
+            for email, pk in self.filter(email__in=emails[start:start + 500]).values_list('email', 'pk'):
+                missing[email].pk = pk
+
+        if profiles is None:
+            profiles = [Profile() for _ in users]
+        for user, profile in zip(users, profiles):
+            profile.user_id = user.pk
+        Profile.objects.bulk_create(profiles, batch_size=batch_size)
+
+        profile_ids = {}
+        user_ids = [user.pk for user in users]
+        for start in range(0, len(user_ids), 500):
+            profile_ids.update(
+                Profile.objects.filter(user_id__in=user_ids[start:start + 500]).values_list('user_id', 'pk')
+            )
+        Address.objects.bulk_create(
+            [Address(profile_id=profile_ids[user.pk]) for user in users],
+            batch_size=batch_size,
+        )
+        return users
+
     def get_or_create(self, email, username, password=None):
         created = True
         try:
@@ -92,21 +128,41 @@ class CustomUser(AbstractUser, PermissionsMixin):
     objects = CustomUserManager()
 
     def get_all_permissions(self, obj=None):
-        if self.is_superuser:
-            return Permission.objects.all()
-        return Permission.objects.filter(group__user=self)
+        if not self.is_active or obj is not None:
+            return frozenset()
+        # Memoized for the lifetime of the instance, i.e. for the request that loaded the user
+        if not hasattr(self, '_resolved_permissions'):
+            self._resolved_permissions = account_cache.get_permissions(self)
+        return self._resolved_permissions
 
     def __str__(self):
         return self.email
 
     def has_perm(self, perm, obj=None):
-        if perm in self.get_all_permissions() or perm in self.get_group_permissions():
+        if self.is_active and self.is_superuser:
             return True
-        return False
+        return perm in self.get_all_permissions(obj)
 
     def has_module_perms(self, app_label):
         return True
 
+    @property
+    def group_names(self):
+        """
+        Names of the user groups as a frozenset, loaded once per instance.
+        A `prefetch_related('groups')` on the queryset is used instead of a query when present.
+        """
+        if not hasattr(self, '_group_names'):
+            prefetched_groups = getattr(self, '_prefetched_objects_cache', {}).get('groups')
+            if prefetched_groups is not None:
+                self._group_names = frozenset(group.name for group in prefetched_groups)
+            else:
+                self._group_names = frozenset(self.groups.values_list('name', flat=True))
+        return self._group_names
+
+    def has_group(self, *group_names):
+        return not self.group_names.isdisjoint(group_names)
+
 
 class Address(models.Model):
     profile = models.OneToOneField("Profile", related_name='address', on_delete=models.CASCADE)
@@ -1,7 +1,13 @@
 from django.dispatch import receiver
-from django.db.models.signals import (post_save, )
+from django.db import transaction
+from django.db.models.signals import (post_save, post_delete, m2m_changed, )
+from django.contrib.auth.models import Group, Permission
+
+from django_cleanup.signals import cleanup_pre_delete
 
 from . import models
+from . import cache as account_cache
+from . import images
 
 #######################################################################################################################
 
@@ -36,9 +42,68 @@ def update_address(sender, instance, created, **kwargs):
         instance.profile.save()
 
 
-
-
-
-
-
-
+@receiver(post_save, sender=models.CustomUser)
+def invalidate_user_permissions(sender, instance, created: bool, update_fields=None, **kwargs):
+    # Logins only touch `last_login`, which has no effect on permissions
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    instance.__dict__.pop('_resolved_permissions', None)
+    account_cache.bump_user_permissions_version(instance.pk)
+
+
+@receiver(m2m_changed, sender=models.CustomUser.groups.through)
+@receiver(m2m_changed, sender=models.CustomUser.user_permissions.through)
+def invalidate_user_memberships(sender, instance, action: str, reverse: bool, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        instance.__dict__.pop('_resolved_permissions', None)
+        instance.__dict__.pop('_group_names', None)
+        user_pks = [instance.pk]
+    elif action == 'pre_clear':
+        # `pk_set` is not provided on clear, the affected users have to be read before they are removed
+        instance._cleared_user_pks = list(instance.user_set.values_list('pk', flat=True))
+        return
+    elif action == 'post_clear':
+        user_pks = getattr(instance, '_cleared_user_pks', ())
+    else:
+        user_pks = pk_set
+    account_cache.bump_user_permissions_version(*user_pks)
+    if sender is models.CustomUser.groups.through:
+        # Teacher and manager links of the navbar follow the groups
+        account_cache.bump_nav_version(*user_pks)
+
+
+@receiver(post_save, sender=models.Profile)
+def invalidate_user_nav(sender, instance, **kwargs):
+    # The navbar shows the profile picture
+    account_cache.bump_nav_version(instance.user_id)
+
+
+@receiver(post_save, sender=models.Profile)
+def generate_profile_pic_variants(sender, instance, raw: bool, **kwargs):
+    # Existing variants are skipped, so saves that keep the picture only cost a few stat calls in the pool
+    name = instance.profile_pic.name if instance.profile_pic else ''
+    if not raw and name:
+        transaction.on_commit(lambda: images.schedule_variants(name))
+
+
+@receiver(cleanup_pre_delete)
+def delete_profile_pic_variants(sender, file, **kwargs):
+    # django_cleanup is removing a replaced or orphaned picture, its variants go with it
+    if images.is_variant_source(file.name):
+        images.delete_variants(file.name, storage=file.storage)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, action: str, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        account_cache.bump_permissions_version()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions(sender, **kwargs):
+    account_cache.bump_permissions_version()
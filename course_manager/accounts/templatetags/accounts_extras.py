@@ -1,20 +1,56 @@
 from urllib.parse import urlencode
 from django import template
+from django.utils.html import format_html
+
+from accounts import cache as account_cache
+from accounts import images
 
 register = template.Library()
 
 
 @register.simple_tag(takes_context=True)
 def url_replace(context, **kwargs):
+    """Current query string with `kwargs` set; empty or None values remove the parameter."""
     query = context['request'].GET.copy()
-    query.update(kwargs)
+    for key, value in kwargs.items():
+        if value is None or value == '':
+            query.pop(key, None)
+        else:
+            query[key] = value
     return query.urlencode()
 
 
 @register.filter(name='has_group')
 def has_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
-
-
-
-
+    return user.is_authenticated and user.has_group(group_name)
+
+
+@register.simple_tag
+def nav_cache_version(user):
+    """Vary-on value of the cached navbar, changes with the user's profile and groups."""
+    return account_cache.get_nav_version(user)
+
+
+@register.simple_tag
+def profile_picture(picture, css_class='profile_pic', alt='User Profile Picture'):
+    """Avatar `<picture>`: WebP and fallback format variants with 1x and 2x `srcset`, see `accounts.images`."""
+    if not images.is_variant_source(picture.name):
+        return format_html('<img class="{}" src="{}" alt="{}">', css_class, picture.url, alt)
+
+    base_size = images.VARIANT_SIZES[0]
+    srcsets = {
+        image_format: [
+            (images.get_variant_url(picture.name, size, image_format), f'{size // base_size}x')
+            for size in images.VARIANT_SIZES
+        ]
+        for image_format in images.get_variant_formats(picture.name)
+    }
+    fallback = srcsets[images.get_fallback_format(picture.name)]
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}"><img class="{}" src="{}" srcset="{}" alt="{}"></picture>',
+        ', '.join(f'{url} {density}' for url, density in srcsets[images.WEBP]),
+        css_class,
+        fallback[0][0],
+        ', '.join(f'{url} {density}' for url, density in fallback),
+        alt,
+    )
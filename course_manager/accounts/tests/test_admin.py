@@ -0,0 +1,60 @@
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+
+from accounts.models import (CustomUser, Teacher, Manager)
+from courses.models import Course, CourseInstance
+
+
+######################################################################################################################
+
+
+class AdminChangelistQueriesTest(TestCase):
+
+    changelists = ('accounts_customuser', 'accounts_profile', 'accounts_address', 'accounts_teacher',
+                   'accounts_manager', 'auth_permission')
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+        CustomUser.objects.create_superuser(email='admin@gmail.com', username='admin', password='romanroman1')
+        cls.add_staff(0)
+
+    @classmethod
+    def add_staff(cls, number):
+        course = Course.objects.create(base_title=f'Course {number}')
+        course_instance = CourseInstance.objects.create(course=course, min_mark=60)
+
+        teacher_user = CustomUser.objects.create_user(email=f'teacher{number}@gmail.com', username=f'teacher{number}')
+        Teacher.objects.create(user=teacher_user).supervised_courses.add(course_instance)
+
+        manager_user = CustomUser.objects.create_user(email=f'manager{number}@gmail.com', username=f'manager{number}')
+        manager = Manager.objects.create(user=manager_user)
+        manager.supervised_courses.add(course)
+        manager.supervised_course_instances.add(course_instance)
+
+    def count_queries(self, changelist):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:{changelist}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_changelists_run_constant_queries(self):
+        self.client.login(email='admin@gmail.com', password='romanroman1')
+        small = {changelist: self.count_queries(changelist) for changelist in self.changelists}
+
+        for number in range(1, 6):
+            self.add_staff(number)
+        for changelist in self.changelists:
+            with self.subTest(changelist=changelist):
+                self.assertEqual(self.count_queries(changelist), small[changelist])
+
+    def test_manager_supervised_columns(self):
+        self.client.login(email='admin@gmail.com', password='romanroman1')
+        response = self.client.get(reverse('admin:accounts_manager_changelist'))
+        self.assertContains(response, 'Course 0 Course')
+        self.assertContains(response, 'Course 0 Course - ')
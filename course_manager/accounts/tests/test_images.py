@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+
+from PIL import Image
+
+from accounts import images
+from accounts.models import CustomUser, Profile
+
+
+######################################################################################################################
+
+
+def make_picture(name, size=(640, 480), image_format='JPEG', mode='RGB'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format)
+    return default_storage.save(f'images/profile_pics/{name}', ContentFile(buffer.getvalue()))
+
+
+class TemporaryMediaMixin(object):
+
+    def setUp(self):
+        super(TemporaryMediaMixin, self).setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_THREADS=0)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+class ImageVariantsTest(TemporaryMediaMixin, TestCase):
+
+    def test_generate_variants(self):
+        name = make_picture('photo.jpg')
+        created = images.generate_variants(name)
+
+        self.assertEqual(sorted(created), [
+            'images/profile_pics/thumbnails/photo-48.jpg',
+            'images/profile_pics/thumbnails/photo-48.webp',
+            'images/profile_pics/thumbnails/photo-96.jpg',
+            'images/profile_pics/thumbnails/photo-96.webp',
+        ])
+        with default_storage.open('images/profile_pics/thumbnails/photo-96.webp') as variant:
+            image = Image.open(variant)
+            self.assertEqual((image.format, image.size), ('WEBP', (96, 96)))
+        # Existing variants are kept
+        self.assertEqual(images.generate_variants(name), [])
+
+    def test_png_keeps_transparency(self):
+        name = make_picture('logo.png', image_format='PNG', mode='RGBA')
+        images.generate_variants(name)
+        with default_storage.open('images/profile_pics/thumbnails/logo-48.png') as variant:
+            self.assertEqual(Image.open(variant).mode, 'RGBA')
+
+    def render_picture(self, name):
+        profile = Profile(profile_pic=name)
+        return Template('{% load accounts_extras %}{% profile_picture profile.profile_pic %}').render(
+            Context({'profile': profile}),
+        )
+
+    def test_srcset_falls_back_to_lazy_view(self):
+        name = make_picture('photo.jpg')
+        html = self.render_picture(name)
+        lazy_url = reverse('accounts:profile-pic-variant', kwargs={'size': 96, 'image_format': 'webp', 'name': name})
+        self.assertIn(f'{lazy_url} 2x', html)
+
+        images.generate_variants(name)
+        html = self.render_picture(name)
+        self.assertIn('<source type="image/webp" srcset="/media/images/profile_pics/thumbnails/photo-48.webp 1x, '
+                      '/media/images/profile_pics/thumbnails/photo-96.webp 2x">', html)
+        self.assertIn('src="/media/images/profile_pics/thumbnails/photo-48.jpg"', html)
+
+    def test_lazy_view(self):
+        name = make_picture('photo.jpg')
+        response = self.client.get(reverse('accounts:profile-pic-variant', kwargs={
+            'size': 48, 'image_format': 'jpeg', 'name': name,
+        }))
+        self.assertRedirects(response, '/media/images/profile_pics/thumbnails/photo-48.jpg',
+                             fetch_redirect_response=False)
+        self.assertTrue(default_storage.exists('images/profile_pics/thumbnails/photo-96.webp'))
+
+    def test_lazy_view_only_serves_known_variants(self):
+        name = make_picture('photo.jpg')
+        default_storage.save('assignments/answer.jpg', ContentFile(default_storage.open(name).read()))
+        for size, image_format, picture in ((50, 'webp', name), (48, 'png', name),
+                                            (48, 'webp', 'assignments/answer.jpg'),
+                                            (48, 'webp', 'images/profile_pics/missing.jpg')):
+            with self.subTest(size=size, image_format=image_format, picture=picture):
+                response = self.client.get(reverse('accounts:profile-pic-variant', kwargs={
+                    'size': size, 'image_format': image_format, 'name': picture,
+                }))
+                self.assertEqual(response.status_code, 404)
+
+
+class ProfilePictureSignalsTest(TemporaryMediaMixin, TransactionTestCase):
+
+    def test_variants_follow_profile_picture(self):
+        Group.objects.create(name='students')
+        user = CustomUser.objects.create_user(email='user@gmail.com', username='user', password='romanroman1')
+        profile = Profile.objects.get(user=user)
+
+        profile.profile_pic = make_picture('first.jpg')
+        profile.save()
+        self.assertTrue(default_storage.exists('images/profile_pics/thumbnails/first-48.webp'))
+
+        profile = Profile.objects.get(pk=profile.pk)
+        profile.profile_pic = make_picture('second.jpg')
+        profile.save()
+        self.assertTrue(default_storage.exists('images/profile_pics/thumbnails/second-48.webp'))
+        self.assertFalse(default_storage.exists('images/profile_pics/first.jpg'))
+        self.assertFalse(default_storage.exists('images/profile_pics/thumbnails/first-48.webp'))
@@ -1,8 +1,12 @@
 from django.test import TestCase, SimpleTestCase
+from django.conf import settings
 
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
 
+from accounts import cache as account_cache
 from accounts.models import (CustomUser, Address, Profile)
 
 ######################################################################################################################
@@ -55,6 +59,10 @@ class CustomUserModelTest(TestCase):
         CustomUser.objects.get(pk=2).groups.add(manager_group)
         CustomUser.objects.get(pk=2).groups.add(test_group)
 
+    def setUp(self) -> None:
+        # Permissions are cached across requests, the cache is not rolled back with the test transaction
+        account_cache.get_cache().clear()
+
     def test_email_max_length(self):
         user = CustomUser.objects.get(pk=1)
         max_length = user._meta.get_field('email').max_length
@@ -97,6 +105,96 @@ class CustomUserModelTest(TestCase):
         user = CustomUser.objects.get(pk=2)
         self.assertTrue(user.has_perm('accounts.can_add_teacher'))
 
+    def test_has_perm_superuser(self):
+        user = CustomUser.objects.get(pk=1)
+        user.is_superuser = True
+        user.save()
+        self.assertTrue(user.has_perm('accounts.can_add_teacher'))
+
+    def test_has_perm_inactive_user(self):
+        user = CustomUser.objects.get(pk=2)
+        user.is_active = False
+        user.save()
+        self.assertFalse(user.has_perm('accounts.can_add_teacher'))
+
+    def test_all_permissions_are_strings(self):
+        user = CustomUser.objects.get(pk=2)
+        self.assertEqual(user.get_all_permissions(), {'accounts.can_test', 'accounts.can_add_teacher'})
+
+    def test_has_perm_memoized_on_user(self):
+        user = CustomUser.objects.get(pk=2)
+        user.has_perm('accounts.can_test')
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('accounts.can_add_teacher'))
+            self.assertFalse(user.has_perm('accounts.can_delete_teacher'))
+
+    def test_has_perm_cached_across_instances(self):
+        CustomUser.objects.get(pk=2).has_perm('accounts.can_test')
+        user = CustomUser.objects.get(pk=2)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('accounts.can_test'))
+
+    def test_has_perm_after_group_change(self):
+        user = CustomUser.objects.get(pk=1)
+        self.assertFalse(user.has_perm('accounts.can_add_teacher'))
+        user.groups.add(Group.objects.get(name='managers'))
+        self.assertTrue(user.has_perm('accounts.can_add_teacher'))
+
+    def test_has_perm_after_reverse_group_change(self):
+        self.assertFalse(CustomUser.objects.get(pk=1).has_perm('accounts.can_add_teacher'))
+        Group.objects.get(name='managers').user_set.add(CustomUser.objects.get(pk=1))
+        self.assertTrue(CustomUser.objects.get(pk=1).has_perm('accounts.can_add_teacher'))
+
+    def test_has_perm_after_group_permission_change(self):
+        self.assertFalse(CustomUser.objects.get(pk=1).has_perm('accounts.can_add_teacher'))
+        Group.objects.get(name='test').permissions.add(Permission.objects.get(codename='can_add_teacher'))
+        self.assertTrue(CustomUser.objects.get(pk=1).has_perm('accounts.can_add_teacher'))
+
+    def test_permission_versions_are_shared_between_workers(self):
+        # Another worker process opens its own connection to the same cache
+        config = settings.CACHES[settings.ACCOUNT_CACHE_ALIAS]
+        other_worker = import_string(config['BACKEND'])(config['LOCATION'], {})
+        self.assertNotIsInstance(other_worker, LocMemCache)
+
+        key = account_cache.USER_PERMISSIONS_VERSION_KEY.format(pk=1)
+        CustomUser.objects.get(pk=1).has_perm('accounts.can_test')
+        version = other_worker.get(key)
+        self.assertIsNotNone(version)
+
+        CustomUser.objects.get(pk=1).groups.clear()
+        self.assertNotEqual(other_worker.get(key), version)
+
+    def test_reused_pk_does_not_get_cached_permissions(self):
+        user = CustomUser.objects.get(pk=2)
+        self.assertTrue(user.has_perm('accounts.can_test'))
+        CustomUser.objects.filter(pk=2).delete()
+        # Deleting the user sends no m2m_changed for its group rows, the versions stay where they were
+        CustomUser.objects.create(pk=2, email='new@gmail.com', username='new')
+        self.assertFalse(CustomUser.objects.get(pk=2).has_perm('accounts.can_test'))
+
+    def test_group_names(self):
+        user = CustomUser.objects.get(pk=2)
+        self.assertEqual(user.group_names, {'managers', 'test'})
+
+    def test_has_group_loads_groups_once(self):
+        user = CustomUser.objects.get(pk=2)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_group('managers'))
+            self.assertTrue(user.has_group('teachers', 'test'))
+            self.assertFalse(user.has_group('teachers'))
+
+    def test_group_names_from_prefetch(self):
+        users = list(CustomUser.objects.prefetch_related('groups').order_by('pk'))
+        with self.assertNumQueries(0):
+            self.assertFalse(users[0].has_group('managers'))
+            self.assertTrue(users[1].has_group('managers'))
+
+    def test_has_group_after_group_change(self):
+        user = CustomUser.objects.get(pk=1)
+        self.assertFalse(user.has_group('teachers'))
+        user.groups.add(Group.objects.get(name='teachers'))
+        self.assertTrue(user.has_group('teachers'))
+
     def test_new_profile_on_create(self):
         user = CustomUser.objects.get(pk=1)
         self.assertIsNotNone(user.profile)
@@ -1,4 +1,7 @@
 from django.test import TestCase, SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
 
 from django.urls import reverse, reverse_lazy
 from django.contrib.auth.models import Permission, Group
@@ -6,6 +9,7 @@ from django.utils.translation import ugettext_lazy as _
 
 import datetime
 
+from accounts import cache as account_cache
 from accounts.models import (CustomUser, Address, Profile)
 from accounts.forms import CustomUserCreationForm, AddressForm, UpdateProfileForm
 
@@ -229,19 +233,66 @@ class EditAddressViewTest(TestCase):
             )
 
 
+class NavigationCacheTest(TestCase):
 
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+        cls.user = CustomUser.objects.create_user(email='nav@gmail.com', username='nav', password='romanroman1')
+        cls.user.groups.add(Group.objects.get(name='teachers'))
 
+    def setUp(self):
+        # Fragments and their versions are not rolled back with the test transaction
+        account_cache.get_cache().clear()
+        self.client.login(email='nav@gmail.com', password='romanroman1')
 
+    def get_page(self, url=reverse_lazy('courses:user-courses'), **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def test_fragment_skips_profile_and_group_queries(self):
+        first, first_queries = self.get_page()
+        self.assertTrue(any('"accounts_profile"' in sql for sql in first_queries))
+        self.assertTrue(any('"auth_group"' in sql for sql in first_queries))
+
+        # Reused by another page
+        second, second_queries = self.get_page(reverse('courses:courses-list'))
+        self.assertEqual(len(second_queries), len(first_queries) - 2)
+        self.assertFalse(any('"accounts_profile"' in sql or '"auth_group"' in sql for sql in second_queries))
+        self.assertContains(second, reverse('courses:instances-teacher-list'))
+        self.assertNotContains(second, reverse('courses:course-manager-list'))
+
+    def test_fragment_is_shared_between_workers(self):
+        self.get_page()
+        # A worker with nothing in its process-local cache still finds the fragment
+        cache.clear()
+        _, queries = self.get_page(reverse('courses:courses-list'))
+        self.assertFalse(any('"accounts_profile"' in sql or '"auth_group"' in sql for sql in queries))
+
+    def test_group_change_invalidates_fragment(self):
+        self.get_page()
+        CustomUser.objects.get(pk=self.user.pk).groups.add(Group.objects.get(name='managers'))
+        self.assertContains(self.get_page()[0], reverse('courses:course-manager-list'))
+
+        Group.objects.get(name='teachers').user_set.clear()
+        self.assertNotContains(self.get_page()[0], reverse('courses:instances-teacher-list'))
+
+    def test_profile_change_invalidates_fragment(self):
+        self.get_page()
+        profile = Profile.objects.get(user=self.user)
+        profile.profile_pic = 'images/profile_pics/nav.png'
+        profile.save()
+        self.assertContains(self.get_page()[0], 'images/profile_pics/nav.png')
 
+    def test_fragment_is_per_user(self):
+        self.get_page()
+        CustomUser.objects.create_user(email='other@gmail.com', username='other', password='romanroman1')
+        self.client.login(email='other@gmail.com', password='romanroman1')
+        self.assertNotContains(self.get_page()[0], reverse('courses:instances-teacher-list'))
 
-
-
-
-
-
-
-
-
-
-
-
+    def test_search_box_is_not_cached(self):
+        self.get_page(reverse('courses:course-search'), q='python')
+        self.assertContains(self.get_page(reverse('courses:course-search'), q='django')[0], 'value="django"')
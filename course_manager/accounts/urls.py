@@ -14,6 +14,9 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('profile/change/', views.EditProfileView.as_view(), name='profile'),
     path('profile/address/change/', views.EditAddressView.as_view(), name='profile-address'),
+    path('profile-pics/<int:size>.<str:image_format>/<path:name>',
+         views.profile_pic_variant,
+         name='profile-pic-variant'),
 
     path('password_change/',
          auth_views.PasswordChangeView.as_view(template_name='accounts/password_change.html'),
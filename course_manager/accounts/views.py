@@ -1,13 +1,15 @@
 from django.shortcuts import render
 from django.views import generic
 from django.urls import reverse, reverse_lazy
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, Http404
+from django.core.files.storage import default_storage
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth import views as auth_views
 
 from . import models as account_models
 from . import forms as account_forms
+from . import images
 
 ##############################################################################################################
 
@@ -84,8 +86,10 @@ class EditAddressView(LoginRequiredMixin, generic.UpdateView):
         return super(EditAddressView, self).form_valid(form)
 
 
-
-
-
-
-
+def profile_pic_variant(request, size, image_format, name):
+    """Fallback of the avatar `srcset`: makes a variant that the worker pool has not made yet and redirects to it."""
+    if (not images.is_variant_source(name) or size not in images.VARIANT_SIZES
+            or image_format not in images.get_variant_formats(name) or not default_storage.exists(name)):
+        raise Http404
+    images.generate_variants(name)
+    return HttpResponseRedirect(default_storage.url(images.get_variant_name(name, size, image_format)))
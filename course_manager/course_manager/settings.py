@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 
     'accounts.apps.AccountsConfig',
     'courses.apps.CoursesConfig',
+    'mailqueue.apps.MailqueueConfig',
 
     'django_cleanup.apps.CleanupConfig',
     'crispy_forms',
@@ -99,6 +101,51 @@ DATABASES = {
 }
 
 
+# CACHES
+# Anonymous catalog pages (`courses.cache`) are shared between worker processes, so their hit/miss
+# counters can be read with `manage.py page_cache_stats`. Permissions and their versions (`accounts.cache`)
+# are shared too: a version bumped by one worker has to invalidate the entries of all of them.
+# File based caches cull a third of their entries at random once MAX_ENTRIES is reached. Every active user
+# takes about four account entries (two versions, the permission set and the navbar fragment), every
+# cached page one per URL.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'PAGE_CACHE_LOCATION_COURSE_MANAGER', os.path.join(tempfile.gettempdir(), 'course_manager_pages'),
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('PAGE_CACHE_MAX_ENTRIES_COURSE_MANAGER', 10000)),
+        },
+    },
+    'accounts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'ACCOUNT_CACHE_LOCATION_COURSE_MANAGER', os.path.join(tempfile.gettempdir(), 'course_manager_accounts'),
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('ACCOUNT_CACHE_MAX_ENTRIES_COURSE_MANAGER', 40000)),
+        },
+    },
+}
+
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 600
+
+ACCOUNT_CACHE_ALIAS = 'accounts'
+
+# Tests run against caches in a temporary directory, not the ones above
+TEST_RUNNER = 'course_manager.test_runner.IsolatedCachesDiscoverRunner'
+
+
+# ASYNC VIEWS
+# Worker threads of the `async/courses/` pages (`courses.async_views`); 0 runs them on Django's sync thread
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS_COURSE_MANAGER', 8))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -150,11 +197,38 @@ STATIC_ROOT = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+# `collectstatic` leaves out the CKEditor languages, plugins and skins no page loads (`course_manager.staticfiles`)
+STATICFILES_FINDERS = [
+    'course_manager.staticfiles.FileSystemFinder',
+    'course_manager.staticfiles.AppDirectoriesFinder',
+]
+# Fingerprinted names listed in `staticfiles.json`, with .gz (and .br, when `brotli` is installed) siblings
+STATICFILES_STORAGE = 'course_manager.staticfiles.CompressedManifestStaticFilesStorage'
+# Serve STATIC_ROOT from Django with far-future cache headers, when no web server is in front of it
+SERVE_STATIC = os.environ.get('SERVE_STATIC_COURSE_MANAGER', '') == '1'
 
 
 # MEDIA
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Worker threads generating profile picture thumbnails (`accounts.images`); 0 generates them inline
+IMAGE_VARIANT_THREADS = 2
+# Answer files are sent by `courses.downloads` after an access check. 'x-sendfile' (Apache mod_xsendfile, lighttpd)
+# or 'x-accel-redirect' (nginx) hand the transfer to the web server; unset, Django streams them with range support
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE_COURSE_MANAGER') or None
+# Internal nginx location aliased to MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Never served from MEDIA_URL, only through the views checking access
+PROTECTED_MEDIA_PREFIXES = ('assignments/', 'blobs/')
+# Answer files larger than this (bytes) are refused unless the assignment sets its own limit
+ANSWER_FILE_MAX_SIZE = 100 * 1024 * 1024
+# Chunk size suggested to clients of the resumable answer upload (`courses.uploads`)
+ANSWER_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+# ENROLLMENT IMPORT
+# Students per CSV of the manager enrollment import (`courses.imports`)
+ENROLL_IMPORT_MAX_ROWS = 10000
 
 
 # LOGIN
@@ -166,10 +240,13 @@ LOGOUT_REDIRECT_URL = '/'
 # CKEDITOR
 CKEDITOR_UPLOAD_PATH = 'images/uploads/'
 CKEDITOR_IMAGE_BACKEND = "pillow"
+# Only these interface languages are collected, the editor configs have to use one of them
+CKEDITOR_STATIC_LANGUAGES = ('en', )
 
 CKEDITOR_CONFIGS = {
     'default': {
         'skin': 'moono',
+        'language': 'en',
         'width': 'auto',
         'height': '400px',
         # 'skin': 'office2013',
@@ -237,7 +314,12 @@ CKEDITOR_CONFIGS = {
 
 
 # EMAIL
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Mails are queued in the database and delivered by `manage.py send_queued_mail` (see `mailqueue`)
+EMAIL_BACKEND = 'mailqueue.backends.QueuedEmailBackend'
+MAILQUEUE_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+MAILQUEUE_MAX_ATTEMPTS = 5
+# Seconds before the first retry, doubled after every further failure
+MAILQUEUE_RETRY_DELAY = 60
 EMAIL_HOST_USER = 'esl.manager.mail@gmail.com'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
@@ -0,0 +1,211 @@
+import functools
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+#####################################################################################################################
+
+
+# Hashed names never change content, browsers may keep them for a year without asking again
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Unhashed names are revalidated, a deploy can change them
+REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+CKEDITOR_ROOT = 'ckeditor/ckeditor/'
+CKEDITOR_LANGUAGE_RE = re.compile(r'(^|/)lang/(?P<code>[a-z]{2,3}(-[a-z]+)?)\.js$')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    `ManifestStaticFilesStorage` that also writes `.gz` (and, with the `brotli` package, `.br`) siblings of
+    text assets, hashed and original names alike, for the web server to send to clients accepting them.
+
+    References it can not resolve are left unhashed instead of failing, both in collected CSS (third party
+    stylesheets point at files that are not shipped) and in templates (no `collectstatic` run yet).
+    """
+    manifest_strict = False
+    compressed_extensions = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.map', '.ico', '.ttf', '.eot')
+    # Smaller files do not gain from compression, and it has to save at least 5%
+    min_compressed_size = 256
+    max_compressed_ratio = 0.95
+
+    @cached_property
+    def hashed_names(self):
+        return frozenset(self.hashed_files.values())
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super(CompressedManifestStaticFilesStorage, self).url_converter(name, hashed_files, template)
+
+        def safe_converter(matchobj):
+            try:
+                return converter(matchobj)
+            except ValueError:
+                return matchobj.group(0)
+        return safe_converter
+
+    def stored_name(self, name):
+        try:
+            return super(CompressedManifestStaticFilesStorage, self).stored_name(name)
+        except ValueError:
+            return name
+
+    def get_compressors(self):
+        compressors = [('.gz', functools.partial(gzip.compress, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            compressors.append(('.br', functools.partial(brotli.compress, quality=11)))
+        return compressors
+
+    def compress(self, name):
+        """Writes the compressed siblings of `name` that are worth it; returns their names."""
+        if not name.endswith(self.compressed_extensions):
+            return []
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < self.min_compressed_size:
+            return []
+
+        written = []
+        for extension, compressor in self.get_compressors():
+            compressed = compressor(content)
+            if len(compressed) > len(content) * self.max_compressed_ratio:
+                continue
+            compressed_name = name + extension
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            written.append(compressed_name)
+        return written
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super(CompressedManifestStaticFilesStorage, self).post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        # CSS is hashed over several passes, only the final names of `hashed_files` are still on disk
+        hashed_names = {self.hashed_files[self.hash_key(self.clean_name(name))] for name in paths}
+        for name in sorted(set(paths) | hashed_names):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+
+#####################################################################################################################
+
+
+@functools.lru_cache(maxsize=None)
+def get_ckeditor_plugins():
+    """Plugins of the CKEditor build and `extraPlugins`, with everything they require."""
+    plugins = set()
+    build_config = finders.find(CKEDITOR_ROOT + 'build-config.js')
+    if build_config:
+        with open(build_config, encoding='utf-8-sig') as config_file:
+            block = re.search(r'plugins\s*:\s*{([^}]*)}', config_file.read())
+        if block:
+            plugins.update(re.findall(r"'([\w-]+)'\s*:\s*1", block.group(1)))
+    for config in getattr(settings, 'CKEDITOR_CONFIGS', {}).values():
+        plugins.update(name.strip() for name in config.get('extraPlugins', '').split(',') if name.strip())
+
+    pending = list(plugins)
+    while pending:
+        plugin_file = finders.find(f'{CKEDITOR_ROOT}plugins/{pending.pop()}/plugin.js')
+        if not plugin_file:
+            continue
+        with open(plugin_file, encoding='utf-8-sig') as source:
+            requires = re.search(r'requires\s*:\s*(\[[^\]]*\]|\'[^\']*\'|"[^"]*")', source.read())
+        for required in re.findall(r'[\w-]+', requires.group(1) if requires else ''):
+            if required not in plugins:
+                plugins.add(required)
+                pending.append(required)
+    return frozenset(plugins)
+
+
+def get_ckeditor_skins():
+    return {config.get('skin', 'moono-lisa') for config in getattr(settings, 'CKEDITOR_CONFIGS', {}).values()}
+
+
+def is_pruned(path):
+    """CKEditor files no page can load: other languages, plugins outside of the build, other skins."""
+    path = path.replace(os.sep, '/')
+    if not path.startswith(CKEDITOR_ROOT):
+        return False
+    language = CKEDITOR_LANGUAGE_RE.search(path)
+    if language and language.group('code') not in settings.CKEDITOR_STATIC_LANGUAGES:
+        return True
+
+    directory, _, rest = path[len(CKEDITOR_ROOT):].partition('/')
+    name = rest.split('/', 1)[0]
+    if directory == 'plugins' and '/' in rest:
+        return name not in get_ckeditor_plugins()
+    if directory == 'skins' and '/' in rest:
+        return name not in get_ckeditor_skins()
+    return False
+
+
+class PruningFinderMixin(object):
+    """Leaves the files of `is_pruned()` out of `collectstatic`; `findstatic` and the dev server still find them."""
+
+    def list(self, ignore_patterns):
+        for path, storage in super(PruningFinderMixin, self).list(ignore_patterns):
+            if not is_pruned(path):
+                yield path, storage
+
+
+class FileSystemFinder(PruningFinderMixin, finders.FileSystemFinder):
+    pass
+
+
+class AppDirectoriesFinder(PruningFinderMixin, finders.AppDirectoriesFinder):
+    pass
+
+
+#####################################################################################################################
+
+
+def serve(request, path):
+    """
+    Sends a collected static file, for deployments without a web server in front of Django (`SERVE_STATIC`).
+    Hashed names are cached for a year, and precompressed siblings are preferred when the client accepts them.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if (path.startswith('..') or path.endswith(('.gz', '.br'))
+            or not os.path.isfile(staticfiles_storage.path(path))):
+        raise Http404(f'"{path}" does not exist')
+
+    hashed_names = getattr(staticfiles_storage, 'hashed_names', ())
+    cache_control = IMMUTABLE_CACHE_CONTROL if path in hashed_names else REVALIDATE_CACHE_CONTROL
+    last_modified = int(staticfiles_storage.get_modified_time(path).timestamp())
+
+    response = get_conditional_response(request, last_modified=last_modified)
+    if response is None:
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        served_path, encoding = path, None
+        for extension, candidate_encoding in (('.br', 'br'), ('.gz', 'gzip')):
+            if candidate_encoding in accepted and staticfiles_storage.exists(path + extension):
+                served_path, encoding = path + extension, candidate_encoding
+                break
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(staticfiles_storage.open(served_path),
+                                content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    if path.endswith(CompressedManifestStaticFilesStorage.compressed_extensions):
+        patch_vary_headers(response, ('Accept-Encoding', ))
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    return response
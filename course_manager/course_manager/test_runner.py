@@ -0,0 +1,36 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+#####################################################################################################################
+
+
+class IsolatedCachesDiscoverRunner(DiscoverRunner):
+    """
+    Runs the tests against caches of their own. The file based caches of the settings live in directories
+    shared with the development server, and tests clear them between test cases.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super(IsolatedCachesDiscoverRunner, self).setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='course_manager_test_caches_')
+        test_caches = {}
+        for alias, config in settings.CACHES.items():
+            config = dict(config)
+            if config['BACKEND'].endswith('FileBasedCache'):
+                config['LOCATION'] = os.path.join(self.cache_dir, alias)
+            else:
+                config['LOCATION'] = f'course_manager_tests_{alias}'
+            test_caches[alias] = config
+        self.cache_settings = override_settings(CACHES=test_caches)
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super(IsolatedCachesDiscoverRunner, self).teardown_test_environment(**kwargs)
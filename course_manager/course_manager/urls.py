@@ -16,9 +16,10 @@ Including another URLconf
 from django.conf import settings
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf.urls.static import static
 
+from . import staticfiles as project_staticfiles
 from . import views as project_views
 
 
@@ -33,15 +34,23 @@ urlpatterns = [
     path('accounts/', include('django.contrib.auth.urls')),
 
     path('courses/', include('courses.urls', namespace='courses')),
+    path('async/courses/', include('courses.async_urls', namespace='courses-async')),
 
     path('ckeditor/', include('ckeditor_uploader.urls')),
 ]
 
 
-urlpatterns += (
-            static(settings.STATIC_URL, document_root=settings.STATIC_ROOT) +
-            static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-)
+if settings.SERVE_STATIC:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), project_staticfiles.serve),
+    ]
+else:
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+
+if settings.DEBUG:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), project_views.public_media),
+    ]
 
 handler404 = 'course_manager.views.error_404_view'
 handler500 = 'course_manager.views.error_500_view'
@@ -1,6 +1,10 @@
+import posixpath
+
 from django.views import generic
+from django.views.static import serve
 from django.shortcuts import render
 from django.conf import settings
+from django.http import Http404
 
 ##################################################################################################################
 
@@ -9,6 +13,13 @@ class HomePage(generic.TemplateView):
     template_name = 'index.html'
 
 
+def public_media(request, path):
+    """Development server for MEDIA_URL; student files are left to the views that check access to them."""
+    if posixpath.normpath(path).lstrip('/').startswith(settings.PROTECTED_MEDIA_PREFIXES):
+        raise Http404
+    return serve(request, path, document_root=settings.MEDIA_ROOT)
+
+
 ############################################################################################################
 
 
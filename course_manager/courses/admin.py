@@ -2,12 +2,13 @@ from django.contrib import admin
 from django import forms
 
 from django.db import models as db_models
-from django.db.models import Func, F, Sum, Avg, Q
+from django.db.models import Func, F, Sum, Avg, Q, Count, Case, When, Value, ExpressionWrapper
 
 from django.utils.safestring import mark_safe
 from django.urls import reverse
 
 from . import models
+from . import search
 
 #####################################################################################################################
 
@@ -26,34 +27,62 @@ class CourseInstanceForm(forms.ModelForm):
         exclude = ('slug', )
 
 
+class CourseInstanceListFilter(admin.RelatedFieldListFilter):
+    """Related filter whose choices are labelled without a query per course instance."""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        course_instances = models.CourseInstance.objects.select_related('course').order_by(*ordering)
+        return [(course_instance.pk, str(course_instance)) for course_instance in course_instances]
+
+
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('base_title', 'short_description', 'course_instances_count')
     search_fields = ('base_title', )
     form = CourseForm
 
+    def get_queryset(self, request):
+        qs = super(CourseAdmin, self).get_queryset(request)
+        return qs.annotate(_course_instances_count=Count('instances'))
+
+    def get_search_results(self, request, queryset, search_term):
+        # Title matches of the stock search, plus courses the search index matches by description or instance
+        results, use_distinct = super(CourseAdmin, self).get_search_results(request, queryset, search_term)
+        search_filter = search.get_search_filter(search_term)
+        if search_filter is not None:
+            results |= queryset.filter(search_filter)
+        return results, use_distinct
+
     def short_description(self, obj: models.Course):
-        return obj.description[:60]
+        return (obj.description or '')[:60]
 
     def course_instances_count(self, obj: models.Course):
-        return obj.instances.count()
+        return obj._course_instances_count
+    course_instances_count.admin_order_field = '_course_instances_count'
 
 
 class CourseInstanceAdmin(admin.ModelAdmin):
     list_display = ('sub_title', 'base_course_link', 'min_mark', 'start_date', 'end_date', 'enrolls_count')
     search_fields = ('sub_title', 'course__base_title')
     readonly_fields = ('get_teachers', )
+    list_select_related = ('course', )
     form = CourseInstanceForm
 
+    def get_queryset(self, request):
+        qs = super(CourseInstanceAdmin, self).get_queryset(request)
+        return qs.annotate(_enrolls_count=Count('enrolls'))
+
     def base_course_link(self, obj: models.CourseInstance):
         return mark_safe(
             f"""<a href="{reverse('admin:courses_course_change', args=(obj.course.pk,))}">{obj.course}</a>"""
         )
 
     def enrolls_count(self, obj: models.CourseInstance):
-        return obj.enrolls.count()
+        return obj._enrolls_count
+    enrolls_count.admin_order_field = '_enrolls_count'
 
     def get_teachers(self, obj: models.CourseInstance):
-        teachers = obj.teachers.all()
+        teachers = obj.teachers.select_related('user__profile')
         r = ''
         for teacher in teachers:
             r += f"""<a href="{reverse('admin:accounts_teacher_change', args=(teacher.pk,))}">{teacher.profile}</a>; """
@@ -69,15 +98,24 @@ class EnrollAdmin(admin.ModelAdmin):
     search_fields = ('student__email', )
     readonly_fields = ('average_mark', )
 
-    list_filter = ('course_instance__course', 'course_instance', 'is_course_finished')
+    list_filter = ('course_instance__course', ('course_instance', CourseInstanceListFilter), 'is_course_finished')
+    list_select_related = ('student', 'course_instance__course')
     filter_horizontal = ()
     fieldsets = ()
     ordering = ()
 
     def get_queryset(self, request):
         qs = super(EnrollAdmin, self).get_queryset(request)
+        # Ordering by the stored aggregates avoids joining every personal assignment of the page
         qs = qs.annotate(
-            _average_mark=Avg('personal_assignments__grade', filter=Q(personal_assignments__is_completed=True)),
+            _average_mark=Case(
+                When(graded_assignments_count=0, then=Value(0.0)),
+                default=ExpressionWrapper(
+                    F('grades_sum') * 1.0 / F('graded_assignments_count'),
+                    output_field=db_models.FloatField(),
+                ),
+                output_field=db_models.FloatField(),
+            ),
         )
         return qs
 
@@ -88,7 +126,8 @@ class EnrollAdmin(admin.ModelAdmin):
 
 class CourseInstanceAssignmentAdmin(admin.ModelAdmin):
     list_display = ('title', 'course_instance_link', 'start_date', 'end_date')
-    list_filter = ('course_instance', )
+    list_filter = (('course_instance', CourseInstanceListFilter), )
+    list_select_related = ('course_instance__course', )
     search_fields = ('course_instance__sub_title', 'course_instance__course__base_title')
 
     def course_instance_link(self, obj: models.CourseInstanceAssignment):
@@ -108,15 +147,19 @@ class PersonalAssignmentAdmin(admin.ModelAdmin):
         'enroll__course_instance__course__base_title',
         'enroll__course_instance__sub_title',
     )
+    list_select_related = ('course_instance_assignment', 'enroll__course_instance__course', 'enroll__student')
 
     def title(self, obj: models.PersonalAssignment):
         return obj.course_instance_assignment.title
+    title.admin_order_field = 'course_instance_assignment__title'
 
     def start_date(self, obj: models.PersonalAssignment):
         return obj.course_instance_assignment.start_date
+    start_date.admin_order_field = 'course_instance_assignment__start_date'
 
     def end_date(self, obj: models.PersonalAssignment):
         return obj.course_instance_assignment.end_date
+    end_date.admin_order_field = 'course_instance_assignment__end_date'
 
     def enroll_link(self, obj: models.PersonalAssignment):
         return mark_safe(
@@ -134,6 +177,7 @@ class CertificateAdmin(admin.ModelAdmin):
     )
     search_fields = ('enroll__student__email', )
     readonly_fields = ('enroll_link', )
+    list_select_related = ('enroll__course_instance__course', 'enroll__student')
 
     def certificate_in(self, obj: models.Certificate):
         return obj.enroll.course_instance.sub_title
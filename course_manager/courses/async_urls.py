@@ -0,0 +1,35 @@
+from django.urls import path
+
+from . import async_views
+
+######################################################################################################################
+
+# Async variants of the read-heavy pages of `courses.urls`, mounted under `async/courses/` (see `async_views`)
+
+app_name = 'courses-async'
+
+urlpatterns = [
+    path('teacher/<slug:course_slug>/<slug:instance_slug>/',
+         async_views.course_instance_teacher_detail,
+         name='course-instance-teacher-detail'),
+    path('teacher/<slug:course_slug>/<slug:instance_slug>/gradebook/',
+         async_views.gradebook_teacher,
+         name='gradebook-teacher'),
+    path('teacher/<slug:course_slug>/<slug:instance_slug>/enrolls/<int:enroll_pk>/',
+         async_views.enroll_teacher_detail,
+         name='enroll-teacher-detail'),
+    path('teacher/<slug:course_slug>/<slug:instance_slug>/enrolls/<int:enroll_pk>/assignments/<int:assignment_pk>/',
+         async_views.personal_assignment_teacher_detail,
+         name='personal-assignment-teacher-detail'),
+    path('teacher/<slug:course_slug>/<slug:instance_slug>/assignments/<int:assignment_pk>/',
+         async_views.course_assignment_teacher_detail,
+         name='course-assignment-teacher-detail'),
+
+    path('my-courses/', async_views.user_courses, name='user-courses'),
+    path('<slug:course_slug>/<slug:instance_slug>/',
+         async_views.course_instance_detail,
+         name='course-instance-detail'),
+    path('<slug:course_slug>/<slug:instance_slug>/assignments/<int:pk>/',
+         async_views.personal_assignment,
+         name='personal-assignment'),
+]
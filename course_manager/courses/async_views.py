@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import views
+
+
+#####################################################################################################################
+
+# Async entry points for the read-heavy pages, mounted under their own prefix by `courses.async_urls`.
+#
+# Django 3.1 has no async ORM, and under ASGI every sync view is run in one shared thread, so concurrent
+# requests to the sync pages are served one at a time. These views run the very same class-based views,
+# template rendering included, on a bounded pool of worker threads instead; the event loop only waits.
+# Form submissions from these pages are forwarded to the sync views, on the thread Django runs sync code on.
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_max_threads():
+    return getattr(settings, 'ASYNC_VIEW_THREADS', 8)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_max_threads(), thread_name_prefix='course-views')
+        return _executor
+
+
+def render_view(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    # Lazy querysets are evaluated while rendering, so it has to happen on the same thread as the view
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    return response
+
+
+def render_view_in_pool(view, request, *args, **kwargs):
+    # Worker threads own their database connections, they follow CONN_MAX_AGE like request threads do
+    close_old_connections()
+    try:
+        return render_view(view, request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def as_async_view(view_class, write_view_class=None, **initkwargs):
+    """
+    Async view running the GET handling of `view_class` on the worker pool.
+    With `ASYNC_VIEW_THREADS = 0` it runs on Django's thread for sync code instead (used by the test suite,
+    whose data is only visible on the connection of that thread).
+    Other methods always run there, handled by `write_view_class` (defaults to `view_class`), the view the
+    sync URL sends them to.
+    """
+    view = view_class.as_view(**initkwargs)
+    write_view = write_view_class.as_view(**initkwargs) if write_view_class else view
+
+    async def async_view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(render_view, thread_sensitive=True)(write_view, request, *args, **kwargs)
+        if get_max_threads():
+            return await sync_to_async(render_view_in_pool, thread_sensitive=False, executor=get_executor())(
+                view, request, *args, **kwargs
+            )
+        return await sync_to_async(render_view, thread_sensitive=True)(view, request, *args, **kwargs)
+
+    async_view.view_class = view_class
+    return async_view
+
+
+#####################################################################################################################
+
+
+course_instance_detail = as_async_view(views.CourseInstanceDetail)
+user_courses = as_async_view(views.UserCoursesInstancesList)
+personal_assignment = as_async_view(views.PersonalAssignmentDisplay, views.PersonalAssignmentAnswer)
+
+course_instance_teacher_detail = as_async_view(views.CourseInstanceTeacherDetail)
+gradebook_teacher = as_async_view(views.GradebookTeacherView)
+enroll_teacher_detail = as_async_view(views.EnrollTeacherDetail)
+personal_assignment_teacher_detail = as_async_view(views.PersonalAssignmentTeacherDisplay,
+                                                   views.PersonalAssignmentTeacherEvaluate)
+course_assignment_teacher_detail = as_async_view(views.CourseAssignmentTeacherDetail)
@@ -0,0 +1,142 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+
+
+#####################################################################################################################
+
+
+PAGE_CACHE_PREFIX = 'courses:page'
+
+# Version of every cached page; bumped by `invalidate_pages()` after writes that bypass model signals
+GLOBAL_SCOPE = 'all'
+# Version of the catalog (course list); bumped by any course change
+CATALOG_SCOPE = 'catalog'
+# Version of one course's pages (course and instance details), keyed by course slug
+COURSE_SCOPE = 'course'
+
+HITS = 'hits'
+MISSES = 'misses'
+
+
+def get_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+
+
+def _version_key(scope, name=''):
+    return f'{PAGE_CACHE_PREFIX}:version:{scope}:{name}'
+
+
+def _counter_key(outcome):
+    return f'{PAGE_CACHE_PREFIX}:stats:{outcome}'
+
+
+def _new_version():
+    # Random instead of incremented, so an evicted version can never come back with a value that old pages used
+    return uuid.uuid4().hex[:12]
+
+
+def get_versions(scopes):
+    """Current version of each `(scope, name)`, creating the missing ones in the same round trip."""
+    page_cache = get_cache()
+    keys = [_version_key(*scope) for scope in scopes]
+    versions = page_cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        page_cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    get_cache().set_many({_version_key(*scope): _new_version() for scope in scopes}, timeout=None)
+
+
+def invalidate_course(*slugs, catalog=False):
+    scopes = [(COURSE_SCOPE, slug) for slug in set(slugs) if slug]
+    if catalog:
+        scopes.append((CATALOG_SCOPE, ))
+    bump(*scopes)
+
+
+def invalidate_pages():
+    bump((GLOBAL_SCOPE, ))
+
+
+def get_page_key(request, scopes):
+    scopes = ((GLOBAL_SCOPE, ), ) + tuple(scopes)
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"{PAGE_CACHE_PREFIX}:{url}:{'.'.join(get_versions(scopes))}"
+
+
+def record(outcome):
+    page_cache = get_cache()
+    key = _counter_key(outcome)
+    try:
+        page_cache.incr(key)
+    except ValueError:
+        page_cache.add(key, 0, timeout=None)
+        page_cache.incr(key)
+
+
+def get_stats():
+    counters = get_cache().get_many([_counter_key(HITS), _counter_key(MISSES)])
+    return {outcome: counters.get(_counter_key(outcome), 0) for outcome in (HITS, MISSES)}
+
+
+def reset_stats():
+    get_cache().delete_many([_counter_key(HITS), _counter_key(MISSES)])
+
+
+def is_cacheable_request(request):
+    # Pending flash messages are rendered into the page, so those requests are neither served nor stored
+    return (
+        request.method == 'GET'
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def is_cacheable_response(response):
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+class AnonymousPageCacheMixin(object):
+    """
+    Serves whole pages to anonymous visitors from the cache, keyed by absolute URL (query string included)
+    and by the versions of `page_cache_scopes`. Model signals bump those versions when the rows change.
+    """
+    page_cache_scopes = ((CATALOG_SCOPE, ), )
+
+    def get_page_cache_scopes(self):
+        return self.page_cache_scopes
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return super(AnonymousPageCacheMixin, self).dispatch(request, *args, **kwargs)
+
+        key = get_page_key(request, self.get_page_cache_scopes())
+        response = get_cache().get(key)
+        if response is not None:
+            record(HITS)
+            return response
+
+        record(MISSES)
+        response = super(AnonymousPageCacheMixin, self).dispatch(request, *args, **kwargs)
+
+        def store(rendered):
+            if is_cacheable_response(rendered):
+                get_cache().set(key, rendered, get_timeout())
+
+        if hasattr(response, 'render') and callable(response.render):
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
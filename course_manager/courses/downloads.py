@@ -0,0 +1,159 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+
+#####################################################################################################################
+
+
+SENDFILE_HEADER = 'x-sendfile'
+ACCEL_REDIRECT_HEADER = 'x-accel-redirect'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+class FileRange(object):
+    """
+    Reads at most `length` bytes of `file` from its current position. It keeps `fileno()`, so WSGI servers
+    with a sendfile file wrapper (gunicorn) still send the range from the kernel, bounded by Content-Length.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (first, last) byte of a single `Range: bytes=...` request, None when the whole file is to be sent
+    (no header, several ranges, invalid syntax). Raises UnsatisfiableRange for ranges past the end.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not size:
+        raise UnsatisfiableRange
+    if not first:
+        # Suffix range, the last `last` bytes
+        if not int(last):
+            raise UnsatisfiableRange
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise UnsatisfiableRange
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+def if_range_passes(request, etag, last_modified):
+    """A Range with an `If-Range` validator that no longer matches gets the whole, current file."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Weak validators never match (RFC 7233, section 3.2)
+        return not if_range.startswith('W/') and parse_etags(if_range) == [etag]
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def get_content_disposition(filename, as_attachment=True):
+    disposition = 'attachment' if as_attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        return '{}; filename="{}"'.format(disposition, filename.replace('\\', '\\\\').replace('"', r'\"'))
+    except UnicodeEncodeError:
+        return "{}; filename*=utf-8''{}".format(disposition, quote(filename))
+
+
+def get_sendfile_response(path, backend):
+    """Empty response that lets the web server send `path` itself; it then also handles ranges."""
+    response = HttpResponse()
+    if backend == ACCEL_REDIRECT_HEADER:
+        # nginx: `location <MEDIA_ACCEL_REDIRECT_PREFIX> { internal; alias <MEDIA_ROOT>/; }`
+        relative_path = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + relative_path)
+    elif backend == SENDFILE_HEADER:
+        response['X-Sendfile'] = path
+    else:
+        raise ImproperlyConfigured(f'Unknown MEDIA_SENDFILE backend: {backend}')
+    return response
+
+
+def get_file_response(request, path, filename, size, etag, last_modified, as_attachment):
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_passes(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=as_attachment, filename=filename)
+    else:
+        first, last = byte_range
+        file.seek(first)
+        response = FileResponse(FileRange(file, last - first + 1), status=206,
+                                as_attachment=as_attachment, filename=filename)
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Length'] = last - first + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_file(request, path, filename, as_attachment=True):
+    """
+    Response sending the file at `path` as `filename`. With `MEDIA_SENDFILE` set the transfer is handed to the
+    web server (X-Sendfile or X-Accel-Redirect); otherwise it is a `FileResponse` that answers conditional
+    requests and single byte ranges, so interrupted downloads resume and video players can seek.
+    """
+    stat = os.stat(path)
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        backend = getattr(settings, 'MEDIA_SENDFILE', None)
+        if backend:
+            response = get_sendfile_response(path, backend)
+        else:
+            response = get_file_response(request, path, filename, stat.st_size, etag, last_modified, as_attachment)
+        if response.status_code != 416:
+            content_type, encoding = mimetypes.guess_type(filename)
+            response['Content-Type'] = content_type if content_type and not encoding else 'application/octet-stream'
+            response['Content-Disposition'] = get_content_disposition(filename, as_attachment)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # The files are only for their owner, shared caches must not keep them
+    response['Cache-Control'] = 'private, no-cache'
+    return response
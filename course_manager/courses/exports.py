@@ -0,0 +1,109 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from . import models as course_models
+
+
+#####################################################################################################################
+
+
+EXPORT_FIELDS = (
+    'course', 'course_instance', 'student_email', 'first_name', 'last_name',
+    'assignment', 'end_date', 'grade', 'is_completed', 'completion_date', 'is_late',
+)
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched from the database cursor at a time
+CHUNK_SIZE = 2000
+# Rows rendered into one chunk of the response body
+ROWS_PER_WRITE = 500
+
+
+class EchoBuffer(object):
+    """File-like object that hands back what `csv.writer` writes instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def get_grade_rows(personal_assignments):
+    """
+    Yields one tuple of `EXPORT_FIELDS` per personal assignment.
+    Rows are read with a chunked cursor over a flat `values_list`, so no model instances are built or kept.
+    """
+    rows = personal_assignments.order_by(
+        'enroll__course_instance__course__slug',
+        'enroll__course_instance__slug',
+        'enroll__student__email',
+        'course_instance_assignment__start_date',
+        'pk',
+    ).values_list(
+        'enroll__course_instance__course__base_title',
+        'enroll__course_instance__sub_title',
+        'enroll__student__email',
+        'enroll__student__profile__first_name',
+        'enroll__student__profile__last_name',
+        'course_instance_assignment__title',
+        'course_instance_assignment__end_date',
+        'grade',
+        'is_completed',
+        'completion_date',
+    )
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        end_date, completion_date = row[6], row[9]
+        is_late = bool(end_date and completion_date and completion_date > end_date)
+        yield row + (is_late, )
+
+
+def get_course_instance_grades(course_instance):
+    return get_grade_rows(course_models.PersonalAssignment.objects.filter(enroll__course_instance=course_instance))
+
+
+def get_course_grades(course):
+    return get_grade_rows(
+        course_models.PersonalAssignment.objects.filter(enroll__course_instance__course=course)
+    )
+
+
+def _batched(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= ROWS_PER_WRITE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def render_csv(rows):
+    writer = csv.writer(EchoBuffer())
+    # The header goes out on its own, so the client gets bytes before the first query finishes
+    yield writer.writerow(EXPORT_FIELDS)
+    yield from _batched(writer.writerow(row) for row in rows)
+
+
+def render_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    yield from _batched(encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n' for row in rows)
+
+
+RENDERERS = {
+    'csv': render_csv,
+    'ndjson': render_ndjson,
+}
+
+
+def streaming_export_response(rows, export_format, filename):
+    response = StreamingHttpResponse(
+        RENDERERS[export_format](rows),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -1,11 +1,13 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
 
 from ckeditor_uploader.widgets import CKEditorUploadingWidget
 from django.utils import timezone
 from tempus_dominus.widgets import DateTimePicker
 
 from . import models
+from . import imports
 
 
 ####################################################################################################################
@@ -20,11 +22,18 @@ class PersonalAssignmentForm(forms.ModelForm):
             'answer_field': forms.Textarea(attrs={'class': 'assignment-text-field'}),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, size_limit=None, **kwargs):
         super(PersonalAssignmentForm, self).__init__(*args, **kwargs)
+        self.size_limit = size_limit
         self.fields['answer_field'].label = 'Enter your answer here'
         self.fields['answer_file'].label = 'Attach file (Optional)'
 
+    def clean_answer_file(self):
+        answer_file = self.cleaned_data['answer_file']
+        if self.size_limit is not None and answer_file and answer_file.size > self.size_limit:
+            raise ValidationError(f'The file is larger than the {self.size_limit} bytes allowed for this assignment.')
+        return answer_file
+
 
 class PersonalAssignmentEvaluationForm(forms.ModelForm):
     class Meta:
@@ -43,6 +52,81 @@ class PersonalAssignmentEvaluationForm(forms.ModelForm):
         self.fields['is_completed'].label = 'Mark as completed'
 
 
+class ExistingObjectField(forms.Field):
+    """Hidden primary key of a formset row, resolved from the objects the formset has already loaded."""
+    widget = forms.HiddenInput
+    default_error_messages = {
+        'invalid_choice': 'This row can not be changed here.',
+    }
+
+    def __init__(self, formset, **kwargs):
+        super(ExistingObjectField, self).__init__(**kwargs)
+        self.formset = formset
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            obj = self.formset._existing_object(self.formset._pk_field.to_python(value))
+        except ValidationError:
+            obj = None
+        if obj is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return obj
+
+    def has_changed(self, initial, data):
+        return False
+
+
+class BasePersonalAssignmentGradingFormSet(forms.BaseModelFormSet):
+    """
+    Grades every personal assignment of `queryset` in one form. Rows are matched against the queryset loaded
+    once (instead of a query per row), and the changed ones are written with a single bulk update.
+    """
+
+    def add_fields(self, form, index):
+        super(BasePersonalAssignmentGradingFormSet, self).add_fields(form, index)
+        pk_field = form.fields[self._pk_field.name]
+        form.fields[self._pk_field.name] = ExistingObjectField(self, required=False, initial=pk_field.initial)
+
+    def clean(self):
+        super(BasePersonalAssignmentGradingFormSet, self).clean()
+        if self.total_form_count() > self.initial_form_count():
+            raise ValidationError('Personal assignments can only be graded here, not added.')
+
+    def save_grades(self):
+        """Applies the changed rows in one transaction; returns the graded personal assignments."""
+        now = timezone.now()
+        graded = []
+        for form in self.initial_forms:
+            if not form.has_changed():
+                continue
+            personal_assignment = form.instance
+            if not personal_assignment.is_completed:
+                personal_assignment.completion_date = None
+            elif personal_assignment.completion_date is None:
+                personal_assignment.completion_date = now
+            graded.append(personal_assignment)
+        if not graded:
+            return graded
+
+        with transaction.atomic():
+            models.PersonalAssignment.objects.bulk_update(graded, ['grade', 'is_completed', 'completion_date'])
+            # bulk_update sends no post_save, the aggregates of the touched enrolls are recomputed instead
+            models.Enroll.objects.filter(pk__in={pa.enroll_id for pa in graded}).refresh_grade_aggregates()
+        for personal_assignment in graded:
+            personal_assignment.snapshot_tracked_fields()
+        return graded
+
+
+PersonalAssignmentGradingFormSet = forms.modelformset_factory(
+    models.PersonalAssignment,
+    form=PersonalAssignmentEvaluationForm,
+    formset=BasePersonalAssignmentGradingFormSet,
+    extra=0,
+)
+
+
 class CourseAssignmentForm(forms.ModelForm):
 
     def clean_end_date(self):
@@ -53,7 +137,7 @@ class CourseAssignmentForm(forms.ModelForm):
 
     class Meta:
         model = models.CourseInstanceAssignment
-        fields = ('title', 'content', 'start_date', 'end_date')
+        fields = ('title', 'content', 'start_date', 'end_date', 'max_answer_file_size')
         widgets = {
             'content': CKEditorUploadingWidget(),
             'start_date': DateTimePicker(
@@ -85,6 +169,34 @@ class CourseAssignmentForm(forms.ModelForm):
         self.fields['start_date'].initial = timezone.datetime.now()
 
 
+class EnrollmentImportForm(forms.Form):
+    """
+    CSV of the students to enroll. The preview page sends the same CSV back in `csv_content` with `confirm`
+    set, so the file is read and checked again but not uploaded twice.
+    """
+    csv_file = forms.FileField(label='CSV file', required=False,
+                               help_text='One student per line: email, first name, last name (optional).')
+    csv_content = forms.CharField(widget=forms.HiddenInput, required=False)
+    confirm = forms.BooleanField(widget=forms.HiddenInput, required=False)
+
+    def clean(self):
+        cleaned_data = super(EnrollmentImportForm, self).clean()
+        csv_file = cleaned_data.get('csv_file')
+        if csv_file:
+            try:
+                cleaned_data['csv_content'] = csv_file.read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise ValidationError('The file has to be a UTF-8 encoded CSV.')
+            # A new file always gets its own preview
+            cleaned_data['confirm'] = False
+        if not cleaned_data.get('csv_content'):
+            raise ValidationError('Choose a CSV file with the students to enroll.')
+        cleaned_data['rows'], cleaned_data['row_errors'] = imports.read_enrollment_csv(cleaned_data['csv_content'])
+        if not cleaned_data['rows'] and not cleaned_data['row_errors']:
+            raise ValidationError('The file lists no students.')
+        return cleaned_data
+
+
 class CourseForm(forms.ModelForm):
 
     class Meta:
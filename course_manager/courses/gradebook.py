@@ -0,0 +1,124 @@
+from array import array
+
+from django.utils import timezone
+
+from . import models as course_models
+
+
+#####################################################################################################################
+
+
+class Gradebook(object):
+    """
+    Students x assignments matrix of a course instance.
+
+    Cells are read with one flat query over the personal assignments and pivoted into two row-major arrays
+    (grades and status flags), so the size of the course only affects the arrays, not the number of queries
+    or model instances. Row and column headers take one query each.
+    """
+
+    NO_GRADE = -1
+
+    # Cell flags
+    EXISTS = 1
+    COMPLETED = 2
+    LATE = 4
+    OVERDUE = 8
+
+    def __init__(self, course_instance: course_models.CourseInstance):
+        self.course_instance = course_instance
+
+        self.assignments = list(
+            course_instance.course_assignments
+            .order_by('start_date', 'pk')
+            .values('pk', 'title', 'end_date')
+        )
+        self.enrolls = list(
+            course_instance.enrolls
+            .order_by('student__email')
+            .values(
+                'pk', 'student__email', 'student__profile__first_name', 'student__profile__last_name',
+                'graded_assignments_count', 'grades_sum',
+            )
+        )
+
+        self._columns = {assignment['pk']: index for index, assignment in enumerate(self.assignments)}
+        self._rows = {enroll['pk']: index for index, enroll in enumerate(self.enrolls)}
+
+        size = len(self.assignments) * len(self.enrolls)
+        self.grades = array('h', [self.NO_GRADE]) * size
+        self.flags = bytearray(size)
+
+        self._fill()
+
+    def _fill(self):
+        now = timezone.now()
+        deadlines = [assignment['end_date'] for assignment in self.assignments]
+        width = len(self.assignments)
+
+        # Legacy rows can pair an enroll with an assignment of another course instance, they have no column
+        cells = course_models.PersonalAssignment.objects.filter(
+            enroll__course_instance=self.course_instance,
+            course_instance_assignment__course_instance=self.course_instance,
+        ).values_list('enroll_id', 'course_instance_assignment_id', 'grade', 'is_completed', 'completion_date')
+
+        for enroll_pk, assignment_pk, grade, is_completed, completion_date in cells.iterator():
+            column = self._columns[assignment_pk]
+            index = self._rows[enroll_pk] * width + column
+            deadline = deadlines[column]
+
+            flags = self.EXISTS
+            if is_completed:
+                flags |= self.COMPLETED
+                if deadline and completion_date and completion_date > deadline:
+                    flags |= self.LATE
+            elif deadline and deadline < now:
+                flags |= self.OVERDUE
+
+            self.flags[index] = flags
+            if grade is not None:
+                self.grades[index] = grade
+
+    @property
+    def shape(self):
+        return len(self.enrolls), len(self.assignments)
+
+    def cell(self, row, column):
+        index = row * len(self.assignments) + column
+        return self.grades[index], self.flags[index]
+
+    def _render_cell(self, index):
+        flags = self.flags[index]
+        if not flags & self.EXISTS:
+            return '', 'gradebook-missing'
+        if flags & self.COMPLETED:
+            grade = self.grades[index]
+            css_class = 'gradebook-late' if flags & self.LATE else 'gradebook-completed'
+            return ('' if grade == self.NO_GRADE else str(grade)), css_class
+        if flags & self.OVERDUE:
+            return '-', 'gradebook-overdue'
+        return '-', 'gradebook-pending'
+
+    def rows(self):
+        """
+        Yields `(enroll, average_mark, cells)` per student, where every cell is a
+        `(display value, css class)` tuple ready for the template.
+        """
+        width = len(self.assignments)
+        for row, enroll in enumerate(self.enrolls):
+            count = enroll['graded_assignments_count']
+            average_mark = round(enroll['grades_sum'] / count, 2) if count else 0
+            start = row * width
+            yield enroll, average_mark, [self._render_cell(index) for index in range(start, start + width)]
+
+    def column_averages(self):
+        """Average grade of the completed, graded cells of every assignment (None when there are none)."""
+        width = len(self.assignments)
+        totals = [0] * width
+        counts = [0] * width
+        for index, flags in enumerate(self.flags):
+            if flags & self.COMPLETED and self.grades[index] != self.NO_GRADE:
+                column = index % width
+                totals[column] += self.grades[index]
+                counts[column] += 1
+        return [round(total / count, 2) if count else None for total, count in zip(totals, counts)]
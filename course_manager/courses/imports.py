@@ -0,0 +1,194 @@
+import csv
+import io
+import re
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from accounts import models as account_models
+from accounts import cache as account_cache
+from . import models as course_models
+
+
+#####################################################################################################################
+
+
+# Emails and user ids per `IN (...)` lookup
+LOOKUP_CHUNK_SIZE = 500
+# Rows per INSERT statement
+BATCH_SIZE = 1000
+
+EMAIL_MAX_LENGTH = account_models.CustomUser._meta.get_field('email').max_length
+EMAIL_HEADERS = ('email', 'e-mail', 'mail')
+USERNAME_RE = re.compile(r'[^\w.@+-]')
+
+
+class ImportRow(object):
+    __slots__ = ('line', 'email', 'first_name', 'last_name')
+
+    def __init__(self, line, email, first_name='', last_name=''):
+        self.line = line
+        self.email = email
+        self.first_name = first_name
+        self.last_name = last_name
+
+
+def _chunks(items, size=LOOKUP_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def read_enrollment_csv(content):
+    """
+    (rows, errors) of a CSV with one student per line: the email, optionally followed by the first and last
+    name. A header row naming an `email` column is recognized, the columns may then come in any order.
+    Errors are (line, message) pairs; emails listed twice are kept once.
+    """
+    reader = csv.reader(io.StringIO(content))
+    rows, errors, seen = [], [], set()
+    columns = {'email': 0, 'first_name': 1, 'last_name': 2}
+
+    for line, values in enumerate(reader, start=1):
+        values = [value.strip() for value in values]
+        if not any(values):
+            continue
+        if line == 1:
+            headers = [value.lower().replace(' ', '_') for value in values]
+            email_headers = [header for header in headers if header in EMAIL_HEADERS]
+            if email_headers:
+                columns = {
+                    'email': headers.index(email_headers[0]),
+                    'first_name': headers.index('first_name') if 'first_name' in headers else None,
+                    'last_name': headers.index('last_name') if 'last_name' in headers else None,
+                }
+                continue
+
+        if len(rows) >= settings.ENROLL_IMPORT_MAX_ROWS:
+            errors.append((line, f'Only {settings.ENROLL_IMPORT_MAX_ROWS} students can be imported at once.'))
+            break
+        fields = {
+            name: values[index] if index is not None and index < len(values) else ''
+            for name, index in columns.items()
+        }
+        email = account_models.CustomUser.objects.normalize_email(fields['email'])
+        try:
+            validate_email(email)
+            if len(email) > EMAIL_MAX_LENGTH:
+                raise ValidationError('The email address is too long.')
+        except ValidationError:
+            errors.append((line, f'"{fields["email"]}" is not a valid email address.'))
+            continue
+        if email in seen:
+            continue
+        seen.add(email)
+        rows.append(ImportRow(line, email, fields['first_name'][:40], fields['last_name'][:40]))
+    return rows, errors
+
+
+class EnrollmentImport(object):
+    """
+    Enrolls the students of `rows` in `course_instance`. Creating the object only reads, so it doubles as the
+    dry-run preview; `apply()` writes everything with set-wise statements in one transaction, in place of the
+    per-student saves (group lookup, group add, personal assignment fan-out) of `Enroll.save()`.
+    """
+
+    def __init__(self, course_instance, rows):
+        self.course_instance = course_instance
+        self.rows = rows
+
+        self.existing_users = {}
+        for emails in _chunks(row.email for row in rows):
+            self.existing_users.update(
+                account_models.CustomUser.objects.filter(email__in=emails).values_list('email', 'pk')
+            )
+        enrolled = set()
+        for user_ids in _chunks(self.existing_users.values()):
+            enrolled.update(course_instance.enrolls.filter(student__in=user_ids).values_list('student_id', flat=True))
+
+        self.new_users = [row for row in rows if row.email not in self.existing_users]
+        self.already_enrolled = [row for row in rows if self.existing_users.get(row.email) in enrolled]
+        self.to_enroll = [
+            row for row in rows
+            if row.email not in self.existing_users or self.existing_users[row.email] not in enrolled
+        ]
+
+    def get_usernames(self):
+        """Free usernames for the new users, derived from their emails."""
+        candidates = {
+            row.email: (USERNAME_RE.sub('', row.email.split('@')[0]) or 'student')[:24] for row in self.new_users
+        }
+        taken = set()
+        for names in _chunks(set(candidates.values())):
+            taken.update(
+                account_models.CustomUser.objects.filter(username__in=names).values_list('username', flat=True)
+            )
+
+        usernames = {}
+        for email, candidate in candidates.items():
+            username, number = candidate, 1
+            while username in taken:
+                number += 1
+                username = f'{candidate}{number}'
+                if len(username) > 30:
+                    # Numbered variants of a long name are exhausted, fall back to its email
+                    username = USERNAME_RE.sub('', email)[:30]
+                    break
+            taken.add(username)
+            usernames[email] = username
+        return usernames
+
+    def create_users(self):
+        usernames = self.get_usernames()
+        # Imported students set their password with the password reset
+        password = make_password(None)
+        users, profiles = [], []
+        for row in self.new_users:
+            users.append(account_models.CustomUser(email=row.email, username=usernames[row.email], password=password))
+            profiles.append(account_models.Profile(first_name=row.first_name or None, last_name=row.last_name or None))
+        account_models.CustomUser.objects.bulk_create_with_profiles(users, profiles, batch_size=BATCH_SIZE)
+        self.existing_users.update((user.email, user.pk) for user in users)
+
+    def add_to_students_group(self, user_ids):
+        group = Group.objects.get(name='students')
+        membership = account_models.CustomUser.groups.through
+        members = set()
+        for ids in _chunks(user_ids):
+            members.update(
+                membership.objects.filter(group=group, customuser_id__in=ids).values_list('customuser_id', flat=True)
+            )
+        added = [user_id for user_id in user_ids if user_id not in members]
+        membership.objects.bulk_create(
+            [membership(customuser_id=user_id, group_id=group.pk) for user_id in added],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        return added
+
+    def apply(self):
+        """Returns the number of new users and of new enrolls."""
+        with transaction.atomic():
+            previous_users = set(self.existing_users.values())
+            self.create_users()
+            user_ids = [self.existing_users[row.email] for row in self.to_enroll]
+
+            added = self.add_to_students_group(user_ids)
+            # Bulk inserts send no m2m_changed; users created here have nothing cached yet
+            changed = [user_id for user_id in added if user_id in previous_users]
+            account_cache.bump_user_permissions_version(*changed)
+            account_cache.bump_nav_version(*changed)
+
+            course_models.Enroll.objects.bulk_create(
+                [course_models.Enroll(course_instance=self.course_instance, student_id=user_id) for user_id in user_ids],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            course_models.PersonalAssignment.objects.create_missing(
+                assignment_ids=self.course_instance.course_assignments.values_list('pk', flat=True),
+                enroll_ids=self.course_instance.enrolls.values_list('pk', flat=True),
+            )
+        return len(self.new_users), len(user_ids)
@@ -0,0 +1,157 @@
+import http.client
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from accounts import models as account_models
+from courses import async_urls
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the project with uvicorn and compare throughput of the sync pages (courses:) with their async '
+        'variants (courses-async:) under concurrent load, against the configured database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--concurrency', type=int, default=32, help='Simultaneous connections.')
+        parser.add_argument('--requests', type=int, default=300, help='Requests per route and path.')
+        parser.add_argument('--threads', type=int, default=settings.ASYNC_VIEW_THREADS,
+                            help='ASYNC_VIEW_THREADS of the served project.')
+        parser.add_argument('--routes', nargs='*', help='Route names of courses.async_urls to benchmark.')
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('The benchmark needs uvicorn: pip install uvicorn')
+
+        route_names = options['routes'] or [pattern.name for pattern in async_urls.urlpatterns]
+        targets = self.get_targets(route_names)
+
+        server = self.start_server(options)
+        try:
+            self.stdout.write(f"{'route':<40} {'path':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+            for name, (session, kwargs) in targets.items():
+                for namespace in ('courses', 'courses-async'):
+                    url = reverse(f'{namespace}:{name}', kwargs=kwargs)
+                    result = self.run_load(options, url, session)
+                    self.stdout.write(
+                        f"{name:<40} {'async' if namespace == 'courses-async' else 'sync':<6} "
+                        f"{result['throughput']:>8.1f} {result['p50']:>8.1f} {result['p95']:>8.1f} "
+                        f"{result['errors']:>7}"
+                    )
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finished.'))
+
+    def get_targets(self, route_names):
+        """Route name -> (session cookie, url kwargs), for a teacher and a student of one course instance."""
+        teacher = account_models.Teacher.objects.filter(supervised_courses__enrolls__isnull=False).first()
+        if teacher is None:
+            raise CommandError('No teacher supervises an instance with enrolls, run seed_scale first.')
+        course_instance = teacher.supervised_courses.filter(enrolls__isnull=False).select_related('course').first()
+        enroll = course_instance.enrolls.select_related('student').first()
+        personal_assignment = enroll.personal_assignments.first()
+        if personal_assignment is None:
+            raise CommandError(f'{course_instance} has no assignments, run seed_scale first.')
+
+        sessions = {'student': self.get_session(enroll.student), 'teacher': self.get_session(teacher.user)}
+        instance_kwargs = {'course_slug': course_instance.course.slug, 'instance_slug': course_instance.slug}
+        routes = {
+            'course-instance-detail': ('student', instance_kwargs),
+            'user-courses': ('student', None),
+            'personal-assignment': ('student', dict(instance_kwargs, pk=personal_assignment.pk)),
+            'course-instance-teacher-detail': ('teacher', instance_kwargs),
+            'gradebook-teacher': ('teacher', instance_kwargs),
+            'enroll-teacher-detail': ('teacher', dict(instance_kwargs, enroll_pk=enroll.pk)),
+            'personal-assignment-teacher-detail': ('teacher', dict(
+                instance_kwargs, enroll_pk=enroll.pk, assignment_pk=personal_assignment.pk,
+            )),
+            'course-assignment-teacher-detail': ('teacher', dict(
+                instance_kwargs, assignment_pk=personal_assignment.course_instance_assignment_id,
+            )),
+        }
+        unknown = set(route_names) - set(routes)
+        if unknown:
+            raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+        return {name: (sessions[routes[name][0]], routes[name][1]) for name in route_names}
+
+    @staticmethod
+    def get_session(user):
+        client = Client()
+        client.force_login(user)
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def start_server(self, options):
+        env = dict(os.environ, ASYNC_VIEW_THREADS_COURSE_MANAGER=str(options['threads']))
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'course_manager.asgi:application',
+             '--host', options['host'], '--port', str(options['port']), '--log-level', 'warning', '--no-access-log'],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('uvicorn exited before accepting connections.')
+            try:
+                socket.create_connection((options['host'], options['port']), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError('uvicorn did not start accepting connections within 30 seconds.')
+
+    def run_load(self, options, url, session):
+        headers = {'Cookie': f'{settings.SESSION_COOKIE_NAME}={session}'}
+        concurrency = options['concurrency']
+        per_worker = [options['requests'] // concurrency] * concurrency
+        for index in range(options['requests'] % concurrency):
+            per_worker[index] += 1
+
+        def worker(count):
+            connection = http.client.HTTPConnection(options['host'], options['port'], timeout=60)
+            latencies, errors = [], 0
+            for _ in range(count):
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', url, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status != 200:
+                        errors += 1
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    connection.close()
+                latencies.append((time.perf_counter() - started) * 1000)
+            connection.close()
+            return latencies, errors
+
+        # Warms up the connections, templates and caches of the server
+        worker(3)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(worker, per_worker))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+        return {
+            'throughput': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'errors': sum(errors for _, errors in results),
+        }
@@ -0,0 +1,23 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from courses import models as course_models
+
+
+class Command(BaseCommand):
+    help = 'Delete answer uploads that have not received a chunk for a while, with their partial files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Age of the last received chunk (default 24).')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(hours=options['hours'])
+        # Deleted one by one, so the partial files are removed by the post_delete signal
+        stale = course_models.AnswerUpload.objects.filter(updated_at__lt=cutoff)
+        count = 0
+        for upload in stale.iterator():
+            upload.delete()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Deleted {count} stale upload(s).'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from courses import models as course_models
+
+
+class Command(BaseCommand):
+    help = 'Move answer files saved before the content addressed storage into its blob store.'
+
+    def handle(self, *args, **options):
+        storage = course_models.PersonalAssignment._meta.get_field('answer_file').storage
+        names = (
+            course_models.PersonalAssignment.objects
+            .exclude(answer_file='').exclude(answer_file__isnull=True)
+            .values_list('answer_file', flat=True)
+        )
+        moved = sum(storage.absorb(name) for name in names.iterator())
+
+        blobs = course_models.StoredBlob.objects.aggregate(count=Count('pk'), size=Sum('size'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} file(s). {course_models.BlobLink.objects.count()} answer file(s) share "
+            f"{blobs['count']} blob(s) of {blobs['size'] or 0} bytes."
+        ))
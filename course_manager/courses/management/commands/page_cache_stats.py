@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from courses import cache as page_cache
+
+
+class Command(BaseCommand):
+    help = 'Show hit and miss counters of the anonymous catalog page cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them.')
+        parser.add_argument('--invalidate', action='store_true', help='Drop every cached page.')
+
+    def handle(self, *args, **options):
+        stats = page_cache.get_stats()
+        requests = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / requests * 100 if requests else 0
+        self.stdout.write(f"Hits: {stats['hits']}, misses: {stats['misses']}, hit ratio: {ratio:.1f}%")
+
+        if options['reset']:
+            page_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
+        if options['invalidate']:
+            page_cache.invalidate_pages()
+            self.stdout.write(self.style.SUCCESS('Cached pages invalidated.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from courses import models as course_models
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored grade aggregates of enrolls from their personal assignments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-instance',
+            dest='instance_slug',
+            help='Slug of the course instance to rebuild; all enrolls are rebuilt by default.',
+        )
+
+    def handle(self, *args, **options):
+        enrolls = course_models.Enroll.objects.all()
+        if options['instance_slug']:
+            enrolls = enrolls.filter(course_instance__slug=options['instance_slug'])
+
+        updated = enrolls.refresh_grade_aggregates()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt grade aggregates for {updated} enroll(s)."))
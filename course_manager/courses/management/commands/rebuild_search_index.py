@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import search
+
+
+class Command(BaseCommand):
+    help = 'Create the full-text catalog search index if it is missing and refill it from the course tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to rebuild the index in.')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search.create_search_index(using):
+            raise CommandError('The database does not support the SQLite FTS5 search index.')
+
+        indexed = search.rebuild_search_index(using)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} course(s)."))
@@ -0,0 +1,281 @@
+import datetime
+import random
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.utils import timezone
+from django.utils.text import slugify
+
+from accounts import models as account_models
+from courses import models as course_models
+from courses import cache as page_cache
+
+
+SUBJECTS = (
+    'Python', 'Django', 'Algorithms', 'Databases', 'Networks', 'Linux', 'Statistics', 'Machine Learning',
+    'JavaScript', 'Operating Systems', 'Compilers', 'Cryptography', 'Distributed Systems', 'Calculus',
+)
+FIRST_NAMES = (
+    'Anna', 'Boris', 'Clara', 'Denis', 'Elena', 'Felix', 'Galina', 'Igor', 'Julia', 'Kirill',
+    'Lena', 'Maxim', 'Nina', 'Oleg', 'Polina', 'Roman', 'Sofia', 'Timur', 'Vera', 'Yuri',
+)
+LAST_NAMES = (
+    'Ivanov', 'Smirnov', 'Kuznetsov', 'Popov', 'Vasiliev', 'Petrov', 'Sokolov', 'Mikhailov',
+    'Novikov', 'Fedorov', 'Morozov', 'Volkov', 'Alekseev', 'Lebedev', 'Semenov', 'Egorov',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a large synthetic dataset (courses, staff, students, enrolls and personal assignments) '
+        'with bulk inserts. The output only depends on the options and --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=10)
+        parser.add_argument('--instances', type=int, default=2, help='Instances per course.')
+        parser.add_argument('--assignments', type=int, default=10, help='Assignments per course instance.')
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--enrolls', type=int, default=3, help='Course instances every student enrolls in.')
+        parser.add_argument('--teachers', type=int, default=10)
+        parser.add_argument('--managers', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--start-date', default='2021-09-01',
+                            help='Date the generated timeline starts at (YYYY-MM-DD).')
+        parser.add_argument('--password', help='Password of the generated users; unusable by default.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        instances_count = options['courses'] * options['instances']
+        if options['enrolls'] > instances_count:
+            raise CommandError(f"--enrolls can not exceed the number of course instances ({instances_count}).")
+        try:
+            start_date = datetime.date.fromisoformat(options['start_date'])
+        except ValueError:
+            raise CommandError('--start-date must be formatted as YYYY-MM-DD.')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.start = timezone.make_aware(datetime.datetime.combine(start_date, datetime.time(9)))
+        # Assignments that ended before this moment are mostly handed in
+        self.reference_date = self.start + datetime.timedelta(days=150)
+        self.password = make_password(options['password'])
+
+        with transaction.atomic():
+            groups = {name: Group.objects.get_or_create(name=name)[0] for name in ('students', 'teachers', 'managers')}
+            courses, instances = self.create_courses(options['courses'], options['instances'])
+            assignments = self.create_assignments(instances, options['assignments'])
+            self.create_staff(courses, instances, options['teachers'], options['managers'])
+            students = self.create_users('student', options['students'], groups['students'])
+            enrolls_count, personal_assignments_count = self.create_enrolls(
+                instances, assignments, students, options['enrolls'],
+            )
+        # Bulk inserts bypass the signals that invalidate cached catalog pages
+        page_cache.invalidate_pages()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(courses)} course(s), {len(instances)} instance(s), "
+            f"{sum(map(len, assignments.values()))} assignment(s), {len(students)} student(s), "
+            f"{enrolls_count} enroll(s) and {personal_assignments_count} personal assignment(s)."
+        ))
+
+    @staticmethod
+    def next_pk(model):
+        return (model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0) + 1
+
+    def insert_rows(self, model, fields, rows):
+        """Raw bulk insert, used for the child tables of multi-table inherited models."""
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(model._meta.get_field(field).column) for field in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                cursor.executemany(
+                    f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                    rows[start:start + self.batch_size],
+                )
+
+    def create_courses(self, courses_count, instances_per_course):
+        course_pk = self.next_pk(course_models.Course)
+        instance_pk = self.next_pk(course_models.CourseInstance)
+
+        courses, instances = [], []
+        for number in range(courses_count):
+            title = f"{SUBJECTS[number % len(SUBJECTS)]} {course_pk + number}"
+            course = course_models.Course(
+                pk=course_pk + number,
+                base_title=title,
+                slug=slugify(title),
+                description=f"Synthetic {title} course.",
+            )
+            courses.append(course)
+            for index in range(instances_per_course):
+                sub_title = f"{title} {self.start.year + index}"
+                start_date = self.start.date() + datetime.timedelta(days=365 * index + self.rng.randint(0, 30))
+                instances.append(course_models.CourseInstance(
+                    pk=instance_pk + len(instances),
+                    course=course,
+                    sub_title=sub_title,
+                    slug=slugify(sub_title),
+                    min_mark=self.rng.choice((50, 60, 60, 70)),
+                    start_date=start_date,
+                    end_date=start_date + datetime.timedelta(days=120),
+                ))
+
+        course_models.Course.objects.bulk_create(courses, batch_size=self.batch_size)
+        course_models.CourseInstance.objects.bulk_create(instances, batch_size=self.batch_size)
+        return courses, instances
+
+    def create_assignments(self, instances, assignments_per_instance):
+        assignment_pk = self.next_pk(course_models.Assignment)
+
+        assignments = defaultdict(list)
+        parents = []
+        for instance in instances:
+            instance_start = timezone.make_aware(datetime.datetime.combine(instance.start_date, datetime.time(9)))
+            for number in range(assignments_per_instance):
+                start_date = instance_start + datetime.timedelta(days=number * 120 // max(assignments_per_instance, 1))
+                assignment = course_models.Assignment(
+                    pk=assignment_pk + len(parents),
+                    title=f"Task {number + 1}",
+                    content=f"<p>Task {number + 1} of {instance.sub_title}.</p>",
+                    start_date=start_date,
+                    end_date=start_date + datetime.timedelta(days=self.rng.choice((7, 7, 10, 14))),
+                )
+                # Difficulty shifts the grades of the whole column
+                assignment.difficulty = self.rng.gauss(0, 8)
+                parents.append(assignment)
+                assignments[instance.pk].append(assignment)
+
+        course_models.Assignment.objects.bulk_create(parents, batch_size=self.batch_size)
+        self.insert_rows(
+            course_models.CourseInstanceAssignment,
+            ('assignment_ptr', 'course_instance'),
+            [(assignment.pk, instance_pk) for instance_pk, items in assignments.items() for assignment in items],
+        )
+        return assignments
+
+    def create_users(self, role, count, group):
+        user_pk = self.next_pk(account_models.CustomUser)
+
+        users, profiles = [], []
+        for number in range(count):
+            pk = user_pk + number
+            users.append(account_models.CustomUser(
+                pk=pk,
+                email=f"seed-{role}-{pk}@example.com",
+                username=f"seed-{role}-{pk}",
+                password=self.password,
+                is_staff=role != 'student',
+            ))
+            profiles.append(account_models.Profile(
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+            ))
+        account_models.CustomUser.objects.bulk_create_with_profiles(users, profiles, batch_size=self.batch_size)
+
+        membership = account_models.CustomUser.groups.through
+        membership.objects.bulk_create(
+            [membership(customuser_id=user.pk, group_id=group.pk) for user in users],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        return users
+
+    def create_staff_workers(self, model, role, count):
+        """Staff models inherit from StaffWorker, so their child rows are inserted raw."""
+        staff_pk = self.next_pk(account_models.StaffWorker)
+        users = self.create_users(role, count, Group.objects.get(name=f"{role}s"))
+        workers = [
+            account_models.StaffWorker(pk=staff_pk + number, user=user, salary=self.rng.randrange(1000, 5000, 100))
+            for number, user in enumerate(users)
+        ]
+        account_models.StaffWorker.objects.bulk_create(workers, batch_size=self.batch_size)
+        self.insert_rows(model, ('staffworker_ptr', ), [(worker.pk, ) for worker in workers])
+        return workers
+
+    def create_staff(self, courses, instances, teachers_count, managers_count):
+        # Instances and courses are supervised round robin
+        if teachers_count:
+            teachers = self.create_staff_workers(account_models.Teacher, 'teacher', teachers_count)
+            through = account_models.Teacher.supervised_courses.through
+            through.objects.bulk_create(
+                [through(teacher_id=teachers[number % teachers_count].pk, courseinstance_id=instance.pk)
+                 for number, instance in enumerate(instances)],
+                batch_size=self.batch_size,
+            )
+
+        if managers_count:
+            managers = self.create_staff_workers(account_models.Manager, 'manager', managers_count)
+            through = account_models.Manager.supervised_course_instances.through
+            through.objects.bulk_create(
+                [through(manager_id=managers[number % managers_count].pk, courseinstance_id=instance.pk)
+                 for number, instance in enumerate(instances)],
+                batch_size=self.batch_size,
+            )
+            through = account_models.Manager.supervised_courses.through
+            through.objects.bulk_create(
+                [through(manager_id=managers[number % managers_count].pk, course_id=course.pk)
+                 for number, course in enumerate(courses)],
+                batch_size=self.batch_size,
+            )
+
+    def create_enrolls(self, instances, assignments, students, enrolls_per_student):
+        students_by_instance = defaultdict(list)
+        for student in students:
+            # Some students are consistently better than others
+            student.ability = self.rng.gauss(72, 12)
+            for instance in self.rng.sample(instances, enrolls_per_student):
+                students_by_instance[instance.pk].append(student)
+
+        enroll_pk = self.next_pk(course_models.Enroll)
+        enrolls_count = personal_assignments_count = 0
+
+        # One instance at a time keeps memory flat; grade aggregates are known before the enroll is inserted
+        for instance in instances:
+            enrolls, personal_assignments = [], []
+            for student in students_by_instance[instance.pk]:
+                enroll = course_models.Enroll(pk=enroll_pk, course_instance_id=instance.pk, student_id=student.pk)
+                enroll_pk += 1
+                for assignment in assignments[instance.pk]:
+                    personal_assignment = self.build_personal_assignment(enroll, assignment, student.ability)
+                    count, total = personal_assignment.grade_contribution
+                    enroll.graded_assignments_count += count
+                    enroll.grades_sum += total
+                    personal_assignments.append(personal_assignment)
+                enrolls.append(enroll)
+
+            course_models.Enroll.objects.bulk_create(enrolls, batch_size=self.batch_size)
+            course_models.PersonalAssignment.objects.bulk_create(personal_assignments, batch_size=self.batch_size)
+            enrolls_count += len(enrolls)
+            personal_assignments_count += len(personal_assignments)
+        return enrolls_count, personal_assignments_count
+
+    def build_personal_assignment(self, enroll, assignment, ability):
+        personal_assignment = course_models.PersonalAssignment(
+            enroll_id=enroll.pk,
+            course_instance_assignment_id=assignment.pk,
+        )
+        completion_rate = 0.9 if assignment.end_date < self.reference_date else 0.3
+        if self.rng.random() >= completion_rate:
+            return personal_assignment
+
+        # Roughly one in ten hand-ins is late
+        if self.rng.random() < 0.1:
+            delay = datetime.timedelta(hours=self.rng.randint(1, 72))
+        else:
+            delay = -datetime.timedelta(hours=self.rng.randint(1, 24 * 6))
+        personal_assignment.is_completed = True
+        personal_assignment.completion_date = assignment.end_date + delay
+        personal_assignment.answer_field = 'Synthetic answer.'
+        # Some of the completed work is still waiting for a grade
+        if self.rng.random() < 0.1:
+            personal_assignment.grade = None
+        else:
+            grade = self.rng.gauss(ability - assignment.difficulty, 10)
+            personal_assignment.grade = min(100, max(0, round(grade)))
+        return personal_assignment
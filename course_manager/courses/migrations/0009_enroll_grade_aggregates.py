@@ -0,0 +1,41 @@
+# Generated by Django 3.1 on 2026-10-18 10:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Count, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_grade_aggregates(apps, schema_editor):
+    Enroll = apps.get_model('courses', 'Enroll')
+    PersonalAssignment = apps.get_model('courses', 'PersonalAssignment')
+
+    graded = PersonalAssignment.objects.filter(
+        enroll=OuterRef('pk'),
+        is_completed=True,
+        grade__isnull=False,
+    ).order_by().values('enroll')
+    Enroll.objects.update(
+        graded_assignments_count=Coalesce(Subquery(graded.annotate(count=Count('pk')).values('count')), Value(0)),
+        grades_sum=Coalesce(Subquery(graded.annotate(total=Sum('grade')).values('total')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_personalassignment_completion_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enroll',
+            name='graded_assignments_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enroll',
+            name='grades_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_grade_aggregates, migrations.RunPython.noop),
+    ]
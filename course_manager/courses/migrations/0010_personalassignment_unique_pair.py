@@ -0,0 +1,59 @@
+# Generated by Django 3.1 on 2026-10-18 14:46
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def get_personal_assignment_rank(personal_assignment):
+    # Graded copies win over answered ones, then the oldest
+    return (
+        personal_assignment.is_completed,
+        bool(personal_assignment.answer_field or personal_assignment.answer_file),
+        -personal_assignment.pk,
+    )
+
+
+def remove_duplicate_personal_assignments(apps, schema_editor):
+    """
+    Keeps the graded, else the answered, else the oldest copy of every pair, and recomputes the grade
+    aggregates of the enrolls that lost copies.
+    """
+    PersonalAssignment = apps.get_model('courses', 'PersonalAssignment')
+    Enroll = apps.get_model('courses', 'Enroll')
+
+    duplicates = (
+        PersonalAssignment.objects
+        .values('course_instance_assignment', 'enroll')
+        .annotate(copies=Count('pk'))
+        .filter(copies__gt=1)
+    )
+    enroll_ids = set()
+    for duplicate in duplicates:
+        copies = PersonalAssignment.objects.filter(
+            course_instance_assignment=duplicate['course_instance_assignment'],
+            enroll=duplicate['enroll'],
+        )
+        best = max(copies, key=get_personal_assignment_rank)
+        copies.exclude(pk=best.pk).delete()
+        enroll_ids.add(duplicate['enroll'])
+
+    for enroll in Enroll.objects.filter(pk__in=enroll_ids):
+        graded = PersonalAssignment.objects.filter(enroll=enroll.pk, is_completed=True, grade__isnull=False)
+        enroll.graded_assignments_count = graded.count()
+        enroll.grades_sum = graded.aggregate(total=Sum('grade'))['total'] or 0
+        enroll.save(update_fields=['graded_assignments_count', 'grades_sum'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_enroll_grade_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_personal_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='personalassignment',
+            constraint=models.UniqueConstraint(fields=('course_instance_assignment', 'enroll'), name='unique_personal_assignment'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 3.1 on 2026-10-18 14:50
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def get_personal_assignment_rank(personal_assignment, kept_enroll_pk):
+    # Graded copies win over answered ones, then the copy of the kept enroll, then the oldest
+    return (
+        personal_assignment.is_completed,
+        bool(personal_assignment.answer_field or personal_assignment.answer_file),
+        personal_assignment.enroll_id == kept_enroll_pk,
+        -personal_assignment.pk,
+    )
+
+
+def merge_enrolls(apps, kept_enroll, copies):
+    PersonalAssignment = apps.get_model('courses', 'PersonalAssignment')
+    Certificate = apps.get_model('courses', 'Certificate')
+    copy_pks = [copy.pk for copy in copies]
+
+    by_assignment = {}
+    for personal_assignment in PersonalAssignment.objects.filter(enroll__in=[kept_enroll.pk] + copy_pks):
+        by_assignment.setdefault(personal_assignment.course_instance_assignment_id, []).append(personal_assignment)
+    for personal_assignments in by_assignment.values():
+        best = max(personal_assignments, key=lambda item: get_personal_assignment_rank(item, kept_enroll.pk))
+        PersonalAssignment.objects.filter(
+            pk__in=[item.pk for item in personal_assignments if item.pk != best.pk]
+        ).delete()
+        if best.enroll_id != kept_enroll.pk:
+            PersonalAssignment.objects.filter(pk=best.pk).update(enroll=kept_enroll.pk)
+
+    if not Certificate.objects.filter(enroll=kept_enroll.pk).exists():
+        certificate = Certificate.objects.filter(enroll__in=copy_pks).order_by('pk').first()
+        if certificate is not None:
+            Certificate.objects.filter(pk=certificate.pk).update(enroll=kept_enroll.pk)
+
+    graded = PersonalAssignment.objects.filter(enroll=kept_enroll.pk, is_completed=True, grade__isnull=False)
+    kept_enroll.is_course_finished = kept_enroll.is_course_finished or any(copy.is_course_finished for copy in copies)
+    kept_enroll.graded_assignments_count = graded.count()
+    kept_enroll.grades_sum = graded.aggregate(total=Sum('grade'))['total'] or 0
+    kept_enroll.save(update_fields=['is_course_finished', 'graded_assignments_count', 'grades_sum'])
+
+
+def remove_duplicate_enrolls(apps, schema_editor):
+    """
+    Merges the copies of an enroll into the oldest one, later copies were created by double clicks. Every
+    assignment keeps its graded or answered personal assignment, whichever enroll it was on, and a certificate
+    of a copy is kept when the oldest enroll has none, before the copies are deleted.
+    """
+    Enroll = apps.get_model('courses', 'Enroll')
+
+    duplicates = (
+        Enroll.objects
+        .values('course_instance', 'student')
+        .annotate(copies=Count('pk'))
+        .filter(copies__gt=1)
+    )
+    for duplicate in duplicates:
+        kept_enroll, *copies = Enroll.objects.filter(
+            course_instance=duplicate['course_instance'],
+            student=duplicate['student'],
+        ).order_by('pk')
+        merge_enrolls(apps, kept_enroll, copies)
+        Enroll.objects.filter(pk__in=[copy.pk for copy in copies]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_personalassignment_unique_pair'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_enrolls, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='enroll',
+            constraint=models.UniqueConstraint(fields=('course_instance', 'student'), name='unique_enroll'),
+        ),
+    ]
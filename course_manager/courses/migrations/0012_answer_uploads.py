@@ -0,0 +1,34 @@
+# Generated by Django 3.1.14 on 2026-10-18 15:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_lookup_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseinstanceassignment',
+            name='max_answer_file_size',
+            field=models.PositiveIntegerField(blank=True, help_text='Leave empty to use the site limit.', null=True, verbose_name='Max answer file size (MB)'),
+        ),
+        migrations.CreateModel(
+            name='AnswerUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('partial_name', models.CharField(editable=False, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('personal_assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_uploads', to='courses.personalassignment')),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.14 on 2026-10-18 15:41
+
+import courses.models
+import courses.storage
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_answer_uploads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='personalassignment',
+            name='answer_file',
+            field=models.FileField(blank=True, null=True, storage=courses.storage.ContentAddressedStorage(), upload_to=courses.models.student_answers_directory_path),
+        ),
+        migrations.CreateModel(
+            name='BlobLink',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='links', to='courses.storedblob')),
+            ],
+        ),
+    ]
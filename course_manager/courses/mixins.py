@@ -0,0 +1,215 @@
+import base64
+import binascii
+import json
+from functools import reduce
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from . import models as course_models
+
+
+##################################################################################################################
+
+
+class CourseChainMixin(object):
+    """
+    Resolves the `course_slug` / `instance_slug` / enroll / assignment URL chain with one joined query per
+    object and caches the result on the request, so every handler and nested view of the dispatch reuses it.
+
+    Enrolls are looked up by `enroll_kwarg`, or belong to the current user when it is None (student views).
+    """
+    enroll_kwarg = 'enroll_pk'
+    personal_assignment_kwarg = 'assignment_pk'
+    course_assignment_kwarg = 'assignment_pk'
+
+    def _get_chain_cache(self):
+        if not hasattr(self.request, '_course_chain'):
+            self.request._course_chain = {}
+        return self.request._course_chain
+
+    def _get_instance_key(self):
+        return self.kwargs.get('course_slug'), self.kwargs.get('instance_slug')
+
+    def _get_enroll_key(self):
+        if self.enroll_kwarg is None:
+            return self._get_instance_key() + ('student', self.request.user.pk)
+        return self._get_instance_key() + ('pk', self.kwargs.get(self.enroll_kwarg))
+
+    def _get_enroll_lookup(self, prefix=''):
+        if self.enroll_kwarg is None:
+            return {f'{prefix}student': self.request.user}
+        return {f'{prefix}pk': self.kwargs.get(self.enroll_kwarg)}
+
+    def _resolve(self, key, queryset, **lookups):
+        cache = self._get_chain_cache()
+        if key not in cache:
+            cache[key] = get_object_or_404(queryset, **lookups)
+        return cache[key]
+
+    def get_course_instance(self):
+        course_slug, instance_slug = self._get_instance_key()
+        return self._resolve(
+            ('course_instance', ) + self._get_instance_key(),
+            course_models.CourseInstance.objects.select_related('course'),
+            course__slug=course_slug,
+            slug=instance_slug,
+        )
+
+    def get_enroll(self):
+        course_slug, instance_slug = self._get_instance_key()
+        enroll = self._resolve(
+            ('enroll', ) + self._get_enroll_key(),
+            course_models.Enroll.objects.select_related('course_instance__course', 'student'),
+            course_instance__course__slug=course_slug,
+            course_instance__slug=instance_slug,
+            **self._get_enroll_lookup(),
+        )
+        self._get_chain_cache().setdefault(('course_instance', ) + self._get_instance_key(), enroll.course_instance)
+        return enroll
+
+    def get_personal_assignment(self):
+        course_slug, instance_slug = self._get_instance_key()
+        pk = self.kwargs.get(self.personal_assignment_kwarg)
+        personal_assignment = self._resolve(
+            ('personal_assignment', pk) + self._get_enroll_key(),
+            course_models.PersonalAssignment.objects.select_related(
+                'enroll__course_instance__course', 'enroll__student', 'course_instance_assignment',
+            ),
+            enroll__course_instance__course__slug=course_slug,
+            enroll__course_instance__slug=instance_slug,
+            pk=pk,
+            **self._get_enroll_lookup(prefix='enroll__'),
+        )
+        cache = self._get_chain_cache()
+        cache.setdefault(('enroll', ) + self._get_enroll_key(), personal_assignment.enroll)
+        cache.setdefault(('course_instance', ) + self._get_instance_key(), personal_assignment.enroll.course_instance)
+        return personal_assignment
+
+    def get_course_assignment(self):
+        course_slug, instance_slug = self._get_instance_key()
+        pk = self.kwargs.get(self.course_assignment_kwarg)
+        course_assignment = self._resolve(
+            ('course_assignment', pk) + self._get_instance_key(),
+            course_models.CourseInstanceAssignment.objects.select_related('course_instance__course'),
+            course_instance__course__slug=course_slug,
+            course_instance__slug=instance_slug,
+            pk=pk,
+        )
+        self._get_chain_cache().setdefault(
+            ('course_instance', ) + self._get_instance_key(), course_assignment.course_instance,
+        )
+        return course_assignment
+
+
+class KeysetPage(object):
+    """
+    Page of a keyset (seek) pagination. It mirrors the parts of `django.core.paginator.Page`
+    that templates use, but has no number and no paginator, since nothing is counted.
+    """
+    number = None
+    paginator = None
+    page_window = ()
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginationMixin(object):
+    """
+    Paginates a ListView by `keyset_fields`, which have to identify a row uniquely.
+
+    `?page=N` keeps the numbered pages of Django's paginator. Every page also gets `next_cursor` and
+    `previous_cursor`. `?after=<cursor>` and `?before=<cursor>` seek to the neighbour page with an indexed
+    range filter instead of an OFFSET, so following them costs the same on any page.
+    """
+    paginate_by = 12
+    keyset_fields = ('pk', )
+    # Numbered links shown around the current page
+    page_window_size = 2
+
+    def get_keyset_fields(self):
+        return self.keyset_fields
+
+    def paginate_queryset(self, queryset, page_size):
+        queryset = queryset.order_by(*self.get_keyset_fields())
+        after = self.request.GET.get('after')
+        before = self.request.GET.get('before')
+        if after or before:
+            page = self.seek(queryset, page_size, cursor=after or before, forward=bool(after))
+            paginator = None
+        else:
+            paginator, page, object_list, is_paginated = super(KeysetPaginationMixin, self).paginate_queryset(
+                queryset, page_size,
+            )
+            page.object_list = list(object_list)
+            first = max(page.number - self.page_window_size, 1)
+            last = min(page.number + self.page_window_size, paginator.num_pages)
+            page.page_window = range(first, last + 1)
+
+        page.next_cursor = page.previous_cursor = None
+        if page.object_list:
+            page.next_cursor = self.encode_cursor(page.object_list[-1]) if page.has_next() else None
+            page.previous_cursor = self.encode_cursor(page.object_list[0]) if page.has_previous() else None
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def seek(self, queryset, page_size, cursor, forward):
+        fields = self.get_keyset_fields()
+        values = self.decode_cursor(queryset.model, cursor)
+        if forward:
+            rows = list(queryset.filter(self.get_keyset_filter(fields, values, forward))[:page_size + 1])
+            return KeysetPage(rows[:page_size], has_next=len(rows) > page_size, has_previous=True)
+
+        reversed_fields = [field[1:] if field.startswith('-') else f'-{field}' for field in fields]
+        rows = list(
+            queryset.filter(self.get_keyset_filter(fields, values, forward)).order_by(*reversed_fields)[:page_size + 1]
+        )
+        return KeysetPage(rows[:page_size][::-1], has_next=True, has_previous=len(rows) > page_size)
+
+    @staticmethod
+    def get_keyset_filter(fields, values, forward):
+        """`(f1, f2, ...) > (v1, v2, ...)` (or `<`) spelled out as `f1 > v1 OR (f1 = v1 AND f2 > v2) ...`."""
+        conditions = []
+        for index, field in enumerate(fields):
+            name = field.lstrip('-')
+            lookup = 'gt' if field.startswith('-') != forward else 'lt'
+            equal = {fields[position].lstrip('-'): values[position] for position in range(index)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': values[index]}))
+        return reduce(lambda left, right: left | right, conditions)
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, field.lstrip('-')) for field in self.get_keyset_fields()]
+        return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, model, cursor):
+        fields = self.get_keyset_fields()
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode() + b'=' * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                (model._meta.pk if field.lstrip('-') == 'pk' else model._meta.get_field(field.lstrip('-'))).to_python(value)
+                for field, value in zip(fields, values)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise Http404('Invalid page cursor.')
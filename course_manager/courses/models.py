@@ -1,4 +1,9 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Count, Sum, Value
+from django.db.models.functions import Coalesce
 
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import Group
@@ -10,6 +15,7 @@ from ckeditor_uploader.fields import RichTextUploadingField
 from django.utils import timezone
 
 from accounts import models as account_models
+from .storage import ContentAddressedStorage
 
 
 #####################################################################################################################
@@ -19,11 +25,52 @@ def student_answers_directory_path(instance, filename):
     return f"assignments/enroll_{instance.enroll.pk}/{filename}"
 
 
-class Course(models.Model):
+class TrackedFieldsMixin(models.Model):
+    """
+    Remembers the values of `tracked_fields` (attnames) as they were loaded from the database,
+    so signal handlers can tell what a save has actually changed.
+    """
+    tracked_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(TrackedFieldsMixin, cls).from_db(db, field_names, values)
+        instance.snapshot_tracked_fields()
+        return instance
+
+    def snapshot_tracked_fields(self):
+        self._loaded_values = {
+            field: self.__dict__[field] for field in self.tracked_fields if field in self.__dict__
+        }
+
+    def get_loaded_values(self):
+        """
+        Tracked values as stored in the database; deferred ones are fetched with a single query.
+        Instances that were never loaded from the database return an empty dict.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return {}
+        missing = [field for field in self.tracked_fields if field not in loaded]
+        if missing and self.pk is not None:
+            loaded.update(type(self)._base_manager.filter(pk=self.pk).values(*missing).first() or {})
+        return loaded
+
+    def save(self, *args, **kwargs):
+        super(TrackedFieldsMixin, self).save(*args, **kwargs)
+        self.snapshot_tracked_fields()
+
+
+class Course(TrackedFieldsMixin):
     base_title = models.CharField(max_length=100)
     description = models.TextField(null=True, blank=True)
     slug = models.SlugField(allow_unicode=True, unique=True)
 
+    tracked_fields = ('slug', )
+
     def save(self, *args, **kwargs):
         self.slug = slugify(self.base_title)
         super(Course, self).save(*args, **kwargs)
@@ -36,7 +83,7 @@ class Course(models.Model):
         return f"{self.base_title} Course"
 
 
-class CourseInstance(models.Model):
+class CourseInstance(TrackedFieldsMixin):
     course = models.ForeignKey(Course, related_name='instances', on_delete=models.CASCADE)
     slug = models.SlugField(allow_unicode=True, unique=True)
 
@@ -50,6 +97,8 @@ class CourseInstance(models.Model):
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
 
+    tracked_fields = ('course_id', )
+
     def save(self, *args, **kwargs):
         if not self.sub_title:
             self.sub_title = self.course.base_title
@@ -69,18 +118,57 @@ class CourseInstance(models.Model):
         return f"{self.sub_title}"
 
 
-class Enroll(models.Model):
+class EnrollQuerySet(models.QuerySet):
+
+    def add_grades(self, count, total):
+        """Shift the stored grade aggregates by a delta without reading the rows."""
+        if not count and not total:
+            return 0
+        return self.update(
+            graded_assignments_count=F('graded_assignments_count') + count,
+            grades_sum=F('grades_sum') + total,
+        )
+
+    def refresh_grade_aggregates(self):
+        """Recompute the stored grade aggregates from the personal assignments."""
+        graded = PersonalAssignment.objects.filter(
+            enroll=OuterRef('pk'),
+            is_completed=True,
+            grade__isnull=False,
+        ).order_by().values('enroll')
+        return self.update(
+            graded_assignments_count=Coalesce(
+                Subquery(graded.annotate(count=Count('pk')).values('count')), Value(0)
+            ),
+            grades_sum=Coalesce(
+                Subquery(graded.annotate(total=Sum('grade')).values('total')), Value(0)
+            ),
+        )
+
+
+class Enroll(TrackedFieldsMixin, models.Model):
     course_instance = models.ForeignKey(CourseInstance, related_name='enrolls', on_delete=models.CASCADE)
     student = models.ForeignKey('accounts.CustomUser', related_name='enrolls', on_delete=models.CASCADE)
     is_course_finished = models.BooleanField(default=False)
 
+    # Maintained by `courses.signals` from completed, graded personal assignments
+    graded_assignments_count = models.IntegerField(default=0, editable=False)
+    grades_sum = models.IntegerField(default=0, editable=False)
+
+    tracked_fields = ('course_instance_id', )
+
+    objects = EnrollQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course_instance', 'student'], name='unique_enroll'),
+        ]
+
     @property
     def average_mark(self):
-        marks = [m['grade'] for m in self.personal_assignments.filter(enroll=self).filter(is_completed=True).values('grade')]
-        try:
-            return round(float(sum(marks) / len(marks)), 2)
-        except ZeroDivisionError:
+        if not self.graded_assignments_count:
             return 0
+        return round(self.grades_sum / self.graded_assignments_count, 2)
 
     def save(self, *args, **kwargs):
         student_group = Group.objects.get(name='students')
@@ -101,8 +189,22 @@ class Assignment(models.Model):
         return f"Task: {self.title}"
 
 
-class CourseInstanceAssignment(Assignment):
+class CourseInstanceAssignment(TrackedFieldsMixin, Assignment):
     course_instance = models.ForeignKey(CourseInstance, related_name='course_assignments', on_delete=models.CASCADE)
+    max_answer_file_size = models.PositiveIntegerField(
+        'Max answer file size (MB)',
+        null=True,
+        blank=True,
+        help_text='Leave empty to use the site limit.',
+    )
+
+    tracked_fields = ('course_instance_id', )
+
+    def get_answer_file_size_limit(self):
+        """Largest answer file in bytes."""
+        if self.max_answer_file_size:
+            return self.max_answer_file_size * 1024 * 1024
+        return settings.ANSWER_FILE_MAX_SIZE
 
     def get_absolute_url(self):
         return reverse(
@@ -116,13 +218,43 @@ class CourseInstanceAssignment(Assignment):
         return f"Course Task: {self.title}"
 
 
-class PersonalAssignment(models.Model):
+class PersonalAssignmentQuerySet(models.QuerySet):
+
+    def create_missing(self, assignment_ids, enroll_ids):
+        """
+        Create personal assignments for every (course assignment, enroll) pair that does not have one yet,
+        with a single bulk insert. Returns the number of created rows.
+        """
+        assignment_ids = set(assignment_ids)
+        enroll_ids = set(enroll_ids)
+        if not assignment_ids or not enroll_ids:
+            return 0
+
+        # Look up existing pairs through the narrower side of the fan-out
+        if len(assignment_ids) <= len(enroll_ids):
+            existing = self.filter(course_instance_assignment__in=assignment_ids)
+        else:
+            existing = self.filter(enroll__in=enroll_ids)
+        existing = set(existing.values_list('course_instance_assignment_id', 'enroll_id'))
+
+        new_assignments = [
+            self.model(course_instance_assignment_id=assignment_id, enroll_id=enroll_id)
+            for assignment_id in sorted(assignment_ids)
+            for enroll_id in sorted(enroll_ids)
+            if (assignment_id, enroll_id) not in existing
+        ]
+        self.bulk_create(new_assignments, ignore_conflicts=True)
+        return len(new_assignments)
+
+
+class PersonalAssignment(TrackedFieldsMixin, models.Model):
     course_instance_assignment = models.ForeignKey(CourseInstanceAssignment,
                                                    related_name='personal_assignments',
                                                    on_delete=models.CASCADE)
     enroll = models.ForeignKey(Enroll, related_name='personal_assignments', on_delete=models.CASCADE)
     answer_field = models.TextField(null=True, blank=True)
-    answer_file = models.FileField(null=True, blank=True, upload_to=student_answers_directory_path)
+    answer_file = models.FileField(null=True, blank=True, upload_to=student_answers_directory_path,
+                                   storage=ContentAddressedStorage())
     is_completed = models.BooleanField(default=False)
     grade = models.SmallIntegerField(
         blank=True,
@@ -135,6 +267,29 @@ class PersonalAssignment(models.Model):
     )
     completion_date = models.DateTimeField(null=True, blank=True)
 
+    tracked_fields = ('enroll_id', 'grade', 'is_completed')
+
+    objects = PersonalAssignmentQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['course_instance_assignment', 'enroll'],
+                name='unique_personal_assignment',
+            ),
+        ]
+
+    @staticmethod
+    def get_grade_contribution(grade, is_completed):
+        """(count, sum) that an assignment adds to its enroll grade aggregates."""
+        if is_completed and grade is not None:
+            return 1, int(grade)
+        return 0, 0
+
+    @property
+    def grade_contribution(self):
+        return self.get_grade_contribution(self.grade, self.is_completed)
+
     @property
     def is_deadline_missed(self):
         if self.course_instance_assignment.start_date and self.course_instance_assignment.end_date:
@@ -155,10 +310,53 @@ class PersonalAssignment(models.Model):
                            'pk': self.pk
                        })
 
+    def get_answer_file_url(self):
+        return reverse('courses:answer-file', kwargs={'pk': self.pk})
+
     def __str__(self):
         return f"Personal Task: {self.course_instance_assignment.title}"
 
 
+class AnswerUpload(models.Model):
+    """Resumable, chunked upload of a personal assignment answer file, see `courses.uploads`."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    personal_assignment = models.ForeignKey(PersonalAssignment,
+                                            related_name='answer_uploads',
+                                            on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # Bytes received so far, the next chunk has to start here
+    offset = models.PositiveBigIntegerField(default=0)
+    # SHA-256 announced by the client, checked once the last chunk is written
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Storage name of the received bytes, in the directory of the final file so the rename stays atomic
+    partial_name = models.CharField(max_length=255, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload: {self.filename} ({self.offset}/{self.size})"
+
+
+class StoredBlob(models.Model):
+    """File content stored once by `ContentAddressedStorage`, whatever the number of names linked to it."""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Blob: {self.sha256} ({self.ref_count} links)"
+
+
+class BlobLink(models.Model):
+    """Logical storage name (e.g. `assignments/enroll_<pk>/<filename>`) of a blob."""
+    name = models.CharField(max_length=255, unique=True)
+    blob = models.ForeignKey(StoredBlob, related_name='links', on_delete=models.PROTECT)
+
+    def __str__(self):
+        return f"{self.name} -> {self.blob_id}"
+
+
 class Certificate(models.Model):
     enroll = models.OneToOneField(Enroll, related_name='certificate', on_delete=models.CASCADE)
 
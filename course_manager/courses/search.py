@@ -0,0 +1,216 @@
+import re
+from collections import namedtuple
+
+from django.db import connections, DEFAULT_DB_ALIAS, OperationalError
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from . import models as course_models
+
+
+#####################################################################################################################
+
+
+SEARCH_TABLE = 'courses_search'
+
+# Column weights for bm25(): titles matter more than descriptions
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+SUB_TITLES_WEIGHT = 5.0
+
+# Control characters can not come from a form field, so they are safe highlight markers until escaping
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+# (alias, database name) pairs known to have the index
+_indexed_databases = set()
+
+SearchResult = namedtuple('SearchResult', ('course', 'title', 'snippet', 'sub_titles'))
+
+
+# One document per course. Instances only contribute their sub titles, so they rewrite the `sub_titles` column
+# of their course. Triggers keep the index in sync with bulk inserts and raw updates too.
+SEARCH_INDEX_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        base_title, description, sub_titles, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_course_insert AFTER INSERT ON courses_course BEGIN
+        INSERT INTO {SEARCH_TABLE} (rowid, base_title, description, sub_titles)
+        VALUES (new.id, new.base_title, coalesce(new.description, ''), '');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_course_update AFTER UPDATE ON courses_course BEGIN
+        UPDATE {SEARCH_TABLE} SET base_title = new.base_title, description = coalesce(new.description, '')
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_course_delete AFTER DELETE ON courses_course BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_instance_insert AFTER INSERT ON courses_courseinstance BEGIN
+        UPDATE {SEARCH_TABLE} SET sub_titles = (
+            SELECT coalesce(group_concat(sub_title, ' '), '') FROM courses_courseinstance WHERE course_id = new.course_id
+        ) WHERE rowid = new.course_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_instance_update AFTER UPDATE ON courses_courseinstance BEGIN
+        UPDATE {SEARCH_TABLE} SET sub_titles = (
+            SELECT coalesce(group_concat(sub_title, ' '), '') FROM courses_courseinstance WHERE course_id = old.course_id
+        ) WHERE rowid = old.course_id;
+        UPDATE {SEARCH_TABLE} SET sub_titles = (
+            SELECT coalesce(group_concat(sub_title, ' '), '') FROM courses_courseinstance WHERE course_id = new.course_id
+        ) WHERE rowid = new.course_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_instance_delete AFTER DELETE ON courses_courseinstance BEGIN
+        UPDATE {SEARCH_TABLE} SET sub_titles = (
+            SELECT coalesce(group_concat(sub_title, ' '), '') FROM courses_courseinstance WHERE course_id = old.course_id
+        ) WHERE rowid = old.course_id;
+    END
+    """,
+)
+
+REBUILD_SQL = (
+    f"DELETE FROM {SEARCH_TABLE}",
+    f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, base_title, description, sub_titles)
+    SELECT course.id, course.base_title, coalesce(course.description, ''), coalesce((
+        SELECT group_concat(sub_title, ' ') FROM courses_courseinstance WHERE course_id = course.id
+    ), '')
+    FROM courses_course AS course
+    """,
+    f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')",
+)
+
+
+def is_search_index_supported(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite'
+
+
+def _get_database_key(using):
+    return using, str(connections[using].settings_dict['NAME'])
+
+
+def has_search_index(using=DEFAULT_DB_ALIAS):
+    # Once found, the index is remembered for the process instead of being looked up on every search
+    if _get_database_key(using) in _indexed_databases:
+        return True
+    if is_search_index_supported(using) and SEARCH_TABLE in connections[using].introspection.table_names():
+        _indexed_databases.add(_get_database_key(using))
+        return True
+    return False
+
+
+def create_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Create the FTS5 table and its triggers if they are missing, and fill a newly created table.
+    Returns False when the database can not host the index (not SQLite, or SQLite built without FTS5).
+    """
+    if not is_search_index_supported(using):
+        return False
+    created = not has_search_index(using)
+    try:
+        with connections[using].cursor() as cursor:
+            for statement in SEARCH_INDEX_SQL:
+                cursor.execute(statement)
+    except OperationalError:
+        return False
+    if created:
+        rebuild_search_index(using)
+    return True
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """Refill the index from the course tables; returns the number of indexed courses."""
+    with connections[using].cursor() as cursor:
+        for statement in REBUILD_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def build_match_expression(terms):
+    """Every term is quoted, so FTS5 operators typed by users are searched literally; the last one is a prefix."""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def render_highlight(text):
+    return mark_safe(escape(text).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>'))
+
+
+def search_courses(query, limit=30, using=DEFAULT_DB_ALIAS):
+    """
+    Courses matching all terms of `query`, best first, with highlighted title, description snippet and
+    instance sub titles. Databases without the index fall back to an unranked `icontains` search.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return []
+    if not has_search_index(using):
+        return _search_courses_without_index(terms, limit)
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid,
+                   highlight({SEARCH_TABLE}, 0, %s, %s),
+                   snippet({SEARCH_TABLE}, 1, %s, %s, '…', 24),
+                   highlight({SEARCH_TABLE}, 2, %s, %s)
+            FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH %s
+            ORDER BY bm25({SEARCH_TABLE}, %s, %s, %s)
+            LIMIT %s
+            """,
+            [MATCH_START, MATCH_END] * 3 + [
+                build_match_expression(terms), TITLE_WEIGHT, DESCRIPTION_WEIGHT, SUB_TITLES_WEIGHT, limit,
+            ],
+        )
+        rows = cursor.fetchall()
+
+    courses = course_models.Course.objects.in_bulk([row[0] for row in rows])
+    return [
+        SearchResult(courses[pk], render_highlight(title), render_highlight(snippet), render_highlight(sub_titles))
+        for pk, title, snippet, sub_titles in rows
+        if pk in courses
+    ]
+
+
+def _search_courses_without_index(terms, limit):
+    courses = course_models.Course.objects.all()
+    for term in terms:
+        courses = courses.filter(
+            Q(base_title__icontains=term) | Q(description__icontains=term) | Q(instances__sub_title__icontains=term)
+        )
+    return [
+        SearchResult(course, escape(course.base_title), escape((course.description or '')[:160]), '')
+        for course in courses.distinct().order_by('base_title')[:limit]
+    ]
+
+
+def get_search_filter(query, using=DEFAULT_DB_ALIAS):
+    """
+    Filter on the ids of all courses matching `query`, as a subquery of the index (admin search).
+    None without terms or without the index.
+    """
+    terms = get_terms(query)
+    if not terms or not has_search_index(using):
+        return None
+    return Q(pk__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s",
+                           [build_match_expression(terms)]))
@@ -1,49 +1,128 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import (post_save, )
+from django.db.models.signals import (post_save, pre_save, post_delete, post_migrate, )
 
 from . import models
+from . import search
+from . import cache as page_cache
 
 
 #######################################################################################################################
 
 
+def course_instance_changed(instance):
+    stored = instance.get_loaded_values()
+    return stored.get('course_instance_id', instance.course_instance_id) != instance.course_instance_id
+
+
+@receiver(pre_save, sender=models.Course)
+@receiver(pre_save, sender=models.CourseInstance)
+@receiver(pre_save, sender=models.Enroll)
+@receiver(pre_save, sender=models.CourseInstanceAssignment)
+@receiver(pre_save, sender=models.PersonalAssignment)
+def load_tracked_fields(sender, instance: models.TrackedFieldsMixin, raw: bool, **kwargs):
+    # Deferred tracked fields have to be read before the row is overwritten
+    if not raw and not instance._state.adding:
+        instance.get_loaded_values()
+
+
 @receiver(post_save, sender=models.Enroll)
 def create_enroll(sender, instance: models.Enroll, created, **kwargs):
     if created:
-        for assignment in instance.course_instance.course_assignments.all():
-            models.PersonalAssignment.objects.get_or_create(
-                course_instance_assignment=assignment,
-                enroll=instance,
-            )
+        instance.personal_assignments_created = models.PersonalAssignment.objects.create_missing(
+            assignment_ids=instance.course_instance.course_assignments.values_list('pk', flat=True),
+            enroll_ids=[instance.pk],
+        )
 
 
 @receiver(post_save, sender=models.Enroll)
-def update_assignments(sender, instance: models.Enroll, created: bool, **kwargs):
-    if not created:
-        for assignment in instance.course_instance.course_assignments.all():
-            assignment.save()
+def update_assignments(sender, instance: models.Enroll, created: bool, raw: bool, **kwargs):
+    # Personal assignments only depend on the course instance of the enroll. The existing ones keep the work
+    # and grades of the student, a move only adds those of the new instance.
+    if created or raw or not course_instance_changed(instance):
+        return
+    models.PersonalAssignment.objects.create_missing(
+        assignment_ids=instance.course_instance.course_assignments.values_list('pk', flat=True),
+        enroll_ids=[instance.pk],
+    )
 
 
 @receiver(post_save, sender=models.CourseInstanceAssignment)
 def add_new_course_assignment(sender, instance: models.CourseInstanceAssignment, created: bool, **kwargs):
     if created:
-        enrolls = instance.course_instance.enrolls.all()
-        if enrolls:
-            for enroll in enrolls:
-                models.PersonalAssignment.objects.get_or_create(
-                    course_instance_assignment=instance,
-                    enroll=enroll,
-                )
+        instance.personal_assignments_created = models.PersonalAssignment.objects.create_missing(
+            assignment_ids=[instance.pk],
+            enroll_ids=instance.course_instance.enrolls.values_list('pk', flat=True),
+        )
 
 
 @receiver(post_save, sender=models.CourseInstanceAssignment)
-def update_course_assignment(sender, instance: models.CourseInstanceAssignment, created: bool, **kwargs):
-    if not created:
-        enrolls = instance.course_instance.enrolls.all()
-        if enrolls:
-            for enroll in enrolls:
-                for personal_assignment in enroll.personal_assignments.all():
-                    personal_assignment.save()
+def update_course_assignment(sender, instance: models.CourseInstanceAssignment, created: bool, raw: bool, **kwargs):
+    # Content and date edits are read through the foreign key, only a move to another instance propagates
+    if created or raw or not course_instance_changed(instance):
+        return
+    models.PersonalAssignment.objects.create_missing(
+        assignment_ids=[instance.pk],
+        enroll_ids=instance.course_instance.enrolls.values_list('pk', flat=True),
+    )
+
+
+@receiver(post_save, sender=models.Course)
+def invalidate_course_pages(sender, instance: models.Course, **kwargs):
+    # A renamed course also changes its slug, pages under the old one have to go as well
+    page_cache.invalidate_course(instance.get_loaded_values().get('slug'), instance.slug, catalog=True)
+
+
+@receiver(post_delete, sender=models.Course)
+def invalidate_deleted_course_pages(sender, instance: models.Course, **kwargs):
+    page_cache.invalidate_course(instance.slug, catalog=True)
+
+
+@receiver(post_save, sender=models.CourseInstance)
+@receiver(post_delete, sender=models.CourseInstance)
+def invalidate_course_instance_pages(sender, instance: models.CourseInstance, **kwargs):
+    course_ids = {instance.get_loaded_values().get('course_id', instance.course_id), instance.course_id}
+    page_cache.invalidate_course(
+        *models.Course.objects.filter(pk__in=course_ids).values_list('slug', flat=True)
+    )
+
+
+@receiver(post_save, sender=models.PersonalAssignment)
+def update_enroll_grades(sender, instance: models.PersonalAssignment, raw: bool, **kwargs):
+    if raw:
+        return
+    stored = instance.get_loaded_values()
+    old_count, old_total = models.PersonalAssignment.get_grade_contribution(
+        stored.get('grade'), stored.get('is_completed', False),
+    )
+    new_count, new_total = instance.grade_contribution
+    old_enroll_id = stored.get('enroll_id', instance.enroll_id)
+
+    if old_enroll_id == instance.enroll_id:
+        models.Enroll.objects.filter(pk=instance.enroll_id).add_grades(new_count - old_count, new_total - old_total)
+    else:
+        models.Enroll.objects.filter(pk=old_enroll_id).add_grades(-old_count, -old_total)
+        models.Enroll.objects.filter(pk=instance.enroll_id).add_grades(new_count, new_total)
+
+
+@receiver(post_delete, sender=models.PersonalAssignment)
+def remove_enroll_grades(sender, instance: models.PersonalAssignment, **kwargs):
+    stored = getattr(instance, '_loaded_values', {})
+    count, total = models.PersonalAssignment.get_grade_contribution(
+        stored.get('grade', instance.grade), stored.get('is_completed', instance.is_completed),
+    )
+    models.Enroll.objects.filter(pk=stored.get('enroll_id', instance.enroll_id)).add_grades(-count, -total)
+
 
+@receiver(post_delete, sender=models.AnswerUpload)
+def delete_partial_upload(sender, instance: models.AnswerUpload, **kwargs):
+    # Completed uploads have already been renamed, deleting the missing part then does nothing
+    transaction.on_commit(lambda: default_storage.delete(instance.partial_name))
 
 
+@receiver(post_migrate)
+def create_search_index(sender, app_config, using, **kwargs):
+    # The FTS5 table is not a model; table rebuilds by schema changes drop its triggers, so they are re-created here
+    if app_config.label == 'courses':
+        search.create_search_index(using)
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+
+#####################################################################################################################
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that keeps every distinct content once, as `<blob_dir>/<aa>/<bb>/<sha256>`.
+    Saved names stay logical (`assignments/enroll_<pk>/<filename>`) and are linked to their blob by a
+    `BlobLink` row; `StoredBlob.ref_count` counts the links, so deleting a name (e.g. by django_cleanup)
+    only removes the blob once nothing refers to it anymore.
+
+    Names saved before this storage was used have no link and are read from their own path.
+    Blob and link rows are changed in one transaction with the blob file, which serializes concurrent
+    saves and deletes of the same content.
+    """
+
+    def __init__(self, blob_dir='blobs', **kwargs):
+        super(ContentAddressedStorage, self).__init__(**kwargs)
+        self.blob_dir = blob_dir
+
+    def _get_blob_model(self):
+        return apps.get_model('courses', 'StoredBlob')
+
+    def _get_link_model(self):
+        return apps.get_model('courses', 'BlobLink')
+
+    def get_blob_name(self, sha256):
+        return posixpath.join(self.blob_dir, sha256[:2], sha256[2:4], sha256)
+
+    def get_blob_id(self, name):
+        """SHA-256 of the blob linked to `name`, None for legacy names."""
+        return self._get_link_model().objects.filter(name=name).values_list('blob_id', flat=True).first()
+
+    def _legacy_path(self, name):
+        return super(ContentAddressedStorage, self).path(name)
+
+    def _blob_path(self, sha256):
+        return super(ContentAddressedStorage, self).path(self.get_blob_name(sha256))
+
+    def path(self, name):
+        sha256 = self.get_blob_id(name)
+        return self._blob_path(sha256) if sha256 else self._legacy_path(name)
+
+    def url(self, name):
+        sha256 = self.get_blob_id(name)
+        return super(ContentAddressedStorage, self).url(self.get_blob_name(sha256) if sha256 else name)
+
+    def exists(self, name):
+        return self._get_link_model().objects.filter(name=name).exists() or os.path.exists(self._legacy_path(name))
+
+    @staticmethod
+    def hash_content(content):
+        hasher = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            hasher.update(chunk)
+            size += len(chunk)
+        return hasher.hexdigest(), size
+
+    def _link(self, name, sha256, size, place_blob):
+        """Links `name` to the blob; `place_blob(path)` is only called when the blob file does not exist yet."""
+        with transaction.atomic():
+            blob_model = self._get_blob_model()
+            blob_model.objects.select_for_update().get_or_create(sha256=sha256, defaults={'size': size})
+            blob_model.objects.filter(pk=sha256).update(ref_count=F('ref_count') + 1)
+            self._get_link_model().objects.create(name=name, blob_id=sha256)
+
+            blob_path = self._blob_path(sha256)
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                place_blob(blob_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(blob_path, self.file_permissions_mode)
+        return name
+
+    def _save(self, name, content):
+        # Hashing only reads the upload; a duplicate is linked without writing anything
+        sha256, size = self.hash_content(content)
+
+        def place_blob(blob_path):
+            if hasattr(content, 'temporary_file_path'):
+                file_move_safe(content.temporary_file_path(), blob_path)
+                return
+            descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+            try:
+                with os.fdopen(descriptor, 'wb') as blob_file:
+                    for chunk in content.chunks():
+                        blob_file.write(chunk)
+                os.replace(temp_path, blob_path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+
+        return self._link(name, sha256, size, place_blob)
+
+    def adopt(self, name, path, sha256):
+        """
+        Saves the file at `path`, whose SHA-256 is already known, as `name`. The file is renamed into
+        the blob store, or removed when the blob exists; it has to be on the same file system.
+        """
+        name = self._link(name, sha256, os.path.getsize(path), lambda blob_path: os.replace(path, blob_path))
+        if os.path.exists(path):
+            os.remove(path)
+        return name
+
+    def absorb(self, name):
+        """Moves the legacy file `name` into the blob store; returns False when there is nothing to move."""
+        path = self._legacy_path(name)
+        if self.get_blob_id(name) or not os.path.isfile(path):
+            return False
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as legacy_file:
+            for block in iter(lambda: legacy_file.read(64 * 1024), b''):
+                hasher.update(block)
+        self.adopt(name, path, hasher.hexdigest())
+        return True
+
+    def delete(self, name):
+        link_model = self._get_link_model()
+        with transaction.atomic():
+            link = link_model.objects.select_for_update().filter(name=name).first()
+            if link is None:
+                return super(ContentAddressedStorage, self).delete(name)
+
+            link.delete()
+            blob_model = self._get_blob_model()
+            blob_model.objects.filter(pk=link.blob_id).update(ref_count=F('ref_count') - 1)
+            if blob_model.objects.filter(pk=link.blob_id, ref_count=0).delete()[0]:
+                try:
+                    os.remove(self._blob_path(link.blob_id))
+                except FileNotFoundError:
+                    pass
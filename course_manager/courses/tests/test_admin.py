@@ -0,0 +1,97 @@
+import datetime
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser, Teacher
+from courses.models import (Course, CourseInstance, CourseInstanceAssignment, Enroll, PersonalAssignment,
+                            Certificate)
+
+
+######################################################################################################################
+
+
+class AdminChangelistQueriesTest(TestCase):
+    """Changelists must not run a query per row or per filter choice."""
+
+    changelists = ('course', 'courseinstance', 'enroll', 'courseinstanceassignment', 'personalassignment',
+                   'certificate')
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+        CustomUser.objects.create_superuser(email='admin@gmail.com', username='admin', password='romanroman1')
+        cls.add_course(0)
+
+    @classmethod
+    def add_course(cls, number):
+        course = Course.objects.create(base_title=f'Course {number}', description='Description')
+        course_instance = CourseInstance.objects.create(course=course, sub_title=f'Course {number} 2021', min_mark=60)
+        CourseInstanceAssignment.objects.create(
+            course_instance=course_instance,
+            title=f'Task {number}',
+            content='Content',
+            start_date=timezone.now(),
+            end_date=timezone.now() + datetime.timedelta(days=5),
+        )
+        teacher_user = CustomUser.objects.create_user(email=f'teacher{number}@gmail.com', username=f'teacher{number}')
+        Teacher.objects.create(user=teacher_user).supervised_courses.add(course_instance)
+
+        for index in range(2):
+            student = CustomUser.objects.create_user(
+                email=f'student{number}-{index}@gmail.com',
+                username=f'student{number}-{index}',
+            )
+            enroll = Enroll.objects.create(course_instance=course_instance, student=student)
+            Certificate.objects.create(enroll=enroll)
+        PersonalAssignment.objects.filter(enroll__course_instance=course_instance).update(grade=80, is_completed=True)
+        Enroll.objects.filter(course_instance=course_instance).refresh_grade_aggregates()
+
+    def count_queries(self, model_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:courses_{model_name}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_changelists_run_constant_queries(self):
+        self.client.login(email='admin@gmail.com', password='romanroman1')
+        small = {model_name: self.count_queries(model_name) for model_name in self.changelists}
+
+        for number in range(1, 6):
+            self.add_course(number)
+        for model_name in self.changelists:
+            with self.subTest(changelist=model_name):
+                self.assertEqual(self.count_queries(model_name), small[model_name])
+
+    def test_annotated_columns(self):
+        self.client.login(email='admin@gmail.com', password='romanroman1')
+        response = self.client.get(reverse('admin:courses_enroll_changelist'), {'o': '3'})
+        self.assertEqual(response.context['cl'].result_list[0].average_mark, 80)
+
+        response = self.client.get(reverse('admin:courses_courseinstance_changelist'))
+        self.assertEqual(response.context['cl'].result_list[0]._enrolls_count, 2)
+
+    def test_change_form_teachers(self):
+        self.client.login(email='admin@gmail.com', password='romanroman1')
+        course_instance = CourseInstance.objects.get()
+        url = reverse('admin:courses_courseinstance_change', args=(course_instance.pk, ))
+        # Warms up the content type cache
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(url)
+
+        for number in range(1, 4):
+            user = CustomUser.objects.create_user(email=f'extra{number}@gmail.com', username=f'extra{number}')
+            Teacher.objects.create(user=user).supervised_courses.add(course_instance)
+        with CaptureQueriesContext(connection) as several:
+            response = self.client.get(url)
+
+        self.assertEqual(len(several.captured_queries), len(single.captured_queries))
+        for teacher in Teacher.objects.all():
+            self.assertContains(response, reverse('admin:accounts_teacher_change', args=(teacher.pk, )))
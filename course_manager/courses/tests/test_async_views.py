@@ -0,0 +1,149 @@
+import asyncio
+import datetime
+import threading
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase, TransactionTestCase, AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser, Teacher
+from courses.models import Course, CourseInstance, CourseInstanceAssignment, Enroll
+from courses import views
+
+
+######################################################################################################################
+
+
+def create_course(cls):
+    for name in ('students', 'teachers', 'managers'):
+        Group.objects.create(name=name)
+    cls.student = CustomUser.objects.create_user(email='student@gmail.com', username='student',
+                                                 password='romanroman1')
+    teacher_user = CustomUser.objects.create_user(email='teacher@gmail.com', username='teacher',
+                                                  password='romanroman1')
+    teacher_user.groups.add(Group.objects.get(name='teachers'))
+
+    course = Course.objects.create(base_title='Python', description='Python course')
+    cls.course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+    Teacher.objects.create(user=teacher_user).supervised_courses.add(cls.course_instance)
+    cls.course_assignment = CourseInstanceAssignment.objects.create(
+        course_instance=cls.course_instance,
+        title='Task 1',
+        content='Content',
+        start_date=timezone.now(),
+        end_date=timezone.now() + datetime.timedelta(days=5),
+    )
+    cls.enroll = Enroll.objects.create(course_instance=cls.course_instance, student=cls.student)
+    cls.personal_assignment = cls.enroll.personal_assignments.get()
+    cls.instance_kwargs = {'course_slug': course.slug, 'instance_slug': cls.course_instance.slug}
+
+
+# The test data is only visible on the connection of the test thread
+@override_settings(ASYNC_VIEW_THREADS=0)
+class AsyncViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_course(cls)
+
+    def get_routes(self):
+        return (
+            ('student', 'course-instance-detail', self.instance_kwargs),
+            ('student', 'user-courses', None),
+            ('student', 'personal-assignment', dict(self.instance_kwargs, pk=self.personal_assignment.pk)),
+            ('teacher', 'course-instance-teacher-detail', self.instance_kwargs),
+            ('teacher', 'gradebook-teacher', self.instance_kwargs),
+            ('teacher', 'enroll-teacher-detail', dict(self.instance_kwargs, enroll_pk=self.enroll.pk)),
+            ('teacher', 'personal-assignment-teacher-detail', dict(
+                self.instance_kwargs, enroll_pk=self.enroll.pk, assignment_pk=self.personal_assignment.pk,
+            )),
+            ('teacher', 'course-assignment-teacher-detail', dict(
+                self.instance_kwargs, assignment_pk=self.course_assignment.pk,
+            )),
+        )
+
+    def test_async_pages_match_sync_pages(self):
+        for role, name, kwargs in self.get_routes():
+            with self.subTest(route=name):
+                self.client.login(email=f'{role}@gmail.com', password='romanroman1')
+                sync_response = self.client.get(reverse(f'courses:{name}', kwargs=kwargs))
+                with CaptureQueriesContext(connection) as sync_queries:
+                    self.client.get(reverse(f'courses:{name}', kwargs=kwargs))
+                with CaptureQueriesContext(connection) as async_queries:
+                    async_response = self.client.get(reverse(f'courses-async:{name}', kwargs=kwargs))
+
+                self.assertEqual(async_response.status_code, 200)
+                self.assertEqual(async_response.templates[0].name, sync_response.templates[0].name)
+                self.assertEqual(len(async_queries.captured_queries), len(sync_queries.captured_queries))
+
+    def test_permissions_are_checked(self):
+        url = reverse('courses-async:gradebook-teacher', kwargs=self.instance_kwargs)
+        self.assertRedirects(self.client.get(url), f"{reverse('accounts:login')}?next={url}")
+
+        self.client.login(email='student@gmail.com', password='romanroman1')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_answer_is_submitted_from_the_async_page(self):
+        self.client.login(email='student@gmail.com', password='romanroman1')
+        kwargs = dict(self.instance_kwargs, pk=self.personal_assignment.pk)
+        response = self.client.post(reverse('courses-async:personal-assignment', kwargs=kwargs),
+                                    data={'answer_field': 'My answer'})
+
+        self.assertRedirects(response, reverse('courses:personal-assignment', kwargs=kwargs))
+        self.personal_assignment.refresh_from_db()
+        self.assertEqual(self.personal_assignment.answer_field, 'My answer')
+
+    def test_grade_is_submitted_from_the_async_page(self):
+        self.client.login(email='teacher@gmail.com', password='romanroman1')
+        response = self.client.post(reverse('courses-async:personal-assignment-teacher-detail', kwargs=dict(
+            self.instance_kwargs, enroll_pk=self.enroll.pk, assignment_pk=self.personal_assignment.pk,
+        )), data={'grade': 80, 'is_completed': 'on'})
+
+        self.assertRedirects(response, reverse('courses:enroll-teacher-detail', kwargs=dict(
+            self.instance_kwargs, enroll_pk=self.enroll.pk,
+        )))
+        self.personal_assignment.refresh_from_db()
+        self.assertEqual((self.personal_assignment.grade, self.personal_assignment.is_completed), (80, True))
+
+    def test_read_only_pages_refuse_posts(self):
+        self.client.login(email='student@gmail.com', password='romanroman1')
+        response = self.client.post(reverse('courses-async:course-instance-detail', kwargs=self.instance_kwargs))
+        self.assertEqual(response.status_code, 405)
+
+
+@override_settings(ASYNC_VIEW_THREADS=2)
+class AsyncViewsPoolTest(TransactionTestCase):
+
+    def setUp(self):
+        create_course(self)
+
+    def test_concurrent_requests_run_on_the_pool(self):
+        threads = set()
+        original_get = views.UserCoursesInstancesList.get
+
+        def get(view, request, *args, **kwargs):
+            threads.add(threading.current_thread().name)
+            return original_get(view, request, *args, **kwargs)
+
+        self.client.login(email='student@gmail.com', password='romanroman1')
+        client = AsyncClient()
+        client.cookies = self.client.cookies
+
+        async def fetch_all():
+            return await asyncio.gather(*(client.get(reverse('courses-async:user-courses')) for _ in range(6)))
+
+        views.UserCoursesInstancesList.get = get
+        try:
+            responses = async_to_sync(fetch_all)()
+        finally:
+            views.UserCoursesInstancesList.get = original_get
+
+        for response in responses:
+            self.assertContains(response, 'Python 2021')
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('course-views') for name in threads))
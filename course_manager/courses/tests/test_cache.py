@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.db import connection
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+
+from accounts.models import CustomUser
+from courses.models import Course, CourseInstance
+from courses import cache as page_cache
+
+
+######################################################################################################################
+
+
+class AnonymousPageCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='students')
+        cls.user = CustomUser.objects.create_user(email='user@gmail.com', username='user', password='romanroman1')
+        cls.course = Course.objects.create(base_title='Python', description='Programming for beginners.')
+        cls.course_instance = CourseInstance.objects.create(course=cls.course, sub_title='Python Spring', min_mark=60)
+        cls.other_course = Course.objects.create(base_title='Django', description='Web development.')
+
+    def setUp(self):
+        page_cache.get_cache().clear()
+        self.list_url = reverse('courses:courses-list')
+        self.detail_url = reverse('courses:course-detail', kwargs={'slug': self.course.slug})
+        self.instance_url = reverse('courses:course-instance-detail', kwargs={
+            'course_slug': self.course.slug,
+            'instance_slug': self.course_instance.slug,
+        })
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries.captured_queries)
+
+    def test_tests_do_not_share_the_configured_cache(self):
+        # Clearing it in `setUp` must not wipe the cache of a development server
+        self.assertIn('course_manager_test_caches_', page_cache.get_cache()._dir)
+
+    def test_repeated_anonymous_requests_are_served_from_cache(self):
+        for url in (self.list_url, self.detail_url, self.instance_url):
+            with self.subTest(url=url):
+                first, first_queries = self.get(url)
+                second, second_queries = self.get(url)
+                self.assertGreater(first_queries, 0)
+                self.assertEqual(second_queries, 0)
+                self.assertEqual(second.content, first.content)
+        self.assertEqual(page_cache.get_stats(), {'hits': 3, 'misses': 3})
+
+    def test_query_string_is_part_of_the_key(self):
+        self.get(self.list_url)
+        _, queries = self.get(self.list_url, ref='newsletter')
+        self.assertGreater(queries, 0)
+
+    def test_course_change_invalidates_its_pages_only(self):
+        other_url = reverse('courses:course-detail', kwargs={'slug': self.other_course.slug})
+        for url in (self.list_url, self.detail_url, other_url):
+            self.get(url)
+
+        course = Course.objects.get(pk=self.course.pk)
+        course.description = 'Updated description.'
+        course.save()
+
+        self.assertContains(self.get(self.list_url)[0], 'Updated description.')
+        self.assertContains(self.get(self.detail_url)[0], 'Updated description.')
+        self.assertEqual(self.get(other_url)[1], 0)
+
+    def test_renamed_course_drops_pages_of_old_slug(self):
+        self.get(self.detail_url)
+        course = Course.objects.get(pk=self.course.pk)
+        course.base_title = 'Python 3'
+        course.save()
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+    def test_course_instance_change_invalidates_course_pages(self):
+        self.get(self.list_url)
+        self.get(self.detail_url)
+        CourseInstance.objects.create(course=self.course, sub_title='Python Evening', min_mark=60)
+
+        self.assertContains(self.get(self.detail_url)[0], 'Python Evening')
+        # The catalog does not list instances
+        self.assertEqual(self.get(self.list_url)[1], 0)
+
+        self.get(self.instance_url)
+        CourseInstance.objects.filter(sub_title='Python Evening').get().delete()
+        self.assertNotContains(self.get(self.detail_url)[0], 'Python Evening')
+        self.assertGreater(self.get(self.instance_url)[1], 0)
+
+    def test_authenticated_users_bypass_cache(self):
+        self.get(self.instance_url)
+        self.client.login(email='user@gmail.com', password='romanroman1')
+        _, queries = self.get(self.instance_url)
+        self.assertGreater(queries, 0)
+        self.assertEqual(page_cache.get_stats(), {'hits': 0, 'misses': 1})
+
+    def test_stats_command(self):
+        self.get(self.list_url)
+        self.get(self.list_url)
+        out = StringIO()
+        call_command('page_cache_stats', '--reset', '--invalidate', stdout=out)
+        self.assertIn('Hits: 1, misses: 1, hit ratio: 50.0%', out.getvalue())
+        self.assertEqual(page_cache.get_stats(), {'hits': 0, 'misses': 0})
+        self.assertGreater(self.get(self.list_url)[1], 0)
@@ -0,0 +1,96 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.core.management import call_command
+
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser, Teacher, Manager
+from courses.models import (Course, CourseInstance, CourseInstanceAssignment, Enroll, PersonalAssignment)
+
+
+######################################################################################################################
+
+
+class RebuildGradeAggregatesCommandTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='students')
+
+        student = CustomUser.objects.create_user(
+            email='student1@gmail.com',
+            username='student1',
+            password='romanroman1',
+        )
+        course = Course.objects.create(base_title='Python', description='Python course')
+        course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        CourseInstanceAssignment.objects.create(
+            course_instance=course_instance,
+            title='Task 1',
+            content='Content',
+            start_date=timezone.now(),
+        )
+        Enroll.objects.create(course_instance=course_instance, student=student)
+        PersonalAssignment.objects.update(grade=64, is_completed=True)
+
+    def test_rebuild_all_enrolls(self):
+        out = StringIO()
+        call_command('rebuild_grade_aggregates', stdout=out)
+        enroll = Enroll.objects.get()
+        self.assertEqual(enroll.average_mark, 64)
+        self.assertIn('1 enroll(s)', out.getvalue())
+
+    def test_rebuild_single_course_instance(self):
+        out = StringIO()
+        call_command('rebuild_grade_aggregates', '--course-instance', 'unknown', stdout=out)
+        self.assertEqual(Enroll.objects.get().average_mark, 0)
+        self.assertIn('0 enroll(s)', out.getvalue())
+
+
+class SeedScaleCommandTest(TestCase):
+
+    options = {'courses': 2, 'instances': 2, 'assignments': 3, 'students': 12, 'enrolls': 2,
+               'teachers': 2, 'managers': 1, 'seed': 7}
+
+    def seed(self, **options):
+        out = StringIO()
+        call_command('seed_scale', stdout=out, **dict(self.options, **options))
+        return out.getvalue()
+
+    def get_grades(self):
+        return list(
+            PersonalAssignment.objects
+            .order_by('enroll__student__email', 'course_instance_assignment__title', 'enroll__course_instance__slug')
+            .values_list('enroll__student__profile__last_name', 'grade', 'is_completed', 'completion_date')
+        )
+
+    def test_creates_dataset(self):
+        output = self.seed()
+        self.assertIn('24 enroll(s) and 72 personal assignment(s)', output)
+
+        self.assertEqual(CourseInstanceAssignment.objects.count(), 12)
+        self.assertEqual(Teacher.objects.count(), 2)
+        self.assertEqual(Manager.objects.get().supervised_course_instances.count(), 4)
+        self.assertEqual(Group.objects.get(name='students').user_set.count(), 12)
+        self.assertEqual(CustomUser.objects.filter(profile__address__isnull=False).count(), 15)
+
+    def test_grade_aggregates_match_personal_assignments(self):
+        self.seed()
+        stored = list(Enroll.objects.order_by('pk').values_list('graded_assignments_count', 'grades_sum'))
+        Enroll.objects.refresh_grade_aggregates()
+        self.assertEqual(stored, list(Enroll.objects.order_by('pk').values_list('graded_assignments_count', 'grades_sum')))
+
+    def reseed(self, **options):
+        CustomUser.objects.all().delete()
+        Course.objects.all().delete()
+        self.seed(**options)
+        return self.get_grades()
+
+    def test_same_seed_same_data(self):
+        self.seed()
+        grades = self.get_grades()
+
+        self.assertEqual(self.reseed(), grades)
+        self.assertNotEqual(self.reseed(seed=8), grades)
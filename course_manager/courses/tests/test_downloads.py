@@ -0,0 +1,124 @@
+import datetime
+import shutil
+import tempfile
+
+from django.test import TestCase, RequestFactory, override_settings
+from django.core.files.base import ContentFile
+from django.http import Http404
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser, Teacher
+from course_manager.views import public_media
+from courses.models import Course, CourseInstance, CourseInstanceAssignment, Enroll
+
+
+######################################################################################################################
+
+
+class AnswerFileDownloadTest(TestCase):
+    content = b'0123456789abcdef'
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+
+        cls.student = CustomUser.objects.create_user(email='student1@gmail.com', username='student1',
+                                                     password='romanroman1')
+        cls.other_student = CustomUser.objects.create_user(email='student2@gmail.com', username='student2',
+                                                           password='romanroman1')
+        cls.teacher = CustomUser.objects.create_user(email='teacher1@gmail.com', username='teacher1',
+                                                     password='romanroman1')
+        Teacher.objects.create(user=cls.teacher)
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        CourseInstanceAssignment.objects.create(
+            course_instance=course_instance,
+            title='Task',
+            content='Content',
+            start_date=timezone.now(),
+            end_date=timezone.now() + datetime.timedelta(days=5),
+        )
+        cls.personal_assignment = Enroll.objects.create(
+            course_instance=course_instance, student=cls.student,
+        ).personal_assignments.get()
+        Enroll.objects.create(course_instance=course_instance, student=cls.other_student)
+        cls.url = reverse('courses:answer-file', kwargs={'pk': cls.personal_assignment.pk})
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE=None)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.personal_assignment.answer_file.save('solution.txt', ContentFile(self.content))
+        self.client.force_login(self.student)
+
+    def test_download(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Length'], '16')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="solution.txt"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_ranges(self):
+        for header, status, content_range, body in (
+                ('bytes=2-5', 206, 'bytes 2-5/16', b'2345'),
+                ('bytes=10-', 206, 'bytes 10-15/16', b'abcdef'),
+                ('bytes=-3', 206, 'bytes 13-15/16', b'def'),
+                ('bytes=12-99', 206, 'bytes 12-15/16', b'cdef'),
+                ('bytes=0-1,4-5', 200, None, self.content),
+                ('bytes=16-', 416, 'bytes */16', None)):
+            with self.subTest(range=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(response.get('Content-Range'), content_range)
+                if body is not None:
+                    self.assertEqual(b''.join(response.streaming_content), body)
+                    self.assertEqual(response['Content-Length'], str(len(body)))
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        # The file changed since the first part was downloaded, the whole new one is sent
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_access(self):
+        self.client.force_login(self.other_student)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_sendfile(self):
+        path = self.personal_assignment.answer_file.path
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual((response['X-Sendfile'], response.content), (path, b''))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="solution.txt"')
+
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.client.get(self.url)
+        self.assertRegex(response['X-Accel-Redirect'], r'^/protected-media/blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}$')
+
+    def test_protected_media_is_not_public(self):
+        request = RequestFactory().get('/media/')
+        for path in ('assignments/enroll_1/solution.txt', 'images/../blobs/aa/bb/cc'):
+            with self.subTest(path=path), self.assertRaises(Http404):
+                public_media(request, path)
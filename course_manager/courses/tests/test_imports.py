@@ -0,0 +1,133 @@
+import datetime
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser, Manager, Address
+from courses.imports import read_enrollment_csv, EnrollmentImport
+from courses.models import Course, CourseInstance, CourseInstanceAssignment, Enroll, PersonalAssignment
+
+
+######################################################################################################################
+
+
+class ReadEnrollmentCsvTest(TestCase):
+
+    def test_plain_rows(self):
+        rows, errors = read_enrollment_csv('ann@example.com,Ann,Smith\nbob@EXAMPLE.com\n\nann@example.com\nnot-an-email\n')
+
+        self.assertEqual([(row.line, row.email, row.first_name, row.last_name) for row in rows],
+                         [(1, 'ann@example.com', 'Ann', 'Smith'), (2, 'bob@example.com', '', '')])
+        self.assertEqual(errors, [(5, '"not-an-email" is not a valid email address.')])
+
+    def test_header_row(self):
+        rows, errors = read_enrollment_csv('Last Name,First Name,E-mail\nSmith,Ann,ann@example.com\n')
+
+        self.assertEqual(errors, [])
+        self.assertEqual([(row.email, row.first_name, row.last_name) for row in rows],
+                         [('ann@example.com', 'Ann', 'Smith')])
+
+
+class EnrollmentImportTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = Group.objects.create(name='students')
+        for name in ('teachers', 'managers'):
+            Group.objects.create(name=name)
+
+        manager_user = CustomUser.objects.create_user(email='manager1@gmail.com', username='manager1',
+                                                      password='romanroman1')
+        Manager.objects.create(user=manager_user)
+        manager_user.groups.add(Group.objects.get(name='managers'))
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        cls.course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        for number in range(2):
+            CourseInstanceAssignment.objects.create(
+                course_instance=cls.course_instance,
+                title=f'Task {number}',
+                content='Content',
+                start_date=timezone.now(),
+                end_date=timezone.now() + datetime.timedelta(days=5),
+            )
+
+        cls.enrolled = CustomUser.objects.create_user(email='enrolled@example.com', username='enrolled')
+        Enroll.objects.create(course_instance=cls.course_instance, student=cls.enrolled)
+        # An account without the students group, and one whose username the import would pick
+        cls.existing = CustomUser.objects.create_user(email='existing@example.com', username='existing')
+        CustomUser.objects.create_user(email='ann@other.org', username='ann')
+
+    def setUp(self):
+        self.client.login(email='manager1@gmail.com', password='romanroman1')
+        self.url = reverse('courses:course-instance-manager-enroll-import', kwargs={
+            'course_slug': self.course_instance.course.slug,
+            'instance_slug': self.course_instance.slug,
+        })
+
+    def get_csv(self):
+        return SimpleUploadedFile('students.csv', (
+            'email,first_name,last_name\n'
+            'ann@example.com,Ann,Smith\n'
+            'existing@example.com\n'
+            'enrolled@example.com\n'
+        ).encode())
+
+    def test_preview_does_not_write(self):
+        users = CustomUser.objects.count()
+        response = self.client.post(self.url, data={'csv_file': self.get_csv()})
+
+        self.assertEqual(response.status_code, 200)
+        preview = response.context['preview']
+        self.assertEqual([row.email for row in preview.new_users], ['ann@example.com'])
+        self.assertEqual([row.email for row in preview.already_enrolled], ['enrolled@example.com'])
+        self.assertEqual(len(preview.to_enroll), 2)
+        self.assertEqual(CustomUser.objects.count(), users)
+
+    def test_confirmed_import(self):
+        preview = self.client.post(self.url, data={'csv_file': self.get_csv()})
+        confirm_form = preview.context['confirm_form']
+        response = self.client.post(self.url, data={
+            'csv_content': confirm_form.initial['csv_content'],
+            'confirm': 'True',
+        })
+        self.assertRedirects(response, reverse('courses:course-instance-manager-detail', kwargs={
+            'course_slug': self.course_instance.course.slug,
+            'instance_slug': self.course_instance.slug,
+        }), fetch_redirect_response=False)
+
+        ann = CustomUser.objects.get(email='ann@example.com')
+        self.assertEqual(ann.username, 'ann2')
+        self.assertFalse(ann.has_usable_password())
+        self.assertEqual((ann.profile.first_name, ann.profile.last_name), ('Ann', 'Smith'))
+        self.assertTrue(Address.objects.filter(profile=ann.profile).exists())
+
+        for user in (ann, self.existing, self.enrolled):
+            self.assertTrue(self.students.user_set.filter(pk=user.pk).exists())
+            enroll = Enroll.objects.get(course_instance=self.course_instance, student=user)
+            self.assertEqual(enroll.personal_assignments.count(), 2)
+
+    def test_rows_with_errors_are_not_imported(self):
+        csv_file = SimpleUploadedFile('students.csv', b'ann@example.com\nwrong\n')
+        response = self.client.post(self.url, data={'csv_content': csv_file.read().decode(), 'confirm': 'True'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['row_errors'], [(2, '"wrong" is not a valid email address.')])
+        self.assertFalse(CustomUser.objects.filter(email='ann@example.com').exists())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def import_students(first, count):
+            rows, _ = read_enrollment_csv(''.join(f'student{number}@example.com\n'
+                                                  for number in range(first, first + count)))
+            with CaptureQueriesContext(connection) as queries:
+                EnrollmentImport(self.course_instance, rows).apply()
+            return len(queries.captured_queries)
+
+        self.assertEqual(import_students(0, 10), import_students(10, 40))
+        self.assertEqual(PersonalAssignment.objects.filter(enroll__student__email__startswith='student').count(), 100)
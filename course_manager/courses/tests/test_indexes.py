@@ -0,0 +1,81 @@
+from django.test import TestCase
+from django.db import connection
+
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from courses.models import (Course, CourseInstance, CourseInstanceAssignment, Enroll, PersonalAssignment)
+
+
+######################################################################################################################
+
+
+class LookupQueryPlanTest(TestCase):
+    """
+    The slug chain lookups of the course views must be resolved through indexes, never by scanning a table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='students')
+
+        cls.student = CustomUser.objects.create_user(
+            email='student1@gmail.com',
+            username='student1',
+            password='romanroman1',
+        )
+        course = Course.objects.create(base_title='Python', description='Python course')
+        cls.course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        cls.assignment = CourseInstanceAssignment.objects.create(
+            course_instance=cls.course_instance,
+            title='Task',
+            content='Content',
+            start_date=timezone.now(),
+        )
+        cls.enroll = Enroll.objects.create(course_instance=cls.course_instance, student=cls.student)
+        cls.personal_assignment = cls.enroll.personal_assignments.get()
+
+    def get_query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndexes(self, queryset):
+        plan = self.get_query_plan(queryset)
+        scans = [step for step in plan if step.upper().startswith('SCAN')]
+        self.assertFalse(scans, f'Table scan in query plan: {plan}')
+
+    def test_course_instance_by_slugs(self):
+        self.assertUsesIndexes(CourseInstance.objects.filter(
+            course__slug=self.course_instance.course.slug,
+            slug=self.course_instance.slug,
+        ))
+
+    def test_enroll_by_student(self):
+        self.assertUsesIndexes(Enroll.objects.filter(course_instance=self.course_instance, student=self.student))
+
+    def test_enroll_by_pk(self):
+        self.assertUsesIndexes(Enroll.objects.filter(course_instance=self.course_instance, pk=self.enroll.pk))
+
+    def test_course_assignment_by_pk(self):
+        self.assertUsesIndexes(CourseInstanceAssignment.objects.filter(
+            course_instance=self.course_instance,
+            pk=self.assignment.pk,
+        ))
+
+    def test_personal_assignment_by_pk(self):
+        self.assertUsesIndexes(PersonalAssignment.objects.filter(enroll=self.enroll, pk=self.personal_assignment.pk))
+
+    def test_personal_assignment_by_pair(self):
+        self.assertUsesIndexes(PersonalAssignment.objects.filter(
+            course_instance_assignment=self.assignment,
+            enroll=self.enroll,
+        ))
+
+    def test_enroll_personal_assignments(self):
+        self.assertUsesIndexes(self.enroll.personal_assignments.all())
+
+    def test_course_instance_enrolls(self):
+        self.assertUsesIndexes(self.course_instance.enrolls.all())
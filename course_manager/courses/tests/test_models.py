@@ -0,0 +1,157 @@
+from django.test import TestCase
+
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from courses.models import (Course, CourseInstance, CourseInstanceAssignment, Enroll, PersonalAssignment)
+
+
+######################################################################################################################
+
+
+class EnrollGradeAggregatesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='students')
+
+        student = CustomUser.objects.create_user(
+            email='student1@gmail.com',
+            username='student1',
+            password='romanroman1',
+        )
+        course = Course.objects.create(base_title='Python', description='Python course')
+        course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        for title in ('Task 1', 'Task 2', 'Task 3'):
+            CourseInstanceAssignment.objects.create(
+                course_instance=course_instance,
+                title=title,
+                content='Content',
+                start_date=timezone.now(),
+            )
+        Enroll.objects.create(course_instance=course_instance, student=student)
+
+    def grade(self, pk, grade, is_completed=True):
+        personal_assignment = PersonalAssignment.objects.get(pk=pk)
+        personal_assignment.grade = grade
+        personal_assignment.is_completed = is_completed
+        personal_assignment.save()
+
+    def get_enroll(self):
+        return Enroll.objects.get()
+
+    def test_average_mark_without_completed_assignments(self):
+        self.assertEqual(self.get_enroll().average_mark, 0)
+
+    def test_average_mark_counts_only_completed_assignments(self):
+        first, second, third = PersonalAssignment.objects.order_by('pk').values_list('pk', flat=True)
+        self.grade(first, 80)
+        self.grade(second, 91)
+        self.grade(third, 100, is_completed=False)
+
+        enroll = self.get_enroll()
+        self.assertEqual(enroll.graded_assignments_count, 2)
+        self.assertEqual(enroll.grades_sum, 171)
+        self.assertEqual(enroll.average_mark, 85.5)
+
+    def test_regrade_replaces_previous_grade(self):
+        pk = PersonalAssignment.objects.order_by('pk').values_list('pk', flat=True).first()
+        self.grade(pk, 40)
+        self.grade(pk, 70)
+        self.assertEqual(self.get_enroll().average_mark, 70)
+
+    def test_uncomplete_removes_grade(self):
+        pk = PersonalAssignment.objects.order_by('pk').values_list('pk', flat=True).first()
+        self.grade(pk, 40)
+        self.grade(pk, 40, is_completed=False)
+        enroll = self.get_enroll()
+        self.assertEqual(enroll.graded_assignments_count, 0)
+        self.assertEqual(enroll.grades_sum, 0)
+
+    def test_save_with_deferred_fields(self):
+        pk = PersonalAssignment.objects.order_by('pk').values_list('pk', flat=True).first()
+        self.grade(pk, 50)
+        personal_assignment = PersonalAssignment.objects.only('pk', 'enroll').get(pk=pk)
+        personal_assignment.grade = 90
+        personal_assignment.save()
+        self.assertEqual(self.get_enroll().average_mark, 90)
+
+    def test_delete_removes_grade(self):
+        first, second, _ = PersonalAssignment.objects.order_by('pk').values_list('pk', flat=True)
+        self.grade(first, 60)
+        self.grade(second, 100)
+        PersonalAssignment.objects.get(pk=second).delete()
+        self.assertEqual(self.get_enroll().average_mark, 60)
+
+    def test_average_mark_reads_no_queries(self):
+        enroll = self.get_enroll()
+        with self.assertNumQueries(0):
+            enroll.average_mark
+
+    def test_refresh_grade_aggregates_fixes_drift(self):
+        pk = PersonalAssignment.objects.order_by('pk').values_list('pk', flat=True).first()
+        self.grade(pk, 75)
+        Enroll.objects.update(graded_assignments_count=10, grades_sum=3)
+
+        Enroll.objects.all().refresh_grade_aggregates()
+        enroll = self.get_enroll()
+        self.assertEqual(enroll.graded_assignments_count, 1)
+        self.assertEqual(enroll.grades_sum, 75)
+
+
+class PersonalAssignmentFanOutTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='students')
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        cls.course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+
+    def create_student(self, number):
+        return CustomUser.objects.create_user(
+            email=f'student{number}@gmail.com',
+            username=f'student{number}',
+            password='romanroman1',
+        )
+
+    def create_assignment(self, title='Task'):
+        return CourseInstanceAssignment.objects.create(
+            course_instance=self.course_instance,
+            title=title,
+            content='Content',
+            start_date=timezone.now(),
+        )
+
+    def test_new_assignment_is_given_to_every_enroll(self):
+        for number in range(5):
+            Enroll.objects.create(course_instance=self.course_instance, student=self.create_student(number))
+
+        assignment = self.create_assignment()
+        self.assertEqual(assignment.personal_assignments_created, 5)
+        self.assertEqual(assignment.personal_assignments.count(), 5)
+
+    def test_new_enroll_gets_every_assignment(self):
+        for number in range(3):
+            self.create_assignment(f'Task {number}')
+
+        enroll = Enroll.objects.create(course_instance=self.course_instance, student=self.create_student(1))
+        self.assertEqual(enroll.personal_assignments_created, 3)
+        self.assertEqual(enroll.personal_assignments.count(), 3)
+
+    def test_create_missing_is_idempotent(self):
+        enroll = Enroll.objects.create(course_instance=self.course_instance, student=self.create_student(1))
+        assignment = self.create_assignment()
+
+        created = PersonalAssignment.objects.create_missing([assignment.pk], [enroll.pk])
+        self.assertEqual(created, 0)
+        self.assertEqual(PersonalAssignment.objects.count(), 1)
+
+    def test_fan_out_query_count_does_not_grow_with_cohort(self):
+        for number in range(30):
+            Enroll.objects.create(course_instance=self.course_instance, student=self.create_student(number))
+
+        # two inserts for the multi-table assignment, enroll ids, existing pairs and one bulk insert
+        with self.assertNumQueries(5):
+            self.create_assignment()
@@ -0,0 +1,288 @@
+import datetime
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import caches
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+from django.contrib.auth.tokens import default_token_generator
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from accounts import urls as account_urls
+from accounts.models import CustomUser, Teacher, Manager
+from courses import urls as course_urls
+from courses import async_urls as course_async_urls
+from courses.models import (Course, CourseInstance, CourseInstanceAssignment, Enroll, PersonalAssignment,
+                            AnswerUpload)
+
+
+######################################################################################################################
+
+
+BASELINE_PATH = Path(__file__).with_name('performance_baseline.json')
+
+# Set to regenerate `performance_baseline.json` from the current tree instead of checking against it
+UPDATE_BASELINE_ENV = 'UPDATE_PERFORMANCE_BASELINE'
+
+# Wall time is noisy, so its budget is the recorded time times this factor, plus a fixed allowance
+TIME_TOLERANCE = float(os.environ.get('PERFORMANCE_TIME_TOLERANCE', 3))
+TIME_ALLOWANCE_MS = 50
+SIZE_TOLERANCE = 1.25
+
+RUNS = 3
+
+# (url name, role, kwargs key)
+ROUTES = (
+    ('homepage', 'anonymous', None),
+    ('homepage', 'student', None),
+
+    ('accounts:login', 'anonymous', None),
+    ('accounts:signup', 'anonymous', None),
+    ('accounts:logout', 'student', None),
+    ('accounts:profile', 'student', None),
+    ('accounts:profile-address', 'student', None),
+    ('accounts:password_change', 'student', None),
+    ('accounts:password_change_done', 'student', None),
+    ('accounts:password_reset', 'anonymous', None),
+    ('accounts:password_reset_done', 'anonymous', None),
+    ('accounts:password_reset_confirm', 'anonymous', 'password_reset'),
+    ('accounts:password_reset_complete', 'anonymous', None),
+    ('accounts:profile-pic-variant', 'anonymous', 'profile_pic'),
+
+    ('courses:course-search', 'anonymous', 'search'),
+    ('courses:courses-list', 'anonymous', None),
+    ('courses:courses-list', 'student', None),
+    ('courses:course-detail', 'anonymous', 'course'),
+    ('courses:course-detail', 'student', 'course'),
+    ('courses:course-instance-detail', 'anonymous', 'course_instance'),
+    ('courses:course-instance-detail', 'student', 'course_instance'),
+    ('courses:user-courses', 'student', None),
+    ('courses:unenroll', 'student', 'course_instance'),
+    ('courses:enroll', 'student', 'course_instance'),
+    ('courses:personal-assignment', 'student', 'student_assignment'),
+    ('courses:answer-upload-create', 'student', 'student_assignment'),
+    ('courses:answer-upload', 'student', 'answer_upload'),
+    ('courses:answer-file', 'student', 'answer_file'),
+
+    ('courses:instances-teacher-list', 'teacher', None),
+    ('courses:course-instance-teacher-detail', 'teacher', 'course_instance'),
+    ('courses:gradebook-teacher', 'teacher', 'course_instance'),
+    ('courses:enroll-teacher-detail', 'teacher', 'enroll'),
+    ('courses:enroll-teacher-grade', 'teacher', 'enroll'),
+    ('courses:personal-assignment-teacher-detail', 'teacher', 'personal_assignment'),
+    ('courses:course-assignment-teacher-detail', 'teacher', 'course_assignment'),
+    ('courses:course-assignment-teacher-grade', 'teacher', 'course_assignment'),
+    ('courses:course-assignment-teacher-change', 'teacher', 'course_assignment'),
+    ('courses:course-assignment-teacher-create', 'teacher', 'course_instance'),
+    ('courses:course-assignment-teacher-delete', 'teacher', 'course_assignment'),
+
+    ('courses:course-manager-list', 'manager', None),
+    ('courses:course-manager-new', 'manager', None),
+    ('courses:course-manager-detail', 'manager', 'course'),
+    ('courses:course-manager-update', 'manager', 'course'),
+    ('courses:course-manager-delete', 'manager', 'course'),
+    ('courses:course-manager-export', 'manager', 'course_export'),
+    ('courses:course-instance-manager-list', 'manager', None),
+    ('courses:course-instance-manager-new', 'manager', 'manager_course'),
+    ('courses:course-instance-manager-detail', 'manager', 'course_instance'),
+    ('courses:course-instance-manager-edit', 'manager', 'course_instance'),
+    ('courses:course-instance-manager-delete', 'manager', 'course_instance'),
+    ('courses:course-instance-manager-export', 'manager', 'course_instance_export'),
+    ('courses:course-instance-manager-enroll-import', 'manager', 'course_instance'),
+
+    ('courses-async:course-instance-detail', 'student', 'course_instance'),
+    ('courses-async:user-courses', 'student', None),
+    ('courses-async:personal-assignment', 'student', 'student_assignment'),
+    ('courses-async:course-instance-teacher-detail', 'teacher', 'course_instance'),
+    ('courses-async:gradebook-teacher', 'teacher', 'course_instance'),
+    ('courses-async:enroll-teacher-detail', 'teacher', 'enroll'),
+    ('courses-async:personal-assignment-teacher-detail', 'teacher', 'personal_assignment'),
+    ('courses-async:course-assignment-teacher-detail', 'teacher', 'course_assignment'),
+)
+
+
+# Async views run on the test thread, the only one that sees the test data
+@override_settings(ASYNC_VIEW_THREADS=0)
+class RouteBudgetTest(TestCase):
+    """
+    Requests every route of `courses.urls`, `courses.async_urls` and `accounts.urls` against a seeded course and compares the
+    query count, wall time and response size with `performance_baseline.json`.
+
+    Regenerate the baseline with `UPDATE_PERFORMANCE_BASELINE=1 python manage.py test courses.tests.test_performance`
+    after an intended change.
+    """
+
+    STUDENTS = 40
+    ASSIGNMENTS = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        groups = {name: Group.objects.create(name=name) for name in ('students', 'teachers', 'managers')}
+
+        cls.users = {
+            role: CustomUser.objects.create_user(
+                email=f'{role}@gmail.com',
+                username=role,
+                password='romanroman1',
+            )
+            for role in ('student', 'teacher', 'manager')
+        }
+        groups['students'].user_set.add(cls.users['student'])
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        CourseInstance.objects.create(course=course, sub_title='Python 2022', min_mark=60)
+        Course.objects.create(base_title='Django', description='Django course')
+
+        teacher = Teacher.objects.create(user=cls.users['teacher'])
+        teacher.supervised_courses.add(course_instance)
+        manager = Manager.objects.create(user=cls.users['manager'])
+        manager.supervised_courses.add(course)
+        manager.supervised_course_instances.add(course_instance)
+
+        now = timezone.now()
+        course_assignments = [
+            CourseInstanceAssignment.objects.create(
+                course_instance=course_instance,
+                title=f'Task {number}',
+                content='Content',
+                start_date=now - datetime.timedelta(days=number),
+                end_date=now + datetime.timedelta(days=number - cls.ASSIGNMENTS // 2),
+            )
+            for number in range(cls.ASSIGNMENTS)
+        ]
+
+        enroll = Enroll.objects.create(course_instance=course_instance, student=cls.users['student'])
+        for number in range(cls.STUDENTS):
+            student = CustomUser.objects.create_user(email=f'student{number}@gmail.com', username=f'student{number}')
+            Enroll.objects.create(course_instance=course_instance, student=student)
+
+        for number, personal_assignment in enumerate(PersonalAssignment.objects.filter(enroll__isnull=False)):
+            if number % 3:
+                personal_assignment.grade = 50 + number % 50
+                personal_assignment.is_completed = True
+                personal_assignment.completion_date = now
+                personal_assignment.save()
+
+        personal_assignment = enroll.personal_assignments.first()
+        instance_kwargs = {'course_slug': course.slug, 'instance_slug': course_instance.slug}
+        answer_upload = AnswerUpload.objects.create(
+            personal_assignment=personal_assignment,
+            filename='answer.zip',
+            size=1024,
+            partial_name=f'assignments/enroll_{enroll.pk}/.upload.part',
+        )
+        cls.route_kwargs = {
+            'course': {'slug': course.slug},
+            'manager_course': {'course_slug': course.slug},
+            'course_export': {'slug': course.slug, 'export_format': 'csv'},
+            'course_instance': instance_kwargs,
+            'course_instance_export': dict(instance_kwargs, export_format='csv'),
+            'enroll': dict(instance_kwargs, enroll_pk=enroll.pk),
+            'course_assignment': dict(instance_kwargs, assignment_pk=course_assignments[0].pk),
+            'personal_assignment': dict(instance_kwargs, enroll_pk=enroll.pk, assignment_pk=personal_assignment.pk),
+            'student_assignment': dict(instance_kwargs, pk=personal_assignment.pk),
+            'answer_file': {'pk': personal_assignment.pk},
+            'answer_upload': dict(instance_kwargs, pk=personal_assignment.pk, upload_id=answer_upload.pk),
+            # A missing picture, the budget covers the checks without writing media files
+            'profile_pic': {'size': 48, 'image_format': 'webp', 'name': 'images/profile_pics/missing.jpg'},
+        }
+
+    @classmethod
+    def setUpClass(cls):
+        super(RouteBudgetTest, cls).setUpClass()
+        cls.update_baseline = bool(os.environ.get(UPDATE_BASELINE_ENV))
+        cls.baseline = {}
+        if BASELINE_PATH.exists():
+            cls.baseline = json.loads(BASELINE_PATH.read_text())
+        cls.measurements = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.update_baseline and cls.measurements:
+            BASELINE_PATH.write_text(json.dumps(dict(sorted(cls.measurements.items())), indent=4) + '\n')
+        super(RouteBudgetTest, cls).tearDownClass()
+
+    def get_client(self, role):
+        client = Client()
+        if role != 'anonymous':
+            client.force_login(self.users[role])
+        return client
+
+    def get_url(self, url_name, kwargs_key):
+        if kwargs_key == 'password_reset':
+            # Tokens are invalidated by logins, so they are made right before the request
+            user = CustomUser.objects.get(pk=self.users['student'].pk)
+            kwargs = {
+                'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+                'token': default_token_generator.make_token(user),
+            }
+        elif kwargs_key == 'search':
+            return reverse(url_name) + '?q=python'
+        else:
+            kwargs = self.route_kwargs[kwargs_key] if kwargs_key else None
+        return reverse(url_name, kwargs=kwargs)
+
+    def measure(self, url_name, role, kwargs_key):
+        url = self.get_url(url_name, kwargs_key)
+        timings = []
+        for _ in range(RUNS):
+            client = self.get_client(role)
+            # Budgets are for cold pages, the anonymous page cache included
+            for cache in caches.all():
+                cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                # Streaming bodies are produced while they are read
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+                timings.append((time.perf_counter() - started) * 1000)
+
+        return {
+            'status': response.status_code,
+            'queries': len(queries.captured_queries),
+            'time_ms': round(statistics.median(timings), 2),
+            'size': len(content),
+        }
+
+    def test_every_route_has_a_budget(self):
+        names = {'homepage'}
+        for namespace, module in (
+            ('courses', course_urls), ('courses-async', course_async_urls), ('accounts', account_urls),
+        ):
+            names.update(f'{namespace}:{pattern.name}' for pattern in module.urlpatterns)
+        self.assertEqual(names - {name for name, _, _ in ROUTES}, set())
+
+    def test_routes_within_budget(self):
+        for url_name, role, kwargs_key in ROUTES:
+            key = f'{url_name}[{role}]'
+            with self.subTest(route=key):
+                measurement = self.measure(url_name, role, kwargs_key)
+                self.measurements[key] = measurement
+                if self.update_baseline:
+                    continue
+
+                budget = self.baseline.get(key)
+                self.assertIsNotNone(budget, f'No budget for {key}, run with {UPDATE_BASELINE_ENV}=1.')
+                self.assertEqual(measurement['status'], budget['status'])
+                self.assertLessEqual(
+                    measurement['queries'], budget['queries'],
+                    f"{key} made {measurement['queries']} queries, the budget is {budget['queries']}.",
+                )
+                self.assertLessEqual(
+                    measurement['time_ms'], budget['time_ms'] * TIME_TOLERANCE + TIME_ALLOWANCE_MS,
+                    f"{key} took {measurement['time_ms']}ms, the baseline is {budget['time_ms']}ms.",
+                )
+                self.assertLessEqual(
+                    measurement['size'], budget['size'] * SIZE_TOLERANCE,
+                    f"{key} returned {measurement['size']} bytes, the baseline is {budget['size']}.",
+                )
@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.db import connection
+
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from courses.models import Course, CourseInstance
+from courses import search
+
+
+######################################################################################################################
+
+
+class CourseSearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.python = Course.objects.create(base_title='Python', description='Programming for beginners.')
+        cls.django = Course.objects.create(
+            base_title='Django',
+            description='Web development with Python and <script>alert(1)</script>.',
+        )
+        CourseInstance.objects.create(course=cls.django, sub_title='Django Spring', min_mark=60)
+        cls.algorithms = Course.objects.create(base_title='Algorithms', description='Graphs and sorting.')
+
+    def get_courses(self, query):
+        return [result.course for result in search.search_courses(query)]
+
+    def test_title_ranks_above_description(self):
+        self.assertEqual(self.get_courses('python'), [self.python, self.django])
+
+    def test_prefix_and_all_terms(self):
+        self.assertEqual(self.get_courses('algo'), [self.algorithms])
+        self.assertEqual(self.get_courses('python web'), [self.django])
+        self.assertEqual(self.get_courses('spring'), [self.django])
+
+    def test_query_syntax_is_searched_literally(self):
+        self.assertEqual(self.get_courses('NOT "python" OR *'), [])
+        self.assertEqual(self.get_courses('   '), [])
+
+    def test_index_is_looked_up_once(self):
+        self.get_courses('python')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_courses('python'), [self.python, self.django])
+        self.assertEqual(len(queries.captured_queries), 2)
+
+    def test_snippets_are_escaped_and_highlighted(self):
+        result = search.search_courses('web')[0]
+        self.assertIn('<mark>Web</mark>', result.snippet)
+        self.assertIn('&lt;script&gt;', result.snippet)
+        self.assertNotIn('<script>', result.snippet)
+
+    def test_index_follows_changes(self):
+        algorithms = Course.objects.get(pk=self.algorithms.pk)
+        algorithms.base_title = 'Data Structures'
+        algorithms.save()
+        self.assertEqual(self.get_courses('structures'), [self.algorithms])
+        self.assertEqual(self.get_courses('algorithms'), [])
+
+        course_instance = CourseInstance.objects.create(course=self.python, sub_title='Python Evening', min_mark=60)
+        self.assertEqual(self.get_courses('evening'), [self.python])
+        course_instance.delete()
+        self.assertEqual(self.get_courses('evening'), [])
+
+        Course.objects.bulk_create([Course(base_title='Rust', slug='rust')])
+        self.assertEqual(len(self.get_courses('rust')), 1)
+
+        Course.objects.filter(pk=self.python.pk).delete()
+        self.assertEqual(self.get_courses('programming'), [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.SEARCH_TABLE}")
+        self.assertEqual(self.get_courses('python'), [])
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 3 course(s)', out.getvalue())
+        self.assertEqual(self.get_courses('python'), [self.python, self.django])
+
+    def test_search_view(self):
+        response = self.client.get(reverse('courses:course-search'), {'q': 'spring'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'courses/course_search.html')
+        self.assertContains(response, '<mark>Spring</mark>')
+        self.assertContains(response, reverse('courses:course-detail', kwargs={'slug': self.django.slug}))
+
+    def test_admin_search(self):
+        CustomUser.objects.create_superuser(email='admin@gmail.com', username='admin', password='romanroman1')
+        self.client.login(email='admin@gmail.com', password='romanroman1')
+
+        def search_admin(query):
+            response = self.client.get(reverse('admin:courses_course_changelist'), {'q': query})
+            return set(response.context['cl'].result_list)
+
+        # Matched by the index only, by the stock title search only, and by neither
+        self.assertEqual(search_admin('beginners'), {self.python})
+        self.assertEqual(search_admin('gorith'), {self.algorithms})
+        self.assertEqual(search_admin('python'), {self.python, self.django})
+        self.assertEqual(search_admin('haskell'), set())
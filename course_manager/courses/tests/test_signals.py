@@ -0,0 +1,107 @@
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from courses.models import (Course, CourseInstance, CourseInstanceAssignment, Enroll)
+
+
+######################################################################################################################
+
+
+class ChangePropagationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='students')
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        cls.small_instance = CourseInstance.objects.create(course=course, sub_title='Python Small', min_mark=60)
+        cls.large_instance = CourseInstance.objects.create(course=course, sub_title='Python Large', min_mark=60)
+
+        for course_instance, students in ((cls.small_instance, 2), (cls.large_instance, 20)):
+            for number in range(4):
+                CourseInstanceAssignment.objects.create(
+                    course_instance=course_instance,
+                    title=f'Task {number}',
+                    content='Content',
+                    start_date=timezone.now(),
+                )
+            for number in range(students):
+                student = CustomUser.objects.create_user(
+                    email=f'{course_instance.slug}{number}@gmail.com',
+                    username=f'{course_instance.slug}{number}',
+                    password='romanroman1',
+                )
+                Enroll.objects.create(course_instance=course_instance, student=student)
+
+    def capture_writes(self, func):
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+
+    def count_writes(self, func):
+        return len(self.capture_writes(func))
+
+    def update_enroll(self, course_instance):
+        enroll = course_instance.enrolls.first()
+        enroll.is_course_finished = True
+        return lambda: enroll.save()
+
+    def update_assignment(self, course_instance):
+        assignment = course_instance.course_assignments.first()
+        assignment.title = 'Renamed task'
+        return lambda: assignment.save()
+
+    def test_enroll_update_writes_do_not_grow_with_cohort(self):
+        small = self.count_writes(self.update_enroll(self.small_instance))
+        large = self.count_writes(self.update_enroll(self.large_instance))
+        self.assertEqual(small, large)
+
+    def test_enroll_update_does_not_touch_personal_assignments(self):
+        writes = self.capture_writes(self.update_enroll(self.large_instance))
+        self.assertFalse([sql for sql in writes if 'courses_personalassignment' in sql])
+
+    def test_assignment_update_writes_do_not_grow_with_cohort(self):
+        small = self.count_writes(self.update_assignment(self.small_instance))
+        large = self.count_writes(self.update_assignment(self.large_instance))
+        self.assertEqual(small, large)
+
+    def test_enroll_moved_to_another_instance(self):
+        enroll = self.small_instance.enrolls.first()
+        graded = enroll.personal_assignments.first()
+        graded.grade = 90
+        graded.is_completed = True
+        graded.answer_field = 'Answer'
+        graded.save()
+
+        enroll = Enroll.objects.get(pk=enroll.pk)
+        enroll.course_instance = self.large_instance
+        enroll.save()
+
+        self.assertEqual(
+            set(enroll.personal_assignments.values_list('course_instance_assignment', flat=True)),
+            set(self.small_instance.course_assignments.values_list('pk', flat=True))
+            | set(self.large_instance.course_assignments.values_list('pk', flat=True)),
+        )
+        graded.refresh_from_db()
+        self.assertEqual((graded.grade, graded.is_completed, graded.answer_field), (90, True, 'Answer'))
+        enroll.refresh_from_db()
+        self.assertEqual((enroll.graded_assignments_count, enroll.grades_sum), (1, 90))
+
+    def test_assignment_moved_to_another_instance(self):
+        old_enrolls = set(self.small_instance.enrolls.values_list('pk', flat=True))
+        assignment = CourseInstanceAssignment.objects.only('pk').filter(course_instance=self.small_instance).first()
+        assignment.course_instance = self.large_instance
+        assignment.save()
+
+        self.assertEqual(
+            set(assignment.personal_assignments.values_list('enroll', flat=True)),
+            old_enrolls | set(self.large_instance.enrolls.values_list('pk', flat=True)),
+        )
@@ -0,0 +1,104 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, RequestFactory, override_settings
+from django.core.management import call_command
+from django.http import Http404
+
+from course_manager import staticfiles as project_staticfiles
+
+
+######################################################################################################################
+
+
+class CKEditorPruningTest(SimpleTestCase):
+
+    def setUp(self):
+        project_staticfiles.get_ckeditor_plugins.cache_clear()
+        self.addCleanup(project_staticfiles.get_ckeditor_plugins.cache_clear)
+
+    def test_is_pruned(self):
+        for path, pruned in (
+                ('ckeditor/ckeditor/lang/en.js', False),
+                ('ckeditor/ckeditor/lang/de.js', True),
+                ('ckeditor/ckeditor/plugins/a11yhelp/dialogs/lang/pt-br.js', True),
+                # In the build
+                ('ckeditor/ckeditor/plugins/a11yhelp/dialogs/a11yhelp.js', False),
+                # An extra plugin, and one it requires
+                ('ckeditor/ckeditor/plugins/embedsemantic/plugin.js', False),
+                ('ckeditor/ckeditor/plugins/embedbase/plugin.js', False),
+                ('ckeditor/ckeditor/plugins/mathjax/plugin.js', True),
+                ('ckeditor/ckeditor/plugins/icons.png', False),
+                ('ckeditor/ckeditor/skins/moono/editor.css', False),
+                ('ckeditor/ckeditor/skins/moono-lisa/editor.css', True),
+                ('course_manager/css/master.css', False)):
+            with self.subTest(path=path):
+                self.assertEqual(project_staticfiles.is_pruned(path), pruned)
+
+
+class CompressedManifestStaticFilesStorageTest(SimpleTestCase):
+    stylesheet = 'body { background: url("logo.png"); }\n.icon { background: url("missing.png"); }\n' * 10
+
+    def setUp(self):
+        source = tempfile.mkdtemp()
+        self.static_root = tempfile.mkdtemp()
+        for directory in (source, self.static_root):
+            self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        for name, content in (('css/site.css', self.stylesheet.encode()),
+                              ('css/logo.png', b'\x89PNG'),
+                              ('ckeditor/ckeditor/lang/en.js', b'CKEDITOR.lang.en = {};'),
+                              ('ckeditor/ckeditor/lang/de.js', b'CKEDITOR.lang.de = {};')):
+            os.makedirs(os.path.dirname(os.path.join(source, name)), exist_ok=True)
+            with open(os.path.join(source, name), 'wb') as static_file:
+                static_file.write(content)
+
+        static_settings = override_settings(
+            STATIC_ROOT=self.static_root,
+            STATICFILES_DIRS=[source],
+            STATICFILES_FINDERS=['course_manager.staticfiles.FileSystemFinder'],
+            STATICFILES_STORAGE='course_manager.staticfiles.CompressedManifestStaticFilesStorage',
+        )
+        static_settings.enable()
+        self.addCleanup(static_settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+        with open(os.path.join(self.static_root, 'staticfiles.json')) as manifest:
+            self.paths = json.load(manifest)['paths']
+
+    def test_collect(self):
+        self.assertEqual(set(self.paths), {'css/site.css', 'css/logo.png', 'ckeditor/ckeditor/lang/en.js'})
+        self.assertFalse(os.path.exists(os.path.join(self.static_root, 'ckeditor/ckeditor/lang/de.js')))
+
+        hashed_name = self.paths['css/site.css']
+        self.assertRegex(hashed_name, r'^css/site\.[0-9a-f]{12}\.css$')
+        with gzip.open(os.path.join(self.static_root, hashed_name + '.gz')) as compressed:
+            content = compressed.read().decode()
+        # Known references are fingerprinted, the rest is left as it is
+        self.assertIn('url("{}")'.format(os.path.basename(self.paths['css/logo.png'])), content)
+        self.assertIn('url("missing.png")', content)
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, 'css/site.css.gz')))
+        # Too small to gain anything
+        self.assertFalse(os.path.exists(os.path.join(self.static_root, 'ckeditor/ckeditor/lang/en.js.gz')))
+
+    def test_serve(self):
+        request = RequestFactory().get('/static/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        hashed_name = self.paths['css/site.css']
+
+        response = project_staticfiles.serve(request, hashed_name)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], project_staticfiles.IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode(),
+                         self.stylesheet.replace('logo.png', os.path.basename(self.paths['css/logo.png'])))
+
+        response = project_staticfiles.serve(RequestFactory().get('/static/'), 'css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Cache-Control'], project_staticfiles.REVALIDATE_CACHE_CONTROL)
+
+        for path in (hashed_name + '.gz', 'css/other.css', 'css', '../settings.py'):
+            with self.subTest(path=path), self.assertRaises(Http404):
+                project_staticfiles.serve(request, path)
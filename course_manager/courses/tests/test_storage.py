@@ -0,0 +1,131 @@
+import datetime
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from courses.models import (Course, CourseInstance, CourseInstanceAssignment, Enroll, PersonalAssignment,
+                            StoredBlob, BlobLink)
+from courses.storage import ContentAddressedStorage
+
+
+######################################################################################################################
+
+
+class TemporaryMediaMixin(object):
+
+    def setUp(self):
+        super(TemporaryMediaMixin, self).setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.storage = PersonalAssignment._meta.get_field('answer_file').storage
+
+
+class ContentAddressedStorageTest(TemporaryMediaMixin, TestCase):
+
+    def test_identical_files_share_a_blob(self):
+        first = self.storage.save('assignments/enroll_1/template.zip', ContentFile(b'starter archive'))
+        second = self.storage.save('assignments/enroll_2/template.zip', ContentFile(b'starter archive'))
+
+        blob = StoredBlob.objects.get()
+        self.assertEqual((blob.ref_count, blob.size), (2, 15))
+        blob_name = f'blobs/{blob.sha256[:2]}/{blob.sha256[2:4]}/{blob.sha256}'
+        self.assertEqual(self.storage.url(first), f'/media/{blob_name}')
+        for name in (first, second):
+            with self.storage.open(name) as answer_file:
+                self.assertEqual(answer_file.read(), b'starter archive')
+        # Only the blob is on disk
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'assignments')))
+
+        self.storage.delete(first)
+        self.assertFalse(self.storage.exists(first))
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, blob_name)))
+
+        self.storage.delete(second)
+        self.assertFalse(StoredBlob.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, blob_name)))
+
+    def test_logical_names_stay_unique(self):
+        first = self.storage.save('assignments/enroll_1/answer.txt', ContentFile(b'first'))
+        second = self.storage.save('assignments/enroll_1/answer.txt', ContentFile(b'second'))
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.storage.open(second).read(), b'second')
+
+    def test_legacy_files(self):
+        name = 'assignments/enroll_1/old.txt'
+        os.makedirs(os.path.join(self.media_root, 'assignments', 'enroll_1'))
+        with open(os.path.join(self.media_root, name), 'wb') as legacy_file:
+            legacy_file.write(b'legacy')
+
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.url(name), f'/media/{name}')
+        self.assertEqual(self.storage.open(name).read(), b'legacy')
+
+        self.assertTrue(self.storage.absorb(name))
+        self.assertFalse(self.storage.absorb(name))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertEqual(self.storage.open(name).read(), b'legacy')
+
+        self.storage.save('assignments/enroll_2/old.txt', ContentFile(b'legacy'))
+        self.assertEqual(StoredBlob.objects.get().ref_count, 2)
+
+    def test_deconstruct(self):
+        self.assertEqual(ContentAddressedStorage(blob_dir='store').deconstruct(),
+                         ('courses.storage.ContentAddressedStorage', (), {'blob_dir': 'store'}))
+
+
+class AnswerFileCleanupTest(TemporaryMediaMixin, TransactionTestCase):
+
+    def setUp(self):
+        super(AnswerFileCleanupTest, self).setUp()
+        Group.objects.create(name='students')
+        course = Course.objects.create(base_title='Python', description='Python course')
+        course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        CourseInstanceAssignment.objects.create(
+            course_instance=course_instance,
+            title='Task',
+            content='Content',
+            start_date=timezone.now(),
+            end_date=timezone.now() + datetime.timedelta(days=5),
+        )
+        for number in range(3):
+            student = CustomUser.objects.create_user(email=f'student{number}@gmail.com', username=f'student{number}')
+            Enroll.objects.create(course_instance=course_instance, student=student)
+
+    def test_replaced_answers_release_their_blob(self):
+        for personal_assignment in PersonalAssignment.objects.all():
+            personal_assignment.answer_file.save('template.zip', ContentFile(b'starter archive'))
+        self.assertEqual(StoredBlob.objects.get().ref_count, 3)
+
+        personal_assignment = PersonalAssignment.objects.first()
+        personal_assignment.answer_file.save('solution.zip', ContentFile(b'solution'))
+        self.assertEqual(dict(StoredBlob.objects.values_list('size', 'ref_count')), {15: 2, 8: 1})
+
+        PersonalAssignment.objects.exclude(pk=personal_assignment.pk).delete()
+        self.assertEqual(list(StoredBlob.objects.values_list('size', 'ref_count')), [(8, 1)])
+        self.assertEqual(BlobLink.objects.get().name, personal_assignment.answer_file.name)
+
+    def test_deduplicate_command(self):
+        for personal_assignment in PersonalAssignment.objects.all():
+            name = f'assignments/enroll_{personal_assignment.enroll_id}/old.txt'
+            os.makedirs(os.path.dirname(os.path.join(self.media_root, name)), exist_ok=True)
+            with open(os.path.join(self.media_root, name), 'wb') as legacy_file:
+                legacy_file.write(b'legacy')
+            PersonalAssignment.objects.filter(pk=personal_assignment.pk).update(answer_file=name)
+
+        out = StringIO()
+        call_command('deduplicate_answer_files', stdout=out)
+        self.assertIn('Moved 3 file(s). 3 answer file(s) share 1 blob(s) of 6 bytes.', out.getvalue())
@@ -0,0 +1,150 @@
+import datetime
+import hashlib
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from courses.models import Course, CourseInstance, CourseInstanceAssignment, Enroll, AnswerUpload
+from courses import uploads
+
+
+######################################################################################################################
+
+
+class AnswerUploadTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+
+        cls.student = CustomUser.objects.create_user(email='student1@gmail.com', username='student1',
+                                                     password='romanroman1')
+        cls.other_student = CustomUser.objects.create_user(email='student2@gmail.com', username='student2',
+                                                           password='romanroman1')
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        cls.course_assignment = CourseInstanceAssignment.objects.create(
+            course_instance=course_instance,
+            title='Task',
+            content='Content',
+            start_date=timezone.now(),
+            end_date=timezone.now() + datetime.timedelta(days=5),
+            max_answer_file_size=1,
+        )
+        enroll = Enroll.objects.create(course_instance=course_instance, student=cls.student)
+        Enroll.objects.create(course_instance=course_instance, student=cls.other_student)
+        cls.personal_assignment = enroll.personal_assignments.get()
+        cls.kwargs = {'course_slug': course.slug, 'instance_slug': course_instance.slug,
+                      'pk': cls.personal_assignment.pk}
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root, ANSWER_UPLOAD_CHUNK_SIZE=100)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.client.force_login(self.student)
+
+    def start(self, content, **data):
+        data = dict({'filename': 'dataset.csv', 'size': len(content)}, **data)
+        return self.client.post(reverse('courses:answer-upload-create', kwargs=self.kwargs), data)
+
+    def send(self, url, content, start, end):
+        return self.client.put(url, content[start:end], content_type='application/octet-stream',
+                               HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(content)}')
+
+    def test_chunked_upload(self):
+        content = bytes(range(256)) * 2
+        response = self.start(content, sha256=hashlib.sha256(content).hexdigest())
+        self.assertEqual(response.status_code, 201)
+        session = response.json()
+        self.assertEqual((session['offset'], session['chunk_size'], session['complete']), (0, 100, False))
+
+        for start in range(0, len(content), 100):
+            response = self.send(session['url'], content, start, min(start + 100, len(content)))
+            self.assertEqual(response.status_code, 200)
+
+        result = response.json()
+        self.assertTrue(result['complete'])
+        self.assertEqual(result['sha256'], hashlib.sha256(content).hexdigest())
+        self.personal_assignment.refresh_from_db()
+        self.assertEqual(self.personal_assignment.answer_file.name,
+                         f'assignments/enroll_{self.personal_assignment.enroll_id}/dataset.csv')
+        self.assertEqual(result['file'], self.personal_assignment.get_answer_file_url())
+        with self.personal_assignment.answer_file.open() as answer_file:
+            self.assertEqual(answer_file.read(), content)
+        self.assertFalse(AnswerUpload.objects.exists())
+        # The partial file became the blob
+        self.assertEqual(default_storage.listdir(f'assignments/enroll_{self.personal_assignment.enroll_id}')[1], [])
+
+    def test_resume(self):
+        content = b'0123456789' * 30
+        url = self.start(content).json()['url']
+        self.send(url, content, 0, 100)
+
+        # A retried chunk whose response was lost
+        response = self.send(url, content, 0, 100)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 100)
+        self.assertEqual(self.client.get(url).json()['offset'], 100)
+
+        # The next chunk reaches a process that has not hashed the first one
+        uploads._hashers.clear()
+        self.send(url, content, 100, 200)
+        response = self.send(url, content, 200, 300)
+        self.assertEqual(response.json()['sha256'], hashlib.sha256(content).hexdigest())
+
+    def test_checksum_mismatch_restarts_upload(self):
+        content = b'answer'
+        url = self.start(content, size=12, sha256=hashlib.sha256(content * 2).hexdigest()).json()['url']
+        response = self.send(url, content + b'ANSWER', 0, 12)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['offset'], 0)
+        self.personal_assignment.refresh_from_db()
+        self.assertFalse(self.personal_assignment.answer_file)
+
+    def test_size_limits(self):
+        response = self.start(b'', size=1024 * 1024 + 1)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(AnswerUpload.objects.exists())
+
+        url = self.start(b'', size=10).json()['url']
+        response = self.send(url, b'x' * 20, 0, 20)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(url, b'x' * 20, content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE='bytes 0-19/10')
+        self.assertEqual(response.status_code, 413)
+
+        with override_settings(ANSWER_FILE_MAX_SIZE=10):
+            CourseInstanceAssignment.objects.filter(pk=self.course_assignment.pk).update(max_answer_file_size=None)
+            self.assertEqual(self.start(b'x' * 11).status_code, 413)
+
+    def test_form_upload_limit(self):
+        response = self.client.post(reverse('courses:personal-assignment', kwargs=self.kwargs), {
+            'answer_field': 'Answer',
+            'answer_file': SimpleUploadedFile('big.bin', b'x' * (1024 * 1024 + 1)),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('answer_file', response.context['form'].errors)
+
+    def test_other_students_upload(self):
+        url = self.start(b'answer').json()['url']
+        self.client.force_login(self.other_student)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.start(b'answer').status_code, 404)
+
+    def test_discard(self):
+        url = self.start(b'answer').json()['url']
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,493 @@
+import csv
+import datetime
+import io
+import json
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser, Teacher, Manager
+from courses.models import (Course, CourseInstance, CourseInstanceAssignment, Enroll, PersonalAssignment)
+from courses.gradebook import Gradebook
+from courses import cache as page_cache
+from accounts import cache as account_cache
+
+
+######################################################################################################################
+
+
+class GradebookTeacherViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+
+        teacher_user = CustomUser.objects.create_user(
+            email='teacher1@gmail.com',
+            username='teacher1',
+            password='romanroman1',
+        )
+        Teacher.objects.create(user=teacher_user)
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        cls.course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+
+        now = timezone.now()
+        cls.past_assignment = CourseInstanceAssignment.objects.create(
+            course_instance=cls.course_instance,
+            title='Past task',
+            content='Content',
+            start_date=now - datetime.timedelta(days=10),
+            end_date=now - datetime.timedelta(days=5),
+        )
+        cls.future_assignment = CourseInstanceAssignment.objects.create(
+            course_instance=cls.course_instance,
+            title='Future task',
+            content='Content',
+            start_date=now - datetime.timedelta(days=1),
+            end_date=now + datetime.timedelta(days=5),
+        )
+
+        for number in range(3):
+            cls.add_student(number)
+
+    @classmethod
+    def add_student(cls, number):
+        student = CustomUser.objects.create_user(
+            email=f'student{number}@gmail.com',
+            username=f'student{number}',
+            password='romanroman1',
+        )
+        return Enroll.objects.create(course_instance=cls.course_instance, student=student)
+
+    def get_url(self):
+        return reverse('courses:gradebook-teacher', kwargs={
+            'course_slug': self.course_instance.course.slug,
+            'instance_slug': self.course_instance.slug,
+        })
+
+    def test_view_restricted_to_teachers(self):
+        CustomUser.objects.create_user(email='other@gmail.com', username='other', password='romanroman1')
+        self.client.login(email='other@gmail.com', password='romanroman1')
+        response = self.client.get(self.get_url())
+        self.assertEqual(response.status_code, 403)
+
+    def test_view_uses_correct_template(self):
+        self.client.login(email='teacher1@gmail.com', password='romanroman1')
+        response = self.client.get(self.get_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'courses/gradebook_teacher.html')
+
+    def test_query_count_does_not_grow_with_cohort(self):
+        self.client.login(email='teacher1@gmail.com', password='romanroman1')
+        # Both requests render the navbar fragment uncached
+        account_cache.get_cache().clear()
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.get_url())
+
+        for number in range(3, 15):
+            self.add_student(number)
+        account_cache.get_cache().clear()
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.get_url())
+
+        self.assertEqual(len(response.context['gradebook'].enrolls), 15)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_matrix_cells(self):
+        enroll = Enroll.objects.get(student__email='student0@gmail.com')
+        late = PersonalAssignment.objects.get(enroll=enroll, course_instance_assignment=self.past_assignment)
+        late.grade = 70
+        late.is_completed = True
+        late.completion_date = timezone.now()
+        late.save()
+
+        gradebook = Gradebook(self.course_instance)
+        self.assertEqual(gradebook.shape, (3, 2))
+
+        grade, flags = gradebook.cell(0, 0)
+        self.assertEqual(grade, 70)
+        self.assertTrue(flags & Gradebook.COMPLETED and flags & Gradebook.LATE)
+
+        _, flags = gradebook.cell(1, 0)
+        self.assertTrue(flags & Gradebook.OVERDUE)
+
+        _, flags = gradebook.cell(1, 1)
+        self.assertFalse(flags & (Gradebook.COMPLETED | Gradebook.OVERDUE))
+
+        self.assertEqual(gradebook.column_averages(), [70, None])
+        enroll_row, average_mark, cells = next(gradebook.rows())
+        self.assertEqual(enroll_row['pk'], enroll.pk)
+        self.assertEqual(average_mark, 70)
+        self.assertEqual(cells[0], ('70', 'gradebook-late'))
+
+    def test_assignments_of_other_instances_are_skipped(self):
+        other_instance = CourseInstance.objects.create(
+            course=self.course_instance.course,
+            sub_title='Python 2020',
+            min_mark=60,
+        )
+        other_assignment = CourseInstanceAssignment.objects.create(
+            course_instance=other_instance,
+            title='Old task',
+            content='Content',
+            start_date=timezone.now(),
+        )
+        enroll = Enroll.objects.get(student__email='student0@gmail.com')
+        PersonalAssignment.objects.create(enroll=enroll, course_instance_assignment=other_assignment)
+
+        gradebook = Gradebook(self.course_instance)
+        self.assertEqual(gradebook.shape, (3, 2))
+        self.assertEqual(len(list(gradebook.rows())), 3)
+
+
+class CourseChainViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+
+        teacher_user = CustomUser.objects.create_user(
+            email='teacher1@gmail.com',
+            username='teacher1',
+            password='romanroman1',
+        )
+        Teacher.objects.create(user=teacher_user)
+        cls.student = CustomUser.objects.create_user(
+            email='student1@gmail.com',
+            username='student1',
+            password='romanroman1',
+        )
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        cls.course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        other_instance = CourseInstance.objects.create(course=course, sub_title='Python 2022', min_mark=60)
+
+        cls.course_assignment = CourseInstanceAssignment.objects.create(
+            course_instance=cls.course_instance,
+            title='Task',
+            content='Content',
+            start_date=timezone.now(),
+            end_date=timezone.now() + datetime.timedelta(days=5),
+        )
+        cls.enroll = Enroll.objects.create(course_instance=cls.course_instance, student=cls.student)
+        cls.other_enroll = Enroll.objects.create(course_instance=other_instance, student=cls.student)
+        cls.personal_assignment = PersonalAssignment.objects.get(enroll=cls.enroll)
+
+    def get_evaluate_url(self, enroll_pk=None):
+        return reverse('courses:personal-assignment-teacher-detail', kwargs={
+            'course_slug': self.course_instance.course.slug,
+            'instance_slug': self.course_instance.slug,
+            'enroll_pk': enroll_pk or self.enroll.pk,
+            'assignment_pk': self.personal_assignment.pk,
+        })
+
+    def test_chain_is_resolved_with_one_query(self):
+        self.client.login(email='teacher1@gmail.com', password='romanroman1')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.get_evaluate_url())
+        self.assertEqual(response.status_code, 200)
+        chain_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'courses_courseinstance' in query['sql'] and query['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(len(chain_queries), 1)
+
+    def test_mismatched_chain_returns_404(self):
+        self.client.login(email='teacher1@gmail.com', password='romanroman1')
+        response = self.client.get(self.get_evaluate_url(enroll_pk=self.other_enroll.pk))
+        self.assertEqual(response.status_code, 404)
+
+    def test_evaluate_updates_grade(self):
+        self.client.login(email='teacher1@gmail.com', password='romanroman1')
+        response = self.client.post(self.get_evaluate_url(), data={'grade': 80, 'is_completed': 'on'})
+        self.assertEqual(response.status_code, 302)
+
+        self.personal_assignment.refresh_from_db()
+        self.assertEqual(self.personal_assignment.grade, 80)
+        self.assertTrue(self.personal_assignment.is_completed)
+        self.assertIsNotNone(self.personal_assignment.completion_date)
+
+    def test_student_sees_only_own_assignment(self):
+        other = CustomUser.objects.create_user(email='other@gmail.com', username='other', password='romanroman1')
+        self.client.login(email=other.email, password='romanroman1')
+        response = self.client.get(reverse('courses:personal-assignment', kwargs={
+            'course_slug': self.course_instance.course.slug,
+            'instance_slug': self.course_instance.slug,
+            'pk': self.personal_assignment.pk,
+        }))
+        self.assertEqual(response.status_code, 404)
+
+
+class BulkGradingViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+
+        teacher_user = CustomUser.objects.create_user(
+            email='teacher1@gmail.com',
+            username='teacher1',
+            password='romanroman1',
+        )
+        Teacher.objects.create(user=teacher_user)
+
+        course = Course.objects.create(base_title='Python', description='Python course')
+        cls.course_instance = CourseInstance.objects.create(course=course, sub_title='Python 2021', min_mark=60)
+        cls.course_assignment = CourseInstanceAssignment.objects.create(
+            course_instance=cls.course_instance,
+            title='Task',
+            content='Content',
+            start_date=timezone.now(),
+            end_date=timezone.now() + datetime.timedelta(days=5),
+        )
+        for number in range(3):
+            cls.add_student(number)
+
+    @classmethod
+    def add_student(cls, number):
+        student = CustomUser.objects.create_user(email=f'student{number}@gmail.com', username=f'student{number}')
+        return Enroll.objects.create(course_instance=cls.course_instance, student=student)
+
+    def setUp(self):
+        self.client.login(email='teacher1@gmail.com', password='romanroman1')
+
+    def get_url(self):
+        return reverse('courses:course-assignment-teacher-grade', kwargs={
+            'course_slug': self.course_instance.course.slug,
+            'instance_slug': self.course_instance.slug,
+            'assignment_pk': self.course_assignment.pk,
+        })
+
+    def get_data(self, grades):
+        """POST data of the grading form; `grades` maps personal assignments to (grade, is_completed)."""
+        rows = list(self.course_assignment.personal_assignments.order_by('enroll__student__username'))
+        data = {
+            'form-TOTAL_FORMS': len(rows),
+            'form-INITIAL_FORMS': len(rows),
+            'form-MIN_NUM_FORMS': 0,
+            'form-MAX_NUM_FORMS': 1000,
+        }
+        for index, personal_assignment in enumerate(rows):
+            grade, is_completed = grades.get(personal_assignment,
+                                             (personal_assignment.grade, personal_assignment.is_completed))
+            data[f'form-{index}-id'] = personal_assignment.pk
+            data[f'form-{index}-grade'] = grade
+            if is_completed:
+                data[f'form-{index}-is_completed'] = 'on'
+        return data
+
+    def test_view_restricted_to_teachers(self):
+        CustomUser.objects.create_user(email='other@gmail.com', username='other', password='romanroman1')
+        self.client.login(email='other@gmail.com', password='romanroman1')
+        self.assertEqual(self.client.get(self.get_url()).status_code, 403)
+
+    def test_grades_are_saved_together(self):
+        first, second, third = self.course_assignment.personal_assignments.order_by('enroll__student__username')
+        PersonalAssignment.objects.filter(pk=third.pk).update(is_completed=True, completion_date=timezone.now())
+        third.refresh_from_db()
+
+        response = self.client.post(self.get_url(), data=self.get_data({
+            first: (80, True),
+            second: (40, False),
+            third: (90, False),
+        }))
+        self.assertRedirects(response, self.course_assignment.get_absolute_url(), fetch_redirect_response=False)
+
+        first.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual((first.grade, first.is_completed), (80, True))
+        self.assertIsNotNone(first.completion_date)
+        self.assertEqual((third.grade, third.is_completed, third.completion_date), (90, False, None))
+        self.assertEqual(PersonalAssignment.objects.get(pk=second.pk).grade, 40)
+
+        enroll = Enroll.objects.get(pk=first.enroll_id)
+        self.assertEqual((enroll.graded_assignments_count, enroll.grades_sum), (1, 80))
+        self.assertEqual(Enroll.objects.get(pk=third.enroll_id).graded_assignments_count, 0)
+
+    def test_invalid_rows_are_reported_and_nothing_is_saved(self):
+        first, second, _ = self.course_assignment.personal_assignments.order_by('enroll__student__username')
+
+        response = self.client.post(self.get_url(), data=self.get_data({first: (80, True), second: (120, True)}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['formset'].errors[1], {'grade': ['Grade must be in range [0, 100].']})
+        self.assertEqual(response.context['formset'].errors[0], {})
+        self.assertEqual(PersonalAssignment.objects.get(pk=first.pk).grade, 0)
+
+    def test_rows_of_other_assignments_are_refused(self):
+        other_assignment = CourseInstanceAssignment.objects.create(
+            course_instance=self.course_instance,
+            title='Other task',
+            content='Content',
+            start_date=timezone.now(),
+        )
+        data = self.get_data({})
+        data['form-0-id'] = other_assignment.personal_assignments.first().pk
+        data['form-0-grade'] = 100
+
+        response = self.client.post(self.get_url(), data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('id', response.context['formset'].errors[0])
+        self.assertFalse(PersonalAssignment.objects.filter(grade=100).exists())
+
+    def test_query_count_does_not_grow_with_cohort(self):
+        def grade_all():
+            personal_assignments = self.course_assignment.personal_assignments.all()
+            data = self.get_data({personal_assignment: (70, True) for personal_assignment in personal_assignments})
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(self.get_url(), data=data)
+            return len(queries.captured_queries)
+
+        small = grade_all()
+        PersonalAssignment.objects.update(grade=0, is_completed=False)
+        for number in range(3, 15):
+            self.add_student(number)
+        self.assertEqual(grade_all(), small)
+        self.assertEqual(PersonalAssignment.objects.filter(grade=70, is_completed=True).count(), 15)
+
+
+class GradesExportViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('students', 'teachers', 'managers'):
+            Group.objects.create(name=name)
+
+        manager_user = CustomUser.objects.create_user(
+            email='manager1@gmail.com',
+            username='manager1',
+            password='romanroman1',
+        )
+        Manager.objects.create(user=manager_user)
+
+        cls.course = Course.objects.create(base_title='Python', description='Python course')
+        cls.course_instance = CourseInstance.objects.create(course=cls.course, sub_title='Python 2021', min_mark=60)
+        other_instance = CourseInstance.objects.create(course=cls.course, sub_title='Python 2022', min_mark=60)
+
+        now = timezone.now()
+        for course_instance in (cls.course_instance, other_instance):
+            CourseInstanceAssignment.objects.create(
+                course_instance=course_instance,
+                title='Task',
+                content='Content',
+                start_date=now - datetime.timedelta(days=10),
+                end_date=now - datetime.timedelta(days=5),
+            )
+        for number in range(3):
+            student = CustomUser.objects.create_user(email=f'student{number}@gmail.com', username=f'student{number}')
+            Enroll.objects.create(course_instance=cls.course_instance, student=student)
+            Enroll.objects.create(course_instance=other_instance, student=student)
+
+        late = PersonalAssignment.objects.filter(enroll__course_instance=cls.course_instance).earliest('pk')
+        late.grade = 75
+        late.is_completed = True
+        late.completion_date = now
+        late.save()
+
+    def get_instance_url(self, export_format):
+        return reverse('courses:course-instance-manager-export', kwargs={
+            'course_slug': self.course.slug,
+            'instance_slug': self.course_instance.slug,
+            'export_format': export_format,
+        })
+
+    def test_view_restricted_to_managers(self):
+        CustomUser.objects.create_user(email='other@gmail.com', username='other', password='romanroman1')
+        self.client.login(email='other@gmail.com', password='romanroman1')
+        response = self.client.get(self.get_instance_url('csv'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_format(self):
+        self.client.login(email='manager1@gmail.com', password='romanroman1')
+        response = self.client.get(self.get_instance_url('xlsx'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_course_instance_csv(self):
+        self.client.login(email='manager1@gmail.com', password='romanroman1')
+        response = self.client.get(self.get_instance_url('csv'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('python-python-2021-grades.csv', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['student_email'], 'student0@gmail.com')
+        self.assertEqual((rows[0]['grade'], rows[0]['is_completed'], rows[0]['is_late']), ('75', 'True', 'True'))
+        self.assertEqual(rows[1]['is_late'], 'False')
+
+    def test_course_ndjson(self):
+        self.client.login(email='manager1@gmail.com', password='romanroman1')
+        response = self.client.get(reverse('courses:course-manager-export', kwargs={
+            'slug': self.course.slug,
+            'export_format': 'ndjson',
+        }))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+        records = [json.loads(line) for line in lines]
+        self.assertEqual({record['course_instance'] for record in records}, {'Python 2021', 'Python 2022'})
+        self.assertEqual(records[0]['grade'], 75)
+
+    def test_export_runs_one_query(self):
+        self.client.login(email='manager1@gmail.com', password='romanroman1')
+        response = self.client.get(self.get_instance_url('csv'))
+        with CaptureQueriesContext(connection) as queries:
+            b''.join(response.streaming_content)
+        self.assertEqual(len(queries.captured_queries), 1)
+
+
+class KeysetPaginationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(30):
+            Course.objects.create(base_title=f'Course {number:02}', description='Description')
+
+    def setUp(self):
+        # Anonymous catalog pages outlive the rolled back test data
+        page_cache.get_cache().clear()
+
+    def get_titles(self, response):
+        return [course.base_title for course in response.context['course_list']]
+
+    def test_numbered_pages(self):
+        response = self.client.get(reverse('courses:courses-list'), {'page': 3})
+        self.assertEqual(self.get_titles(response), [f'Course {number:02}' for number in range(24, 30)])
+        page_obj = response.context['page_obj']
+        self.assertFalse(page_obj.has_next())
+        self.assertEqual(list(page_obj.page_window), [1, 2, 3])
+
+    def test_cursor_pages_follow_numbered_pages(self):
+        first = self.client.get(reverse('courses:courses-list'))
+        self.assertTrue(first.context['is_paginated'])
+        self.assertEqual(len(self.get_titles(first)), 12)
+
+        second = self.client.get(reverse('courses:courses-list'), {'after': first.context['page_obj'].next_cursor})
+        self.assertEqual(self.get_titles(second), [f'Course {number:02}' for number in range(12, 24)])
+        self.assertContains(second, f"before={second.context['page_obj'].previous_cursor}")
+
+        previous = self.client.get(reverse('courses:courses-list'), {
+            'before': second.context['page_obj'].previous_cursor,
+        })
+        self.assertEqual(self.get_titles(previous), self.get_titles(first))
+        self.assertFalse(previous.context['page_obj'].has_previous())
+
+    def test_cursor_page_does_not_count_or_offset(self):
+        first = self.client.get(reverse('courses:courses-list'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('courses:courses-list'), {'after': first.context['page_obj'].next_cursor})
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertNotIn('OFFSET', queries.captured_queries[0]['sql'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('courses:courses-list'), {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,198 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from . import models as course_models
+
+
+#####################################################################################################################
+
+
+# Request bodies are copied to the partial file in blocks of this size, nothing else of a chunk is kept in memory
+READ_BLOCK_SIZE = 64 * 1024
+# Hash states of the uploads in progress in this process, so a chunk only hashes its own bytes
+HASHER_CACHE_SIZE = 256
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """Refused request of the upload protocol; `status` is the HTTP status of the response."""
+
+    def __init__(self, message, status=400, upload=None):
+        super(UploadError, self).__init__(message)
+        self.status = status
+        self.upload = upload
+
+
+def _remember_hasher(upload, hasher):
+    with _hashers_lock:
+        _hashers[upload.pk] = (upload.offset, hasher)
+        _hashers.move_to_end(upload.pk)
+        while len(_hashers) > HASHER_CACHE_SIZE:
+            _hashers.popitem(last=False)
+
+
+def _forget_hasher(upload):
+    with _hashers_lock:
+        _hashers.pop(upload.pk, None)
+
+
+def _get_hasher(upload, path):
+    """
+    SHA-256 state of the bytes received so far. Chunks usually reach the process that hashed the previous one;
+    otherwise (another worker, a restart) the partial file is hashed once and the state is remembered again.
+    """
+    with _hashers_lock:
+        offset, hasher = _hashers.get(upload.pk, (None, None))
+    if offset == upload.offset:
+        return hasher.copy()
+
+    hasher = hashlib.sha256()
+    remaining = upload.offset
+    with open(path, 'rb') as part:
+        while remaining:
+            block = part.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    if remaining:
+        # The partial file lost bytes it had acknowledged, the client has to start over
+        _reset(upload)
+        raise UploadError('The received part of the file was lost, upload it again.', status=409, upload=upload)
+    return hasher
+
+
+def _reset(upload):
+    _forget_hasher(upload)
+    open(default_storage.path(upload.partial_name), 'wb').close()
+    course_models.AnswerUpload.objects.filter(pk=upload.pk).update(offset=0, updated_at=timezone.now())
+    upload.offset = 0
+
+
+def start_upload(personal_assignment, filename, size, sha256=''):
+    """
+    Opens an upload session for a file of `size` bytes. Files over the assignment limit are refused here,
+    before any of their bytes are sent. An empty file is attached right away.
+    """
+    filename = os.path.basename((filename or '').replace('\\', '/')).strip()
+    if not filename:
+        raise UploadError('The file name is missing.')
+    if size < 0:
+        raise UploadError('The file size is invalid.')
+    limit = personal_assignment.course_instance_assignment.get_answer_file_size_limit()
+    if size > limit:
+        raise UploadError(f'The file is larger than the {limit} bytes allowed for this assignment.', status=413)
+    sha256 = (sha256 or '').lower()
+    if sha256 and not SHA256_RE.match(sha256):
+        raise UploadError('The checksum must be a hexadecimal SHA-256 digest.')
+
+    upload = course_models.AnswerUpload(
+        personal_assignment=personal_assignment,
+        filename=filename,
+        size=size,
+        sha256=sha256,
+    )
+    upload.partial_name = course_models.student_answers_directory_path(personal_assignment, f'.{upload.pk}.part')
+    path = default_storage.path(upload.partial_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    upload.save()
+
+    if not size:
+        complete_upload(upload, hashlib.sha256())
+    return upload
+
+
+def write_chunk(upload, stream, start, length):
+    """
+    Streams `length` bytes of `stream` into the partial file at `start`, which has to be the current offset.
+    The chunk is hashed while it is written; the last one attaches the file to the personal assignment.
+    """
+    if start != upload.offset:
+        raise UploadError(f'The next chunk has to start at byte {upload.offset}.', status=409, upload=upload)
+    if start + length > upload.size:
+        raise UploadError('The chunk goes past the announced file size.', status=413, upload=upload)
+
+    path = default_storage.path(upload.partial_name)
+    try:
+        hasher = _get_hasher(upload, path)
+    except FileNotFoundError:
+        _reset(upload)
+        raise UploadError('The received part of the file was lost, upload it again.', status=409, upload=upload)
+
+    received = 0
+    with open(path, 'r+b') as part:
+        part.seek(start)
+        while received < length:
+            block = stream.read(min(READ_BLOCK_SIZE, length - received))
+            if not block:
+                break
+            part.write(block)
+            hasher.update(block)
+            received += len(block)
+        # Drops the rest of an earlier attempt of this chunk that was cut short
+        part.truncate()
+    if received != length:
+        raise UploadError('The chunk was cut short, send it again.', upload=upload)
+
+    # Of concurrent retries of the same chunk only one moves the offset
+    end = start + length
+    moved = course_models.AnswerUpload.objects.filter(pk=upload.pk, offset=start).update(
+        offset=end, updated_at=timezone.now(),
+    )
+    if not moved:
+        upload.refresh_from_db(fields=['offset'])
+        raise UploadError(f'The next chunk has to start at byte {upload.offset}.', status=409, upload=upload)
+    upload.offset = end
+
+    if end == upload.size:
+        complete_upload(upload, hasher)
+    else:
+        _remember_hasher(upload, hasher)
+    return upload
+
+
+def complete_upload(upload, hasher):
+    """
+    Hands the partial file over to the answer file storage and attaches it to the personal assignment in one
+    transaction. The content addressed storage reuses the digest, so the file is not read again; the move
+    comes last, so a failure leaves the previous answer file in place.
+    """
+    _forget_hasher(upload)
+    upload.digest = hasher.hexdigest()
+    if upload.sha256 and upload.sha256 != upload.digest:
+        _reset(upload)
+        raise UploadError('The file does not match its checksum, upload it again.', upload=upload)
+
+    personal_assignment = upload.personal_assignment
+    answer_file = personal_assignment._meta.get_field('answer_file')
+    partial_path = default_storage.path(upload.partial_name)
+    with transaction.atomic():
+        name = answer_file.storage.get_available_name(
+            answer_file.generate_filename(personal_assignment, upload.filename),
+            max_length=answer_file.max_length,
+        )
+        personal_assignment.answer_file.name = name
+        personal_assignment.save(update_fields=['answer_file'])
+        upload.delete()
+        if hasattr(answer_file.storage, 'adopt'):
+            answer_file.storage.adopt(name, partial_path, upload.digest)
+        else:
+            os.replace(partial_path, answer_file.storage.path(name))
+    return personal_assignment
+
+
+def discard_upload(upload):
+    _forget_hasher(upload)
+    upload.delete()
@@ -17,9 +17,15 @@ urlpatterns = [
     path('teacher/<slug:course_slug>/<slug:instance_slug>/',
          views.CourseInstanceTeacherDetail.as_view(),
          name='course-instance-teacher-detail'),
+    path('teacher/<slug:course_slug>/<slug:instance_slug>/gradebook/',
+         views.GradebookTeacherView.as_view(),
+         name='gradebook-teacher'),
     path('teacher/<slug:course_slug>/<slug:instance_slug>/enrolls/<int:enroll_pk>/',
          views.EnrollTeacherDetail.as_view(),
          name='enroll-teacher-detail'),
+    path('teacher/<slug:course_slug>/<slug:instance_slug>/enrolls/<int:enroll_pk>/grades/',
+         views.EnrollTeacherGradeView.as_view(),
+         name='enroll-teacher-grade'),
     path('teacher/<slug:course_slug>/<slug:instance_slug>/enrolls/<int:enroll_pk>/assignments/<int:assignment_pk>/',
          views.PersonalAssignmentTeacherDetail.as_view(),
          name='personal-assignment-teacher-detail'),
@@ -27,6 +33,9 @@ urlpatterns = [
     path('teacher/<slug:course_slug>/<slug:instance_slug>/assignments/<int:assignment_pk>/',
          views.CourseAssignmentTeacherDetail.as_view(),
          name='course-assignment-teacher-detail'),
+    path('teacher/<slug:course_slug>/<slug:instance_slug>/assignments/<int:assignment_pk>/grades/',
+         views.CourseAssignmentTeacherGradeView.as_view(),
+         name='course-assignment-teacher-grade'),
     path('teacher/<slug:course_slug>/<slug:instance_slug>/assignments/<int:assignment_pk>/change/',
          views.CourseAssignmentTeacherUpdateView.as_view(),
          name='course-assignment-teacher-change'),
@@ -45,6 +54,9 @@ urlpatterns = [
     path('manager/courses/<slug>/', views.CourseManagerDetailView.as_view(), name='course-manager-detail'),
     path('manager/courses/<slug>/edit/', views.CourseManagerUpdateView.as_view(), name='course-manager-update'),
     path('manager/courses/<slug>/delete/', views.CourseManagerDeleteView.as_view(), name='course-manager-delete'),
+    path('manager/courses/<slug>/export.<str:export_format>',
+         views.CourseManagerExportView.as_view(),
+         name='course-manager-export'),
 
     path('manager/courses/<slug:course_slug>/<slug:instance_slug>/',
          views.CourseInstanceManagerDetail.as_view(),
@@ -55,10 +67,18 @@ urlpatterns = [
     path('manager/courses/<slug:course_slug>/<slug:instance_slug>/delete/',
          views.CourseInstanceManagerDelete.as_view(),
          name='course-instance-manager-delete'),
+    path('manager/courses/<slug:course_slug>/<slug:instance_slug>/export.<str:export_format>',
+         views.CourseInstanceManagerExportView.as_view(),
+         name='course-instance-manager-export'),
+    path('manager/courses/<slug:course_slug>/<slug:instance_slug>/enrolls/import/',
+         views.CourseInstanceManagerEnrollImportView.as_view(),
+         name='course-instance-manager-enroll-import'),
 
 
 
     path('my-courses/', views.UserCoursesInstancesList.as_view(), name='user-courses'),
+    path('search/', views.CourseSearchView.as_view(), name='course-search'),
+    path('answers/<int:pk>/', views.AnswerFileView.as_view(), name='answer-file'),
     path('', views.CoursesList.as_view(), name='courses-list'),
     path('<slug>/', views.CourseDetail.as_view(), name='course-detail'),
 
@@ -70,6 +90,12 @@ urlpatterns = [
     path('<slug:course_slug>/<slug:instance_slug>/assignments/<int:pk>/',
          views.PersonalAssignmentDetail.as_view(),
          name='personal-assignment'),
+    path('<slug:course_slug>/<slug:instance_slug>/assignments/<int:pk>/uploads/',
+         views.AnswerUploadCreateView.as_view(),
+         name='answer-upload-create'),
+    path('<slug:course_slug>/<slug:instance_slug>/assignments/<int:pk>/uploads/<uuid:upload_id>/',
+         views.AnswerUploadView.as_view(),
+         name='answer-upload'),
 
 
 
@@ -1,114 +1,127 @@
+import os
+import re
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views import generic
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse, reverse_lazy
-from django.http import HttpResponseRedirect, HttpResponse
+from django.http import HttpResponseRedirect, HttpResponse, Http404, JsonResponse
 from django.views.generic.detail import SingleObjectMixin, SingleObjectTemplateResponseMixin
 
 from django.contrib.auth.models import Group
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.conf import settings
 from django.utils import timezone
 
-from braces.views import MultiplePermissionsRequiredMixin, GroupRequiredMixin
+from braces.views import MultiplePermissionsRequiredMixin
+
+from accounts.mixins import GroupRequiredMixin
 
 from . import models as course_models
 from accounts import models as account_models
 from . import forms
+from . import exports
+from . import search
+from . import uploads
+from . import downloads
+from . import imports
+from .cache import AnonymousPageCacheMixin, COURSE_SCOPE
+from .gradebook import Gradebook
+from .mixins import CourseChainMixin, KeysetPaginationMixin
 
 
 ##################################################################################################################
 
 
-class CoursesList(generic.ListView):
+class CoursesList(AnonymousPageCacheMixin, KeysetPaginationMixin, generic.ListView):
     model = course_models.Course
     template_name = 'courses/course_list.html'
+    keyset_fields = ('slug', )
+
+
+class CourseSearchView(generic.TemplateView):
+    template_name = 'courses/course_search.html'
+    results_limit = 30
+
+    def get_context_data(self, **kwargs):
+        context = super(CourseSearchView, self).get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '').strip()
+        context['results'] = search.search_courses(context['query'], limit=self.results_limit)
+        return context
 
 
-class CourseDetail(generic.DetailView):
+class CourseDetail(AnonymousPageCacheMixin, generic.DetailView):
     model = course_models.Course
 
+    def get_page_cache_scopes(self):
+        return ((COURSE_SCOPE, self.kwargs.get('slug')), )
+
     def get_context_data(self, **kwargs):
         context = super(CourseDetail, self).get_context_data(**kwargs)
         context['available_courses'] = course_models.CourseInstance.objects.filter(course__slug=self.kwargs.get('slug'))
         return context
 
 
-class CourseInstanceDetail(generic.DetailView):
+class CourseInstanceDetail(AnonymousPageCacheMixin, CourseChainMixin, generic.DetailView):
     model = course_models.CourseInstance
     template_name = 'courses/course_instance_detail.html'
     context_object_name = 'course_instance'
 
+    def get_page_cache_scopes(self):
+        # Anonymous visitors only ever get the not-enrolled branch
+        return ((COURSE_SCOPE, self.kwargs.get('course_slug')), )
+
     def get_object(self, queryset=None):
-        return get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
+        return self.get_course_instance()
 
     def get_context_data(self, **kwargs):
         context = super(CourseInstanceDetail, self).get_context_data(**kwargs)
-        if not self.request.user.is_authenticated:
-            context['is_enrolled'] = False
-        else:
-            context['is_enrolled'] = self.object.enrolls.filter(student=self.request.user).exists()
-
-        if self.request.user.is_authenticated and context['is_enrolled']:
-            context['current_enroll'] = self.object.enrolls.get(student=self.request.user)
+        current_enroll = None
+        if self.request.user.is_authenticated:
+            current_enroll = self.object.enrolls.filter(student=self.request.user).first()
+
+        context['is_enrolled'] = current_enroll is not None
+        if current_enroll is not None:
+            current_enroll.course_instance = self.object
+            context['current_enroll'] = current_enroll
+            context['personal_assignments'] = current_enroll.personal_assignments.select_related(
+                'course_instance_assignment',
+            )
         return context
 
 
-class UserCoursesInstancesList(LoginRequiredMixin, generic.ListView):
+class UserCoursesInstancesList(LoginRequiredMixin, KeysetPaginationMixin, generic.ListView):
     model = course_models.CourseInstance
     template_name = 'courses/user_courses_list.html'
     context_object_name = 'course_instances'
+    keyset_fields = ('slug', )
 
     def get_queryset(self):
-        q = course_models.CourseInstance.objects.all().filter(enrolls__student=self.request.user)
+        q = course_models.CourseInstance.objects.select_related('course').filter(enrolls__student=self.request.user)
         return q
 
 
-class DeleteEnrollView(LoginRequiredMixin, generic.DeleteView):
+class DeleteEnrollView(LoginRequiredMixin, CourseChainMixin, generic.DeleteView):
     model = course_models.Enroll
     template_name = 'courses/delete_enroll.html'
     success_url = reverse_lazy('courses:user-courses')
+    enroll_kwarg = None
 
     def get_object(self, queryset=None):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        return get_object_or_404(
-            course_models.Enroll,
-            course_instance=course_instance,
-            student=self.request.user,
-        )
+        return self.get_enroll()
 
 
-class PersonalAssignmentDisplay(LoginRequiredMixin, generic.DetailView):
+class PersonalAssignmentDisplay(LoginRequiredMixin, CourseChainMixin, generic.DetailView):
     model = course_models.PersonalAssignment
     template_name = 'courses/personal_assignment_detail.html'
     context_object_name = 'personal_assignment'
-    query_pk_and_slug = True
+    enroll_kwarg = None
+    personal_assignment_kwarg = 'pk'
 
     def get_object(self, queryset=None):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        enroll = get_object_or_404(
-            course_models.Enroll,
-            course_instance=course_instance,
-            student=self.request.user,
-        )
-        self.current_assignment = get_object_or_404(
-            course_models.PersonalAssignment,
-            enroll=enroll,
-            pk=self.kwargs.get('pk')
-        )
-
+        self.current_assignment = self.get_personal_assignment()
         return self.current_assignment
 
     def get_context_data(self, **kwargs):
@@ -122,31 +135,23 @@ class PersonalAssignmentDisplay(LoginRequiredMixin, generic.DetailView):
         return context
 
 
-class PersonalAssignmentAnswer(LoginRequiredMixin, SingleObjectMixin, generic.FormView):
+class PersonalAssignmentAnswer(LoginRequiredMixin, CourseChainMixin, SingleObjectMixin, generic.FormView):
     template_name = 'courses/personal_assignment_detail.html'
     form_class = forms.PersonalAssignmentForm
     model = course_models.PersonalAssignment
+    context_object_name = 'personal_assignment'
+    enroll_kwarg = None
+    personal_assignment_kwarg = 'pk'
+
+    def get_object(self, queryset=None):
+        return self.get_personal_assignment()
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         return super(PersonalAssignmentAnswer, self).post(request, *args, **kwargs)
 
     def form_valid(self, form):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        enroll = get_object_or_404(
-            course_models.Enroll,
-            course_instance=course_instance,
-            student=self.request.user,
-        )
-        personal_assignment = get_object_or_404(
-            course_models.PersonalAssignment,
-            enroll=enroll,
-            pk=self.kwargs.get('pk')
-        )
+        personal_assignment = self.get_personal_assignment()
 
         assignment_form = forms.PersonalAssignmentForm(self.request.POST)
         personal_assignment.answer_field = assignment_form.data['answer_field']
@@ -164,6 +169,11 @@ class PersonalAssignmentAnswer(LoginRequiredMixin, SingleObjectMixin, generic.Fo
         personal_assignment.save()
         return super(PersonalAssignmentAnswer, self).form_valid(form)
 
+    def get_form_kwargs(self):
+        kwargs = super(PersonalAssignmentAnswer, self).get_form_kwargs()
+        kwargs['size_limit'] = self.object.course_instance_assignment.get_answer_file_size_limit()
+        return kwargs
+
     def get_success_url(self):
         return reverse('courses:personal-assignment', kwargs={'course_slug': self.kwargs.get('course_slug'),
                                                               'instance_slug': self.kwargs.get('instance_slug'),
@@ -181,20 +191,145 @@ class PersonalAssignmentDetail(LoginRequiredMixin, generic.View):
         return view(request, *args, **kwargs)
 
 
+class AnswerUploadMixin(LoginRequiredMixin, CourseChainMixin):
+    """
+    JSON endpoints of the resumable answer upload (`courses.uploads`). The client opens a session with the
+    file name and size, sends the file in `PUT` requests with a `Content-Range` header, and asks for the
+    offset to resume after an interruption.
+    """
+    enroll_kwarg = None
+    personal_assignment_kwarg = 'pk'
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super(AnswerUploadMixin, self).dispatch(request, *args, **kwargs)
+        except uploads.UploadError as error:
+            data = {'error': str(error)}
+            if error.upload is not None and error.upload.pk is not None:
+                data.update(self.get_upload_data(error.upload))
+            return JsonResponse(data, status=error.status)
+
+    def get_upload_data(self, upload):
+        if upload.offset == upload.size:
+            personal_assignment = upload.personal_assignment
+            return {
+                'offset': upload.offset,
+                'size': upload.size,
+                'complete': True,
+                'file': personal_assignment.get_answer_file_url(),
+                'sha256': upload.digest,
+            }
+        return {
+            'url': reverse('courses:answer-upload', kwargs={
+                'course_slug': self.kwargs.get('course_slug'),
+                'instance_slug': self.kwargs.get('instance_slug'),
+                'pk': upload.personal_assignment_id,
+                'upload_id': upload.pk,
+            }),
+            'offset': upload.offset,
+            'size': upload.size,
+            'chunk_size': settings.ANSWER_UPLOAD_CHUNK_SIZE,
+            'complete': False,
+        }
+
+
+class AnswerUploadCreateView(AnswerUploadMixin, generic.View):
+
+    def post(self, request, *args, **kwargs):
+        try:
+            size = int(request.POST.get('size', ''))
+        except ValueError:
+            raise uploads.UploadError('The file size is invalid.')
+        upload = uploads.start_upload(
+            self.get_personal_assignment(),
+            request.POST.get('filename'),
+            size,
+            request.POST.get('sha256'),
+        )
+        return JsonResponse(self.get_upload_data(upload), status=201)
+
+
+class AnswerUploadView(AnswerUploadMixin, generic.View):
+    content_range_re = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+    def get_upload(self):
+        personal_assignment = self.get_personal_assignment()
+        upload = get_object_or_404(
+            course_models.AnswerUpload,
+            personal_assignment=personal_assignment,
+            pk=self.kwargs.get('upload_id'),
+        )
+        upload.personal_assignment = personal_assignment
+        return upload
+
+    def get_content_range(self, upload):
+        """(start, length) of the chunk from `Content-Range: bytes <first>-<last>/<size>`."""
+        match = self.content_range_re.match(self.request.META.get('HTTP_CONTENT_RANGE', ''))
+        if not match:
+            raise uploads.UploadError('The Content-Range header is missing or invalid.', upload=upload)
+        first, last, size = map(int, match.groups())
+        length = last - first + 1
+        if size != upload.size or length < 1:
+            raise uploads.UploadError('The Content-Range header does not match the upload.', upload=upload)
+        if str(length) != self.request.META.get('CONTENT_LENGTH'):
+            raise uploads.UploadError('The Content-Length header does not match the Content-Range.', upload=upload)
+        return first, length
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(self.get_upload_data(self.get_upload()))
+
+    def put(self, request, *args, **kwargs):
+        upload = self.get_upload()
+        start, length = self.get_content_range(upload)
+        uploads.write_chunk(upload, request, start, length)
+        return JsonResponse(self.get_upload_data(upload))
+
+    def delete(self, request, *args, **kwargs):
+        uploads.discard_upload(self.get_upload())
+        return HttpResponse(status=204)
+
+
+class AnswerFileView(LoginRequiredMixin, generic.View):
+    """Answer file download for the student of the enroll and for teachers."""
+
+    def get_personal_assignment(self):
+        personal_assignment = get_object_or_404(
+            course_models.PersonalAssignment.objects.select_related('enroll'), pk=self.kwargs.get('pk'),
+        )
+        user = self.request.user
+        if personal_assignment.enroll.student_id != user.pk and not (user.is_superuser or user.has_group('teachers')):
+            raise PermissionDenied
+        return personal_assignment
+
+    def get(self, request, *args, **kwargs):
+        answer_file = self.get_personal_assignment().answer_file
+        if not answer_file:
+            raise Http404('No answer file.')
+        try:
+            path = answer_file.path
+            return downloads.serve_file(request, path, os.path.basename(answer_file.name))
+        except FileNotFoundError:
+            raise Http404('The answer file is missing.')
+
+
 class CourseInstanceTeacherListView(LoginRequiredMixin,
                                     GroupRequiredMixin,
+                                    KeysetPaginationMixin,
                                     generic.ListView):
     model = course_models.CourseInstance
     group_required = 'teachers'
     template_name = 'courses/course_instance_teacher_list.html'
     context_object_name = 'course_instances'
+    keyset_fields = ('slug', )
 
     def get_queryset(self):
-        return get_object_or_404(account_models.Teacher, user=self.request.user).supervised_courses.all()
+        teacher = get_object_or_404(account_models.Teacher, user=self.request.user)
+        return teacher.supervised_courses.select_related('course')
 
 
 class CourseInstanceTeacherDetail(LoginRequiredMixin,
                                   GroupRequiredMixin,
+                                  CourseChainMixin,
                                   generic.DetailView):
     model = course_models.CourseInstance
     group_required = 'teachers'
@@ -202,15 +337,36 @@ class CourseInstanceTeacherDetail(LoginRequiredMixin,
     context_object_name = 'course_instance'
 
     def get_object(self, queryset=None):
-        return get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
+        return self.get_course_instance()
+
+    def get_context_data(self, **kwargs):
+        context = super(CourseInstanceTeacherDetail, self).get_context_data(**kwargs)
+        context['course_assignments'] = self.object.course_assignments.all()
+        context['enrolls'] = self.object.enrolls.select_related('student')
+        return context
+
+
+class GradebookTeacherView(LoginRequiredMixin,
+                           GroupRequiredMixin,
+                           CourseChainMixin,
+                           generic.DetailView):
+    model = course_models.CourseInstance
+    group_required = 'teachers'
+    template_name = 'courses/gradebook_teacher.html'
+    context_object_name = 'course_instance'
+
+    def get_object(self, queryset=None):
+        return self.get_course_instance()
+
+    def get_context_data(self, **kwargs):
+        context = super(GradebookTeacherView, self).get_context_data(**kwargs)
+        context['gradebook'] = Gradebook(self.object)
+        return context
 
 
 class EnrollTeacherDetail(LoginRequiredMixin,
                           GroupRequiredMixin,
+                          CourseChainMixin,
                           generic.DetailView):
     model = course_models.Enroll
     group_required = 'teachers'
@@ -218,20 +374,19 @@ class EnrollTeacherDetail(LoginRequiredMixin,
     context_object_name = 'enroll'
 
     def get_object(self, queryset=None):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        return get_object_or_404(
-            course_models.Enroll,
-            course_instance=course_instance,
-            pk=self.kwargs.get('enroll_pk')
+        return self.get_enroll()
+
+    def get_context_data(self, **kwargs):
+        context = super(EnrollTeacherDetail, self).get_context_data(**kwargs)
+        context['personal_assignments'] = self.object.personal_assignments.select_related(
+            'course_instance_assignment',
         )
+        return context
 
 
 class PersonalAssignmentTeacherDisplay(LoginRequiredMixin,
                                        GroupRequiredMixin,
+                                       CourseChainMixin,
                                        generic.DetailView):
 
     model = course_models.PersonalAssignment
@@ -240,21 +395,7 @@ class PersonalAssignmentTeacherDisplay(LoginRequiredMixin,
     context_object_name = 'personal_assignment'
 
     def get_object(self, queryset=None):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        enroll = get_object_or_404(
-            course_models.Enroll,
-            course_instance=course_instance,
-            pk=self.kwargs.get('enroll_pk'),
-        )
-        self.assignment = get_object_or_404(
-            course_models.PersonalAssignment,
-            enroll=enroll,
-            pk=self.kwargs.get('assignment_pk')
-        )
+        self.assignment = self.get_personal_assignment()
         return self.assignment
 
     def get_context_data(self, **kwargs):
@@ -270,6 +411,7 @@ class PersonalAssignmentTeacherDisplay(LoginRequiredMixin,
 
 class PersonalAssignmentTeacherEvaluate(LoginRequiredMixin,
                                         GroupRequiredMixin,
+                                        CourseChainMixin,
                                         SingleObjectMixin,
                                         generic.FormView):
 
@@ -279,53 +421,25 @@ class PersonalAssignmentTeacherEvaluate(LoginRequiredMixin,
     group_required = 'teachers'
     context_object_name = 'personal_assignment'
 
+    def get_object(self, queryset=None):
+        return self.get_personal_assignment()
+
     def post(self, request, *args, **kwargs):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        enroll = get_object_or_404(
-            course_models.Enroll,
-            course_instance=course_instance,
-            pk=self.kwargs.get('enroll_pk'),
-        )
-        assignment = get_object_or_404(
-            course_models.PersonalAssignment,
-            enroll=enroll,
-            pk=self.kwargs.get('assignment_pk')
-        )
-        self.object = assignment
+        self.object = self.get_object()
         return super(PersonalAssignmentTeacherEvaluate, self).post(request, *args, **kwargs)
 
     def form_valid(self, form):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        enroll = get_object_or_404(
-            course_models.Enroll,
-            course_instance=course_instance,
-            pk=self.kwargs.get('enroll_pk'),
-        )
-        personal_assignment = get_object_or_404(
-            course_models.PersonalAssignment,
-            enroll=enroll,
-            pk=self.kwargs.get('assignment_pk')
-        )
+        personal_assignment = self.get_personal_assignment()
 
-        mark_form = forms.PersonalAssignmentEvaluationForm(data=self.request.POST)
-        if mark_form.is_valid():
-            personal_assignment.grade = mark_form.data['grade']
-            if self.request.POST.get('is_completed', None):
-                personal_assignment.is_completed = True
-                if personal_assignment.completion_date is None:
-                    personal_assignment.completion_date = timezone.datetime.now()
-            else:
-                personal_assignment.is_completed = False
-                personal_assignment.completion_date = None
-            personal_assignment.save()
+        personal_assignment.grade = form.cleaned_data['grade']
+        if form.cleaned_data.get('is_completed'):
+            personal_assignment.is_completed = True
+            if personal_assignment.completion_date is None:
+                personal_assignment.completion_date = timezone.now()
+        else:
+            personal_assignment.is_completed = False
+            personal_assignment.completion_date = None
+        personal_assignment.save()
         return super(PersonalAssignmentTeacherEvaluate, self).form_valid(form)
 
     def get_success_url(self):
@@ -337,6 +451,73 @@ class PersonalAssignmentTeacherEvaluate(LoginRequiredMixin,
                        })
 
 
+class PersonalAssignmentsTeacherGradeMixin(LoginRequiredMixin,
+                                           GroupRequiredMixin,
+                                           CourseChainMixin,
+                                           generic.FormView):
+    """
+    Grades a set of personal assignments at once: every row is validated, the changed ones are saved together
+    and the invalid ones are shown again with their errors. The set are the personal assignments of the
+    `grading_parent` of the course chain (`'course_assignment'` or `'enroll'`), sorted by `ordering`.
+    """
+    group_required = 'teachers'
+    template_name = 'courses/personal_assignments_teacher_grade.html'
+    form_class = forms.PersonalAssignmentGradingFormSet
+    grading_parent = 'course_assignment'
+    ordering = ('pk', )
+
+    def get_grading_parent(self):
+        return getattr(self, f'get_{self.grading_parent}')()
+
+    def get_queryset(self):
+        return self.get_grading_parent().personal_assignments.select_related(
+            'enroll__student', 'course_instance_assignment',
+        ).order_by(*self.ordering)
+
+    def get_form_kwargs(self):
+        kwargs = super(PersonalAssignmentsTeacherGradeMixin, self).get_form_kwargs()
+        kwargs['queryset'] = self.get_queryset()
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super(PersonalAssignmentsTeacherGradeMixin, self).get_context_data(**kwargs)
+        context['formset'] = context.pop('form')
+        context['course_instance'] = self.get_course_instance()
+        context[self.grading_parent] = self.get_grading_parent()
+        return context
+
+    def form_valid(self, form):
+        graded = form.save_grades()
+        messages.success(self.request, f"Saved {len(graded)} grade(s).")
+        return super(PersonalAssignmentsTeacherGradeMixin, self).form_valid(form)
+
+    def form_invalid(self, form):
+        invalid_rows = sum(1 for errors in form.errors if errors)
+        messages.error(self.request, f"Nothing was saved, {invalid_rows} row(s) have errors.")
+        return super(PersonalAssignmentsTeacherGradeMixin, self).form_invalid(form)
+
+
+class CourseAssignmentTeacherGradeView(PersonalAssignmentsTeacherGradeMixin):
+    grading_parent = 'course_assignment'
+    ordering = ('enroll__student__username', )
+
+    def get_success_url(self):
+        return self.get_course_assignment().get_absolute_url()
+
+
+class EnrollTeacherGradeView(PersonalAssignmentsTeacherGradeMixin):
+    grading_parent = 'enroll'
+    ordering = ('course_instance_assignment__start_date', 'pk')
+
+    def get_success_url(self):
+        return reverse('courses:enroll-teacher-detail',
+                       kwargs={
+                           'course_slug': self.kwargs.get('course_slug'),
+                           'instance_slug': self.kwargs.get('instance_slug'),
+                           'enroll_pk': self.kwargs.get('enroll_pk'),
+                       })
+
+
 class PersonalAssignmentTeacherDetail(LoginRequiredMixin,
                                       GroupRequiredMixin,
                                       generic.DetailView):
@@ -353,6 +534,7 @@ class PersonalAssignmentTeacherDetail(LoginRequiredMixin,
 
 class CourseAssignmentTeacherDetail(LoginRequiredMixin,
                                     GroupRequiredMixin,
+                                    CourseChainMixin,
                                     generic.DetailView):
 
     group_required = 'teachers'
@@ -361,20 +543,19 @@ class CourseAssignmentTeacherDetail(LoginRequiredMixin,
     context_object_name = 'course_assignment'
 
     def get_object(self, queryset=None):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        return get_object_or_404(
-            course_models.CourseInstanceAssignment,
-            course_instance=course_instance,
-            pk=self.kwargs.get('assignment_pk')
+        return self.get_course_assignment()
+
+    def get_context_data(self, **kwargs):
+        context = super(CourseAssignmentTeacherDetail, self).get_context_data(**kwargs)
+        context['personal_assignments'] = self.object.personal_assignments.select_related(
+            'enroll__student', 'course_instance_assignment',
         )
+        return context
 
 
 class CourseAssignmentTeacherCreateView(LoginRequiredMixin,
                                         GroupRequiredMixin,
+                                        CourseChainMixin,
                                         generic.CreateView):
     group_required = 'teachers'
     model = course_models.CourseInstanceAssignment
@@ -383,18 +564,19 @@ class CourseAssignmentTeacherCreateView(LoginRequiredMixin,
     form_class = forms.CourseAssignmentForm
     
     def form_valid(self, form):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
         self.object = form.save(commit=False)
-        self.object.course_instance = course_instance
-        return super(CourseAssignmentTeacherCreateView, self).form_valid(form)
+        self.object.course_instance = self.get_course_instance()
+        response = super(CourseAssignmentTeacherCreateView, self).form_valid(form)
+        messages.success(
+            self.request,
+            f"Assignment was given to {getattr(self.object, 'personal_assignments_created', 0)} student(s)."
+        )
+        return response
 
 
 class CourseAssignmentTeacherUpdateView(LoginRequiredMixin,
                                         GroupRequiredMixin,
+                                        CourseChainMixin,
                                         generic.UpdateView):
     group_required = 'teachers'
     model = course_models.CourseInstanceAssignment
@@ -403,16 +585,7 @@ class CourseAssignmentTeacherUpdateView(LoginRequiredMixin,
     form_class = forms.CourseAssignmentForm
 
     def get_object(self, queryset=None):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        return get_object_or_404(
-            course_models.CourseInstanceAssignment,
-            course_instance=course_instance,
-            pk=self.kwargs.get('assignment_pk')
-        )
+        return self.get_course_assignment()
 
     def get_success_url(self):
         return reverse(
@@ -425,6 +598,7 @@ class CourseAssignmentTeacherUpdateView(LoginRequiredMixin,
 
 class CourseAssignmentTeacherDeleteView(LoginRequiredMixin,
                                         GroupRequiredMixin,
+                                        CourseChainMixin,
                                         generic.DeleteView):
     group_required = 'teachers'
     model = course_models.CourseInstanceAssignment
@@ -432,16 +606,7 @@ class CourseAssignmentTeacherDeleteView(LoginRequiredMixin,
     context_object_name = 'course_assignment'
 
     def get_object(self, queryset=None):
-        course_instance = get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
-        return get_object_or_404(
-            course_models.CourseInstanceAssignment,
-            course_instance=course_instance,
-            pk=self.kwargs.get('assignment_pk')
-        )
+        return self.get_course_assignment()
 
     def get_success_url(self):
         return reverse_lazy(
@@ -458,15 +623,17 @@ class CourseAssignmentTeacherDeleteView(LoginRequiredMixin,
 
 class CourseManagerListView(LoginRequiredMixin,
                             GroupRequiredMixin,
+                            KeysetPaginationMixin,
                             generic.ListView):
 
     group_required = 'managers'
     model = course_models.Course
     template_name = 'courses/course_manager_list.html'
     context_object_name = 'courses'
+    keyset_fields = ('slug', )
 
     def get_queryset(self):
-        return get_object_or_404(account_models.Manager, user=self.request.user).supervised_courses.all
+        return get_object_or_404(account_models.Manager, user=self.request.user).supervised_courses.all()
 
 
 class CourseManagerDetailView(LoginRequiredMixin,
@@ -525,19 +692,23 @@ class CourseManagerDeleteView(LoginRequiredMixin,
 
 class CourseInstanceManagerListView(LoginRequiredMixin,
                                     GroupRequiredMixin,
+                                    KeysetPaginationMixin,
                                     generic.ListView):
 
     group_required = 'managers'
     model = course_models.CourseInstance
     template_name = 'courses/course_instance_manager_list.html'
     context_object_name = 'course_instances'
+    keyset_fields = ('slug', )
 
     def get_queryset(self):
-        return get_object_or_404(account_models.Manager, user=self.request.user).supervised_course_instances.all
+        manager = get_object_or_404(account_models.Manager, user=self.request.user)
+        return manager.supervised_course_instances.select_related('course')
 
 
 class CourseInstanceManagerDetail(LoginRequiredMixin,
                                   GroupRequiredMixin,
+                                  CourseChainMixin,
                                   generic.DetailView):
 
     group_required = 'managers'
@@ -546,11 +717,53 @@ class CourseInstanceManagerDetail(LoginRequiredMixin,
     context_object_name = 'course_instance'
 
     def get_object(self, queryset=None):
-        return get_object_or_404(
-            course_models.CourseInstance,
-            course__slug=self.kwargs.get('course_slug'),
-            slug=self.kwargs.get('instance_slug'),
-        )
+        return self.get_course_instance()
+
+
+class CourseInstanceManagerEnrollImportView(LoginRequiredMixin,
+                                            GroupRequiredMixin,
+                                            CourseChainMixin,
+                                            generic.FormView):
+    """
+    Enrolls the students of a CSV: the first submission only shows what the import will do,
+    the confirmation of that preview creates the missing users and the enrolls.
+    """
+    group_required = 'managers'
+    template_name = 'courses/course_instance_enroll_import.html'
+    form_class = forms.EnrollmentImportForm
+
+    def get_context_data(self, **kwargs):
+        context = super(CourseInstanceManagerEnrollImportView, self).get_context_data(**kwargs)
+        context['course_instance'] = self.get_course_instance()
+        return context
+
+    def form_valid(self, form):
+        enrollment_import = imports.EnrollmentImport(self.get_course_instance(), form.cleaned_data['rows'])
+        if not form.cleaned_data['confirm'] or form.cleaned_data['row_errors']:
+            confirm_form = forms.EnrollmentImportForm(initial={
+                'csv_content': form.cleaned_data['csv_content'],
+                'confirm': True,
+            })
+            return self.render_to_response(self.get_context_data(
+                form=form,
+                confirm_form=confirm_form,
+                preview=enrollment_import,
+                row_errors=form.cleaned_data['row_errors'],
+            ))
+
+        users_created, enrolls_created = enrollment_import.apply()
+        messages.success(
+            self.request,
+            f"Enrolled {enrolls_created} student(s), {users_created} of them with a new account.",
+        )
+        return super(CourseInstanceManagerEnrollImportView, self).form_valid(form)
+
+    def get_success_url(self):
+        return reverse('courses:course-instance-manager-detail',
+                       kwargs={
+                           'course_slug': self.kwargs.get('course_slug'),
+                           'instance_slug': self.kwargs.get('instance_slug'),
+                       })
 
 
 class CourseInstanceManagerCreateView(LoginRequiredMixin,
@@ -580,6 +793,7 @@ class CourseInstanceManagerCreateView(LoginRequiredMixin,
     #  'start_date' + 'end_date'
 class CourseInstanceManagerUpdate(LoginRequiredMixin,
                                   GroupRequiredMixin,
+                                  CourseChainMixin,
                                   generic.UpdateView):
     group_required = 'managers'
     model = course_models.CourseInstance
@@ -588,10 +802,7 @@ class CourseInstanceManagerUpdate(LoginRequiredMixin,
     form_class = forms.CourseInstanceForm
 
     def get_object(self, queryset=None):
-        return get_object_or_404(course_models.CourseInstance,
-                                 course=get_object_or_404(course_models.Course,
-                                                          slug=self.kwargs.get('course_slug')),
-                                 slug=self.kwargs.get('instance_slug'))
+        return self.get_course_instance()
 
     def get_success_url(self):
         return reverse('courses:course-instance-manager-detail',
@@ -603,6 +814,7 @@ class CourseInstanceManagerUpdate(LoginRequiredMixin,
 
 class CourseInstanceManagerDelete(LoginRequiredMixin,
                                   GroupRequiredMixin,
+                                  CourseChainMixin,
                                   generic.DeleteView):
     group_required = 'managers'
     model = course_models.CourseInstance
@@ -610,15 +822,54 @@ class CourseInstanceManagerDelete(LoginRequiredMixin,
     context_object_name = 'course_instance'
 
     def get_object(self, queryset=None):
-        return get_object_or_404(course_models.CourseInstance,
-                                 course=get_object_or_404(course_models.Course,
-                                                          slug=self.kwargs.get('course_slug')),
-                                 slug=self.kwargs.get('instance_slug'))
+        return self.get_course_instance()
 
     def get_success_url(self):
         return reverse_lazy('courses:course-manager-detail', kwargs={'slug': self.kwargs.get('course_slug')})
 
 
+class GradesExportMixin(object):
+    """Streams the grades returned by `get_export_rows()` in the format given by the `export_format` URL kwarg."""
+
+    def get(self, request, *args, **kwargs):
+        export_format = self.kwargs.get('export_format')
+        if export_format not in exports.RENDERERS:
+            raise Http404(f"Unknown export format: {export_format}")
+        return exports.streaming_export_response(self.get_export_rows(), export_format, self.get_export_filename())
+
+
+class CourseManagerExportView(LoginRequiredMixin,
+                              GroupRequiredMixin,
+                              GradesExportMixin,
+                              generic.View):
+
+    group_required = 'managers'
+
+    def get_course(self):
+        return get_object_or_404(course_models.Course, slug=self.kwargs.get('slug'))
+
+    def get_export_rows(self):
+        return exports.get_course_grades(self.get_course())
+
+    def get_export_filename(self):
+        return f"{self.kwargs.get('slug')}-grades"
+
+
+class CourseInstanceManagerExportView(LoginRequiredMixin,
+                                      GroupRequiredMixin,
+                                      CourseChainMixin,
+                                      GradesExportMixin,
+                                      generic.View):
+
+    group_required = 'managers'
+
+    def get_export_rows(self):
+        return exports.get_course_instance_grades(self.get_course_instance())
+
+    def get_export_filename(self):
+        return f"{self.kwargs.get('course_slug')}-{self.kwargs.get('instance_slug')}-grades"
+
+
 ######################################################################################################################
 
 
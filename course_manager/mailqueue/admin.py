@@ -0,0 +1,37 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from . import models as mail_models
+
+
+#######################################################################################################################
+
+
+@admin.register(mail_models.OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'from_email', 'to', 'attempts', 'next_attempt_at', 'created_at')
+    search_fields = ('subject', 'from_email')
+    readonly_fields = ('claim', )
+
+
+@admin.register(mail_models.DeadLetterEmail)
+class DeadLetterEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'from_email', 'to', 'attempts', 'last_error', 'failed_at')
+    search_fields = ('subject', 'from_email', 'last_error')
+    actions = ('requeue', )
+
+    def requeue(self, request, queryset):
+        mail_models.OutboundEmail.objects.bulk_create(
+            mail_models.OutboundEmail(
+                subject=email.subject,
+                from_email=email.from_email,
+                to=email.to,
+                message=email.message,
+                created_at=email.created_at,
+                next_attempt_at=timezone.now(),
+            )
+            for email in queryset
+        )
+        count, _ = queryset.delete()
+        self.message_user(request, f"{count} email(s) queued again.")
+    requeue.short_description = 'Queue the selected emails again'
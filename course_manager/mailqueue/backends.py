@@ -0,0 +1,27 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from . import models as mail_models
+
+
+#######################################################################################################################
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Stores messages in the outbound queue instead of sending them; `manage.py send_queued_mail` delivers them.
+    The rows are written in the caller's transaction, so mails of a rolled back request are never sent.
+    """
+
+    def send_messages(self, email_messages):
+        queued = [
+            mail_models.OutboundEmail.from_message(email_message)
+            for email_message in email_messages
+            if email_message.recipients()
+        ]
+        try:
+            mail_models.OutboundEmail.objects.bulk_create(queued)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(queued)
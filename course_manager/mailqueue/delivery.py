@@ -0,0 +1,125 @@
+import datetime
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from . import models as mail_models
+
+
+#######################################################################################################################
+
+
+DeliveryResult = namedtuple('DeliveryResult', ('sent', 'retried', 'dead'))
+
+
+def get_delivery_connection():
+    return get_connection(getattr(settings, 'MAILQUEUE_DELIVERY_BACKEND',
+                                  'django.core.mail.backends.smtp.EmailBackend'))
+
+
+def get_max_attempts():
+    return getattr(settings, 'MAILQUEUE_MAX_ATTEMPTS', 5)
+
+
+def get_retry_delay(attempts):
+    """Exponential backoff: `MAILQUEUE_RETRY_DELAY` seconds after the first failure, doubled after each next one."""
+    delay = getattr(settings, 'MAILQUEUE_RETRY_DELAY', 60) * 2 ** (attempts - 1)
+    return datetime.timedelta(seconds=min(delay, getattr(settings, 'MAILQUEUE_MAX_RETRY_DELAY', 60 * 60)))
+
+
+def claim_batch(batch_size):
+    """
+    Due emails leased to this worker. The lease moves `next_attempt_at` forward, so a crashed worker's
+    emails are picked up again once it expires, and concurrent workers never claim the same rows.
+    """
+    now = timezone.now()
+    claim = uuid.uuid4().hex
+    due = list(mail_models.OutboundEmail.objects.due(now).values_list('pk', flat=True)[:batch_size])
+    lease = datetime.timedelta(seconds=getattr(settings, 'MAILQUEUE_LEASE', 5 * 60))
+    mail_models.OutboundEmail.objects.due(now).filter(pk__in=due).update(claim=claim, next_attempt_at=now + lease)
+    return list(mail_models.OutboundEmail.objects.filter(claim=claim))
+
+
+def record_failure(email, error):
+    """Schedules a retry with backoff, or moves the email to the dead letters after the last attempt."""
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts < get_max_attempts():
+        email.claim = ''
+        email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+        email.save(update_fields=['attempts', 'last_error', 'claim', 'next_attempt_at'])
+        return False
+
+    with transaction.atomic():
+        mail_models.DeadLetterEmail.objects.create(
+            subject=email.subject,
+            from_email=email.from_email,
+            to=email.to,
+            message=email.message,
+            created_at=email.created_at,
+            attempts=email.attempts,
+            last_error=email.last_error,
+        )
+        email.delete()
+    return True
+
+
+def deliver_batch(batch_size=100, connection=None):
+    """Sends one claimed batch over a single connection of the delivery backend."""
+    emails = claim_batch(batch_size)
+    if not emails:
+        return DeliveryResult(0, 0, 0)
+
+    connection = connection or get_delivery_connection()
+    sent, retried, dead = [], 0, 0
+    try:
+        connection.open()
+    except Exception as error:
+        # The server is unreachable, none of the batch can go out
+        dead = sum(record_failure(email, error) for email in emails)
+        return DeliveryResult(0, len(emails) - dead, dead)
+
+    try:
+        for position, email in enumerate(emails):
+            try:
+                connection.send_messages([email.to_message()])
+            except Exception as error:
+                if record_failure(email, error):
+                    dead += 1
+                else:
+                    retried += 1
+            else:
+                sent.append(email.pk)
+                continue
+
+            # The failure may have broken the connection, the rest of the batch goes over a new one
+            unsent = emails[position + 1:]
+            if not unsent:
+                break
+            connection.close()
+            try:
+                connection.open()
+            except Exception as error:
+                failed = sum(record_failure(email, error) for email in unsent)
+                dead += failed
+                retried += len(unsent) - failed
+                break
+    finally:
+        connection.close()
+        mail_models.OutboundEmail.objects.filter(pk__in=sent).delete()
+
+    return DeliveryResult(len(sent), retried, dead)
+
+
+def drain(batch_size=100):
+    """Delivers batches until no email is due; returns the totals."""
+    totals = DeliveryResult(0, 0, 0)
+    while True:
+        result = deliver_batch(batch_size)
+        if not any(result):
+            return totals
+        totals = DeliveryResult(*(total + count for total, count in zip(totals, result)))
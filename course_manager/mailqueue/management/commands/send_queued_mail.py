@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mailqueue import delivery
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound emails in batches over one reused connection of MAILQUEUE_DELIVERY_BACKEND.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Emails claimed and sent per connection.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            result = delivery.drain(options['batch_size'])
+            if any(result) or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Sent {result.sent} email(s), {result.retried} scheduled for retry, {result.dead} dead."
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,105 @@
+import base64
+
+from django.core.mail import EmailMultiAlternatives
+from django.db import models
+from django.utils import timezone
+
+
+#######################################################################################################################
+
+
+class QueuedEmailMixin(models.Model):
+    """
+    An `EmailMessage` stored as plain data, so any delivery backend can send it later.
+    Attachments are kept base64 encoded; `MIMEBase` attachments are stored as their rendered bytes.
+    """
+    subject = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    message = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+    @staticmethod
+    def serialize_message(email_message):
+        attachments = []
+        for attachment in email_message.attachments:
+            if isinstance(attachment, tuple):
+                filename, content, mimetype = attachment
+                if isinstance(content, str):
+                    content = content.encode()
+            else:
+                filename, content, mimetype = attachment.get_filename(), attachment.as_bytes(), None
+            attachments.append([filename, base64.b64encode(content).decode(), mimetype])
+
+        return {
+            'body': email_message.body,
+            'cc': list(email_message.cc),
+            'bcc': list(email_message.bcc),
+            'reply_to': list(email_message.reply_to),
+            'headers': dict(email_message.extra_headers),
+            'alternatives': [list(alternative) for alternative in getattr(email_message, 'alternatives', [])],
+            'content_subtype': email_message.content_subtype,
+            'attachments': attachments,
+        }
+
+    @classmethod
+    def from_message(cls, email_message, **kwargs):
+        return cls(
+            subject=email_message.subject,
+            from_email=email_message.from_email,
+            to=list(email_message.to),
+            message=cls.serialize_message(email_message),
+            **kwargs
+        )
+
+    def to_message(self, connection=None):
+        message = self.message
+        email_message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=message.get('body', ''),
+            from_email=self.from_email,
+            to=self.to,
+            cc=message.get('cc'),
+            bcc=message.get('bcc'),
+            reply_to=message.get('reply_to'),
+            headers=message.get('headers'),
+            alternatives=[tuple(alternative) for alternative in message.get('alternatives', [])],
+            connection=connection,
+        )
+        email_message.content_subtype = message.get('content_subtype', 'plain')
+        for filename, content, mimetype in message.get('attachments', []):
+            email_message.attach(filename, base64.b64decode(content), mimetype)
+        return email_message
+
+
+class OutboundEmailQuerySet(models.QuerySet):
+
+    def due(self, now=None):
+        return self.filter(next_attempt_at__lte=now or timezone.now())
+
+
+class OutboundEmail(QueuedEmailMixin):
+    # Also the lease of a worker that claimed the row, see `mailqueue.delivery.claim_batch`
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    claim = models.CharField(max_length=32, blank=True, db_index=True)
+
+    objects = OutboundEmailQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('next_attempt_at', 'pk')
+
+
+class DeadLetterEmail(QueuedEmailMixin):
+    failed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ('-failed_at', )
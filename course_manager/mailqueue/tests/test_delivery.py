@@ -0,0 +1,125 @@
+import datetime
+import socket
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.core import mail
+from django.core.management import call_command
+
+from django.urls import reverse
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from mailqueue import delivery
+from mailqueue.models import OutboundEmail, DeadLetterEmail
+from mailqueue.tests.smtp_server import SMTPServer
+
+
+######################################################################################################################
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def smtp_settings(port):
+    return override_settings(
+        MAILQUEUE_DELIVERY_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST='127.0.0.1',
+        EMAIL_PORT=port,
+        EMAIL_USE_TLS=False,
+        EMAIL_HOST_USER='',
+        EMAIL_HOST_PASSWORD='',
+    )
+
+
+@override_settings(
+    EMAIL_BACKEND='mailqueue.backends.QueuedEmailBackend',
+    MAILQUEUE_MAX_ATTEMPTS=2,
+    MAILQUEUE_RETRY_DELAY=60,
+)
+class MailQueueTest(TestCase):
+
+    def queue(self, *recipients, **kwargs):
+        for recipient in recipients:
+            message = mail.EmailMultiAlternatives('Subject', 'Body', 'from@gmail.com', [recipient], **kwargs)
+            message.attach_alternative('<p>Body</p>', 'text/html')
+            message.attach('grades.csv', 'email,grade\n', 'text/csv')
+            message.send()
+
+    def test_password_reset_is_queued(self):
+        Group.objects.create(name='students')
+        CustomUser.objects.create_user(email='user@gmail.com', username='user', password='romanroman1')
+        response = self.client.post(reverse('accounts:password_reset'), {'email': 'user@gmail.com'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().to, ['user@gmail.com'])
+
+    def test_message_round_trip(self):
+        self.queue('to@gmail.com', cc=['cc@gmail.com'], reply_to=['reply@gmail.com'], headers={'X-Tag': 'grades'})
+        message = OutboundEmail.objects.get().to_message()
+
+        self.assertEqual((message.subject, message.body, message.from_email), ('Subject', 'Body', 'from@gmail.com'))
+        self.assertEqual(message.recipients(), ['to@gmail.com', 'cc@gmail.com'])
+        self.assertEqual(message.reply_to, ['reply@gmail.com'])
+        self.assertEqual(message.extra_headers, {'X-Tag': 'grades'})
+        self.assertEqual(message.alternatives, [('<p>Body</p>', 'text/html')])
+        self.assertEqual(message.attachments, [('grades.csv', 'email,grade\n', 'text/csv')])
+
+    def test_batch_uses_one_connection(self):
+        self.queue(*(f'student{number}@gmail.com' for number in range(5)))
+        with SMTPServer() as server, smtp_settings(server.port):
+            result = delivery.drain(batch_size=10)
+
+        self.assertEqual(result, delivery.DeliveryResult(5, 0, 0))
+        self.assertEqual(len(server.connections), 1)
+        self.assertEqual([recipients for recipients, _ in server.messages],
+                         [[f'student{number}@gmail.com'] for number in range(5)])
+        self.assertIn('Content-Type: text/html', server.messages[0][1])
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_failures_are_retried_then_dead_lettered(self):
+        self.queue('first@gmail.com', 'missing@gmail.com', 'last@gmail.com')
+        with SMTPServer(rejected={'missing@gmail.com'}) as server, smtp_settings(server.port):
+            result = delivery.drain()
+            self.assertEqual(result, delivery.DeliveryResult(2, 1, 0))
+            self.assertEqual(len(server.messages), 2)
+
+            email = OutboundEmail.objects.get()
+            self.assertEqual(email.attempts, 1)
+            self.assertIn('SMTPRecipientsRefused', email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now() + datetime.timedelta(seconds=50))
+            # Not due yet
+            self.assertEqual(delivery.drain(), delivery.DeliveryResult(0, 0, 0))
+
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(delivery.drain(), delivery.DeliveryResult(0, 0, 1))
+
+        self.assertFalse(OutboundEmail.objects.exists())
+        dead = DeadLetterEmail.objects.get()
+        self.assertEqual((dead.to, dead.attempts), (['missing@gmail.com'], 2))
+
+    def test_connection_is_reopened_once_after_failure(self):
+        self.queue('first@gmail.com', 'missing@gmail.com', *(f'student{number}@gmail.com' for number in range(3)))
+        with SMTPServer(rejected={'missing@gmail.com'}) as server, smtp_settings(server.port):
+            result = delivery.drain(batch_size=10)
+
+        self.assertEqual(result, delivery.DeliveryResult(4, 1, 0))
+        self.assertEqual([len(messages) for messages in server.connections], [1, 3])
+
+    def test_unreachable_server_retries_whole_batch(self):
+        self.queue('first@gmail.com', 'second@gmail.com')
+        with smtp_settings(free_port()):
+            self.assertEqual(delivery.drain(), delivery.DeliveryResult(0, 2, 0))
+        self.assertEqual(list(OutboundEmail.objects.values_list('attempts', flat=True)), [1, 1])
+
+    def test_command(self):
+        self.queue('first@gmail.com')
+        out = StringIO()
+        with SMTPServer() as server, smtp_settings(server.port):
+            call_command('send_queued_mail', stdout=out)
+        self.assertIn('Sent 1 email(s), 0 scheduled for retry, 0 dead.', out.getvalue())
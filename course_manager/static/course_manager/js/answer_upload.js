@@ -0,0 +1,125 @@
+/*
+ * Resumable answer upload: the file of the answer form is sent in chunks to the upload endpoint before the
+ * form is submitted without it. An interrupted upload resumes from the last received byte, also after a reload.
+ */
+(function () {
+    'use strict';
+
+    var MAX_RETRIES = 5;
+
+    function sessionKey(form, file) {
+        return ['answer-upload', form.dataset.uploadUrl, file.name, file.size, file.lastModified].join(':');
+    }
+
+    function request(method, url, csrfToken, body, headers) {
+        return fetch(url, {
+            method: method,
+            body: body,
+            credentials: 'same-origin',
+            headers: Object.assign({'X-CSRFToken': csrfToken}, headers || {}),
+        }).then(function (response) {
+            return response.json().then(function (data) {
+                data.status = response.status;
+                return data;
+            });
+        });
+    }
+
+    function openSession(form, file, csrfToken) {
+        var key = sessionKey(form, file);
+        var url = window.localStorage.getItem(key);
+        var resumed = url ? request('GET', url, csrfToken) : Promise.resolve({status: 404});
+
+        return resumed.then(function (session) {
+            if (session.status === 200) {
+                return session;
+            }
+            var data = new FormData();
+            data.append('filename', file.name);
+            data.append('size', file.size);
+            return request('POST', form.dataset.uploadUrl, csrfToken, data).then(function (created) {
+                if (created.status !== 201) {
+                    throw new Error(created.error);
+                }
+                if (created.url) {
+                    window.localStorage.setItem(key, created.url);
+                }
+                return created;
+            });
+        });
+    }
+
+    function sendChunks(session, file, csrfToken, progress, retries) {
+        if (session.complete) {
+            return Promise.resolve(session);
+        }
+        var end = Math.min(session.offset + session.chunk_size, file.size);
+        var headers = {
+            'Content-Type': 'application/octet-stream',
+            'Content-Range': 'bytes ' + session.offset + '-' + (end - 1) + '/' + file.size,
+        };
+        return request('PUT', session.url, csrfToken, file.slice(session.offset, end), headers).then(
+            function (result) {
+                if (result.status === 200 || result.status === 409) {
+                    // 409: the server has another offset (a lost response or part), continue from there
+                    progress.value = result.offset;
+                    return sendChunks(Object.assign(session, result), file, csrfToken, progress, MAX_RETRIES);
+                }
+                throw new Error(result.error);
+            },
+            function (error) {
+                if (!retries) {
+                    throw error;
+                }
+                return new Promise(function (resolve) {
+                    window.setTimeout(resolve, (MAX_RETRIES - retries + 1) * 1000);
+                }).then(function () {
+                    return request('GET', session.url, csrfToken);
+                }).then(function (current) {
+                    return sendChunks(Object.assign(session, current), file, csrfToken, progress, retries - 1);
+                }, function () {
+                    return sendChunks(session, file, csrfToken, progress, retries - 1);
+                });
+            }
+        );
+    }
+
+    function upload(form, input) {
+        var file = input.files[0];
+        var csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+        var progress = document.createElement('progress');
+        progress.max = file.size;
+        input.parentNode.appendChild(progress);
+
+        return openSession(form, file, csrfToken).then(function (session) {
+            return sendChunks(session, file, csrfToken, progress, MAX_RETRIES);
+        }).then(function () {
+            window.localStorage.removeItem(sessionKey(form, file));
+            // The file is attached already, the form only saves the text answer
+            input.value = '';
+        }).catch(function (error) {
+            progress.remove();
+            window.alert(error.message || 'The file could not be uploaded.');
+            throw error;
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('form[data-upload-url]').forEach(function (form) {
+            var input = form.querySelector('input[type=file][name=answer_file]');
+            if (!input || !window.fetch || !window.Blob) {
+                return;
+            }
+            form.addEventListener('submit', function (event) {
+                if (!input.files.length || form.dataset.uploaded) {
+                    return;
+                }
+                event.preventDefault();
+                upload(form, input).then(function () {
+                    form.dataset.uploaded = 'true';
+                    form.submit();
+                });
+            });
+        });
+    });
+})();